@@ -0,0 +1,56 @@
+"""Manage bearer tokens for /api/v1 clients such as room kiosks.
+
+Usage:
+    python api_tokens.py create EMAIL NAME
+    python api_tokens.py list EMAIL
+    python api_tokens.py revoke TOKEN_ID
+
+`create` prints the token once; only its hash is stored.
+"""
+import argparse
+import sys
+
+from models.api_token_model import ApiToken
+from models.user_model import User
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    create = commands.add_parser('create', help='issue a token for a user')
+    create.add_argument('email')
+    create.add_argument('name', help='label, e.g. "Kiosk Building 2"')
+    listing = commands.add_parser('list', help="list a user's tokens")
+    listing.add_argument('email')
+    revoke = commands.add_parser('revoke', help='delete a token')
+    revoke.add_argument('token_id', type=int)
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    if args.command == 'revoke':
+        if not ApiToken.revoke(args.token_id):
+            print(f"No token #{args.token_id}.")
+            return 1
+        print(f"Token #{args.token_id} revoked.")
+        return 0
+
+    user = User.get_user_by_email(args.email)
+    if not user:
+        print(f"No user with email {args.email}.")
+        return 1
+    if args.command == 'create':
+        token = ApiToken.create(user['id'], args.name)
+        if token is None:
+            return 1
+        print(token)
+        return 0
+    for token in ApiToken.get_tokens_by_user(user['id']):
+        print(f"#{token['id']:<6} {token['name']:30} created {token['created_at']}  "
+              f"last used {token['last_used_at'] or 'never'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
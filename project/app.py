@@ -1,16 +1,118 @@
-from flask import Flask, render_template, redirect, url_for
+import hashlib
+import time
+from flask import Flask, render_template, redirect, url_for, request, session, g, jsonify
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
 from routes.auth_routes import auth_bp
 from routes.reservation_routes import reservation_bp
 from routes.admin_routes import admin_bp
+from routes.api_routes import api_bp
+from routes.api_v1_routes import api_v1_bp
+from models.db_connection import PoolTimeoutError, begin_request, wrote_to_primary
+from models.password_hasher import HashingBusyError
+from models.cache import DataCache
+from models.metrics import Metrics
+from models.rate_limiter import RateLimiter, RateLimitedError
+from models.retention_model import Retention
 
 app = Flask(__name__)
 app.config.from_object(Config)
+if Config.TRUSTED_PROXIES > 0:
+    # request.remote_addr is the client, not the proxy (rate limits are per IP)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.TRUSTED_PROXIES)
 
 # Register Blueprints
 app.register_blueprint(auth_bp)
 app.register_blueprint(reservation_bp)
 app.register_blueprint(admin_bp)
+app.register_blueprint(api_bp)
+app.register_blueprint(api_v1_bp)
+
+# Re-check cache version stamps once per request
+app.before_request(DataCache.begin_request)
+
+if Config.DB_REPLICAS:
+    @app.before_request
+    def route_reads():
+        # Sessions that wrote recently read from the primary (read-your-writes)
+        begin_request(pinned=session.get('primary_until', 0) > time.time())
+
+    @app.after_request
+    def pin_after_write(response):
+        if wrote_to_primary():
+            session['primary_until'] = time.time() + Config.DB_PRIMARY_PIN_SECONDS
+        return response
+
+if Config.METRICS_ENABLED:
+    app.before_request(Metrics.begin_request)
+
+    @app.after_request
+    def record_request_metrics(response):
+        Metrics.end_request(request.endpoint, request.method, response.status_code)
+        return response
+
+    @app.teardown_request
+    def record_failed_request(error):
+        # after_request is skipped for unhandled exceptions; no-op otherwise
+        if error is not None:
+            Metrics.end_request(request.endpoint, request.method, 500)
+
+if Config.RATE_LIMITING:
+    def rate_limit_buckets(rule):
+        ip = request.remote_addr
+        if rule == 'login':
+            # Per account and IP, so one noisy client (or a shared NAT/proxy
+            # address) doesn't lock everyone out, plus a looser per-IP budget
+            data = request.get_json(silent=True) if request.is_json else request.form
+            email = str((data or {}).get('email', '')).strip().lower()
+            account = hashlib.sha256(email.encode()).hexdigest()[:32]
+            return [('LOGIN', f"ip:{ip}:{account}"), ('LOGIN_IP', f"ip:{ip}")]
+        # Bookings are limited per account; signed out, per IP
+        if 'user_id' in session:
+            return [('RESERVE', f"user:{session['user_id']}")]
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and token.strip():
+            return [('RESERVE', 'token:' + hashlib.sha256(token.strip().encode()).hexdigest())]
+        return [('RESERVE', f"ip:{ip}")]
+
+    @app.before_request
+    def admit_request():
+        rule = RateLimiter.rule_for(request.endpoint, request.method)
+        if rule and RateLimiter.admit(rule, rate_limit_buckets(rule)):
+            g.rate_limit_slot = rule
+
+    @app.teardown_request
+    def release_request_slot(error):
+        rule = g.pop('rate_limit_slot', None)
+        if rule:
+            RateLimiter.release(rule)
+
+# Periodic archiving of past reservations; the lease in maintenance_jobs lets
+# only one worker run a pass at a time
+if Config.RETENTION_INTERVAL > 0:
+    Retention.start(Config.RETENTION_INTERVAL)
+
+@app.errorhandler(PoolTimeoutError)
+def pool_timeout(error):
+    # All pooled connections are busy; ask the client to retry shortly
+    return 'Service busy, please retry shortly.', 503, {'Retry-After': '1'}
+
+@app.errorhandler(HashingBusyError)
+def hashing_busy(error):
+    # Password hashing queue is full (login/register spike)
+    return 'Service busy, please retry shortly.', 503, {'Retry-After': '1'}
+
+@app.errorhandler(RateLimitedError)
+def rate_limited(error):
+    # 429 for a client over its rate, 503 when the endpoint is at capacity
+    if error.reason == 'rate':
+        message, status = 'Too many requests, please retry later.', 429
+    else:
+        message, status = 'Service busy, please retry shortly.', 503
+    headers = {'Retry-After': str(error.retry_after)}
+    if request.blueprint in ('api', 'api_v1'):
+        return jsonify({'error': message}), status, headers
+    return message, status, headers
 
 @app.route('/')
 def index():
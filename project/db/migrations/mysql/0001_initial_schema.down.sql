@@ -0,0 +1,5 @@
+DROP TABLE IF EXISTS approvals;
+DROP TABLE IF EXISTS reservations;
+DROP TABLE IF EXISTS timeslots;
+DROP TABLE IF EXISTS rooms;
+DROP TABLE IF EXISTS users;
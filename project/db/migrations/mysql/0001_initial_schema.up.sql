@@ -0,0 +1,67 @@
+-- Initial tables and seed data (mirrors the original db/schema.sql)
+
+CREATE TABLE IF NOT EXISTS users (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  name VARCHAR(100) NOT NULL,
+  email VARCHAR(150) UNIQUE NOT NULL,
+  password_hash VARCHAR(255) NOT NULL,
+  role ENUM('student','faculty','admin') NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rooms (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  room_name VARCHAR(100) NOT NULL,
+  capacity INT NOT NULL,
+  room_type VARCHAR(50) NOT NULL,
+  location VARCHAR(150) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS timeslots (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  slot_date DATE NOT NULL,
+  start_time TIME NOT NULL,
+  end_time TIME NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS reservations (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  user_id INT NOT NULL,
+  room_id INT NOT NULL,
+  slot_id INT NOT NULL,
+  purpose VARCHAR(255),
+  status ENUM('pending','approved','rejected','cancelled') DEFAULT 'pending',
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (user_id) REFERENCES users(id),
+  FOREIGN KEY (room_id) REFERENCES rooms(id),
+  FOREIGN KEY (slot_id) REFERENCES timeslots(id)
+);
+
+CREATE TABLE IF NOT EXISTS approvals (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  reservation_id INT NOT NULL,
+  admin_id INT NOT NULL,
+  decision ENUM('approved','rejected') NOT NULL,
+  decision_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+  notes VARCHAR(255),
+  FOREIGN KEY (reservation_id) REFERENCES reservations(id),
+  FOREIGN KEY (admin_id) REFERENCES users(id)
+);
+
+-- Seed data, only when the tables are empty so databases created from
+-- db/schema.sql are not seeded twice
+
+INSERT INTO rooms (room_name, capacity, room_type, location)
+SELECT * FROM (
+  SELECT 'Lecture Hall A' AS room_name, 100 AS capacity, 'Lecture Hall' AS room_type, 'Building 1, Floor 1' AS location
+  UNION ALL SELECT 'Lab 101', 30, 'Computer Lab', 'Building 2, Floor 1'
+  UNION ALL SELECT 'Conf Room B', 12, 'Conference Room', 'Building 1, Floor 2'
+) AS seed
+WHERE NOT EXISTS (SELECT 1 FROM rooms);
+
+INSERT INTO timeslots (slot_date, start_time, end_time)
+SELECT * FROM (
+  SELECT '2023-12-01' AS slot_date, '09:00:00' AS start_time, '10:00:00' AS end_time
+  UNION ALL SELECT '2023-12-01', '10:00:00', '11:00:00'
+  UNION ALL SELECT '2023-12-01', '11:00:00', '12:00:00'
+) AS seed
+WHERE NOT EXISTS (SELECT 1 FROM timeslots);
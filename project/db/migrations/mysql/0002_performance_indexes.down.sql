@@ -0,0 +1,8 @@
+-- Indexes that may have replaced an implicit foreign key index get a plain
+-- replacement in the same statement, otherwise MySQL refuses the drop (1553).
+ALTER TABLE approvals ADD INDEX fk_approvals_reservation (reservation_id), DROP INDEX idx_approvals_reservation;
+DROP INDEX idx_timeslots_date_start ON timeslots;
+DROP INDEX idx_reservations_status_created ON reservations;
+ALTER TABLE reservations ADD INDEX fk_reservations_user (user_id), DROP INDEX idx_reservations_user_created;
+DROP INDEX idx_reservations_created ON reservations;
+ALTER TABLE reservations ADD INDEX fk_reservations_room (room_id), DROP INDEX idx_reservations_room_slot_status;
@@ -0,0 +1,15 @@
+-- Secondary indexes for the hot predicates in the models
+
+-- Booking conflict check: room_id = ? AND slot_id = ? AND status IN (...)
+CREATE INDEX idx_reservations_room_slot_status ON reservations (room_id, slot_id, status);
+
+-- Listings ordered by (created_at, id), optionally per user or per status
+CREATE INDEX idx_reservations_created ON reservations (created_at, id);
+CREATE INDEX idx_reservations_user_created ON reservations (user_id, created_at, id);
+CREATE INDEX idx_reservations_status_created ON reservations (status, created_at, id);
+
+-- Timeslot listings and date range filters
+CREATE INDEX idx_timeslots_date_start ON timeslots (slot_date, start_time);
+
+-- Approval history per reservation
+CREATE INDEX idx_approvals_reservation ON approvals (reservation_id, decision_time);
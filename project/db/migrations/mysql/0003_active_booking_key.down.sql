@@ -0,0 +1,3 @@
+-- The unique index may be the one backing the room_id foreign key
+ALTER TABLE reservations ADD INDEX fk_reservations_room (room_id), DROP INDEX uq_reservations_active_booking;
+ALTER TABLE reservations DROP COLUMN active_slot_id;
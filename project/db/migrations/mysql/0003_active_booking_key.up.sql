@@ -0,0 +1,22 @@
+-- One active (pending/approved) reservation per room and slot, enforced by a
+-- unique index instead of SELECT ... FOR UPDATE in the booking path.
+-- active_slot_id is NULL for rejected/cancelled rows, and NULLs never collide.
+
+-- Reject pending duplicates left behind by the old locking path: an approved
+-- reservation wins, otherwise the oldest pending one. Room+slots with more
+-- than one approved reservation can't be settled here; 0003_*.check.sql stops
+-- the migration before this file runs and lists them.
+UPDATE reservations r
+JOIN reservations keep
+  ON keep.room_id = r.room_id
+ AND keep.slot_id = r.slot_id
+ AND keep.id <> r.id
+ AND (keep.status = 'approved' OR (keep.status = 'pending' AND keep.id < r.id))
+SET r.status = 'rejected'
+WHERE r.status = 'pending';
+
+ALTER TABLE reservations
+  ADD COLUMN active_slot_id INT
+  GENERATED ALWAYS AS (CASE WHEN status IN ('pending', 'approved') THEN slot_id END) STORED;
+
+CREATE UNIQUE INDEX uq_reservations_active_booking ON reservations (room_id, active_slot_id);
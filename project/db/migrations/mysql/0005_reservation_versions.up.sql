@@ -0,0 +1,8 @@
+-- Per-user reservation version stamps, bumped by every reservation write in
+-- the same transaction. They drive ETag/Last-Modified on the listing pages;
+-- one row per user keeps concurrent bookings off a shared hot row.
+CREATE TABLE IF NOT EXISTS reservation_versions (
+  user_id INT PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
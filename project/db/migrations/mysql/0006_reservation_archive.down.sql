@@ -0,0 +1,3 @@
+DROP TABLE IF EXISTS maintenance_jobs;
+DROP TABLE IF EXISTS approvals_archive;
+DROP TABLE IF EXISTS reservations_archive;
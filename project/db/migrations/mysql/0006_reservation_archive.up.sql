@@ -0,0 +1,42 @@
+-- Retention: reservations of past slot dates and their approvals are moved
+-- here in small batches (models/retention_model.py) so the hot tables only
+-- hold recent and upcoming bookings. Rows keep their original ids; slot_date
+-- is copied so the archive stays readable after timeslots are removed.
+CREATE TABLE IF NOT EXISTS reservations_archive (
+  id INT PRIMARY KEY,
+  user_id INT NOT NULL,
+  room_id INT NOT NULL,
+  slot_id INT NOT NULL,
+  slot_date DATE NOT NULL,
+  purpose VARCHAR(255),
+  status VARCHAR(20) NOT NULL,
+  created_at DATETIME,
+  archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_reservations_archive_user (user_id, slot_date),
+  INDEX idx_reservations_archive_date (slot_date)
+);
+
+CREATE TABLE IF NOT EXISTS approvals_archive (
+  id INT PRIMARY KEY,
+  reservation_id INT NOT NULL,
+  admin_id INT NOT NULL,
+  decision VARCHAR(20) NOT NULL,
+  decision_time DATETIME,
+  notes VARCHAR(255),
+  archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_approvals_archive_reservation (reservation_id)
+);
+
+-- Progress of resumable background jobs: the keyset position reached, the
+-- cutoff the pass started with, and a lease so only one process runs a job.
+CREATE TABLE IF NOT EXISTS maintenance_jobs (
+  name VARCHAR(100) PRIMARY KEY,
+  cursor_id BIGINT NOT NULL DEFAULT 0,
+  cutoff DATE,
+  processed BIGINT NOT NULL DEFAULT 0,
+  started_at DATETIME,
+  updated_at DATETIME,
+  finished_at DATETIME,
+  lease_owner VARCHAR(100),
+  lease_until DATETIME
+);
@@ -0,0 +1,3 @@
+DROP INDEX idx_rooms_location ON rooms;
+DROP INDEX idx_rooms_capacity ON rooms;
+DROP INDEX idx_rooms_type_capacity ON rooms;
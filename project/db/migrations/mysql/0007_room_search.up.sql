@@ -0,0 +1,5 @@
+-- Room search (Room.search): type and capacity filters with capacity
+-- ordering, and location prefix matches
+CREATE INDEX idx_rooms_type_capacity ON rooms (room_type, capacity);
+CREATE INDEX idx_rooms_capacity ON rooms (capacity);
+CREATE INDEX idx_rooms_location ON rooms (location);
@@ -0,0 +1,13 @@
+-- Bearer tokens for /api/v1 clients (kiosks, mobile app). Only the SHA-256
+-- of a token is stored; the token itself is shown once when it is created.
+CREATE TABLE IF NOT EXISTS api_tokens (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  user_id INT NOT NULL,
+  name VARCHAR(100) NOT NULL,
+  token_hash CHAR(64) NOT NULL,
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  last_used_at DATETIME NULL,
+  UNIQUE INDEX uq_api_tokens_hash (token_hash),
+  INDEX idx_api_tokens_user (user_id),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
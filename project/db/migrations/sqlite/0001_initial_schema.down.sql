@@ -0,0 +1,7 @@
+DROP TABLE IF EXISTS approvals;
+DROP TABLE IF EXISTS reservations;
+DROP TRIGGER IF EXISTS timeslots_normalize_update;
+DROP TRIGGER IF EXISTS timeslots_normalize_insert;
+DROP TABLE IF EXISTS timeslots;
+DROP TABLE IF EXISTS rooms;
+DROP TABLE IF EXISTS users;
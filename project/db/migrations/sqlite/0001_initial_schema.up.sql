@@ -0,0 +1,80 @@
+-- Initial tables and seed data, SQLite dialect of mysql/0001_initial_schema.
+-- ENUM columns become TEXT with CHECK constraints; declared DATE/TIME/DATETIME
+-- types let models/sqlite_backend.py convert values like mysql.connector does.
+
+CREATE TABLE IF NOT EXISTS users (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  name VARCHAR(100) NOT NULL,
+  email VARCHAR(150) UNIQUE NOT NULL,
+  password_hash VARCHAR(255) NOT NULL,
+  role TEXT NOT NULL CHECK (role IN ('student', 'faculty', 'admin'))
+);
+
+CREATE TABLE IF NOT EXISTS rooms (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  room_name VARCHAR(100) NOT NULL,
+  capacity INT NOT NULL,
+  room_type VARCHAR(50) NOT NULL,
+  location VARCHAR(150) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS timeslots (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  slot_date DATE NOT NULL,
+  start_time TIME NOT NULL,
+  end_time TIME NOT NULL
+);
+
+-- MySQL normalises '09:00' to 09:00:00 in TIME columns; do the same here so
+-- equality and range comparisons on the text values behave identically.
+CREATE TRIGGER IF NOT EXISTS timeslots_normalize_insert AFTER INSERT ON timeslots
+BEGIN
+  UPDATE timeslots
+  SET slot_date = date(NEW.slot_date), start_time = time(NEW.start_time), end_time = time(NEW.end_time)
+  WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS timeslots_normalize_update AFTER UPDATE OF slot_date, start_time, end_time ON timeslots
+WHEN NEW.slot_date IS NOT date(NEW.slot_date)
+  OR NEW.start_time IS NOT time(NEW.start_time)
+  OR NEW.end_time IS NOT time(NEW.end_time)
+BEGIN
+  UPDATE timeslots
+  SET slot_date = date(NEW.slot_date), start_time = time(NEW.start_time), end_time = time(NEW.end_time)
+  WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS reservations (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id INT NOT NULL REFERENCES users(id),
+  room_id INT NOT NULL REFERENCES rooms(id),
+  slot_id INT NOT NULL REFERENCES timeslots(id),
+  purpose VARCHAR(255),
+  status TEXT DEFAULT 'pending' CHECK (status IN ('pending', 'approved', 'rejected', 'cancelled')),
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS approvals (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  reservation_id INT NOT NULL REFERENCES reservations(id),
+  admin_id INT NOT NULL REFERENCES users(id),
+  decision TEXT NOT NULL CHECK (decision IN ('approved', 'rejected')),
+  decision_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+  notes VARCHAR(255)
+);
+
+INSERT INTO rooms (room_name, capacity, room_type, location)
+SELECT * FROM (
+  SELECT 'Lecture Hall A' AS room_name, 100 AS capacity, 'Lecture Hall' AS room_type, 'Building 1, Floor 1' AS location
+  UNION ALL SELECT 'Lab 101', 30, 'Computer Lab', 'Building 2, Floor 1'
+  UNION ALL SELECT 'Conf Room B', 12, 'Conference Room', 'Building 1, Floor 2'
+) AS seed
+WHERE NOT EXISTS (SELECT 1 FROM rooms);
+
+INSERT INTO timeslots (slot_date, start_time, end_time)
+SELECT * FROM (
+  SELECT '2023-12-01' AS slot_date, '09:00:00' AS start_time, '10:00:00' AS end_time
+  UNION ALL SELECT '2023-12-01', '10:00:00', '11:00:00'
+  UNION ALL SELECT '2023-12-01', '11:00:00', '12:00:00'
+) AS seed
+WHERE NOT EXISTS (SELECT 1 FROM timeslots);
@@ -0,0 +1,8 @@
+DROP INDEX IF EXISTS idx_approvals_admin;
+DROP INDEX IF EXISTS idx_approvals_reservation;
+DROP INDEX IF EXISTS idx_timeslots_date_start;
+DROP INDEX IF EXISTS idx_reservations_slot;
+DROP INDEX IF EXISTS idx_reservations_status_created;
+DROP INDEX IF EXISTS idx_reservations_user_created;
+DROP INDEX IF EXISTS idx_reservations_created;
+DROP INDEX IF EXISTS idx_reservations_room_slot_status;
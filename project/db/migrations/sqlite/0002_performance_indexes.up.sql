@@ -0,0 +1,11 @@
+-- Secondary indexes for the hot predicates in the models (see mysql/0002).
+-- SQLite does not index foreign keys implicitly, so approvals.admin_id and
+-- reservations.slot_id get their own indexes here.
+CREATE INDEX IF NOT EXISTS idx_reservations_room_slot_status ON reservations (room_id, slot_id, status);
+CREATE INDEX IF NOT EXISTS idx_reservations_created ON reservations (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_reservations_user_created ON reservations (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_reservations_status_created ON reservations (status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_reservations_slot ON reservations (slot_id);
+CREATE INDEX IF NOT EXISTS idx_timeslots_date_start ON timeslots (slot_date, start_time);
+CREATE INDEX IF NOT EXISTS idx_approvals_reservation ON approvals (reservation_id, decision_time);
+CREATE INDEX IF NOT EXISTS idx_approvals_admin ON approvals (admin_id);
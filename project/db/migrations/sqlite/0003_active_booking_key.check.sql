@@ -0,0 +1,8 @@
+-- Runs before 0003_active_booking_key.up.sql: any row returned aborts the
+-- migration. Two approved reservations of one room and slot would break the
+-- new unique index, and which one to cancel is an admin's decision.
+SELECT room_id, slot_id, GROUP_CONCAT(id) AS approved_reservation_ids
+FROM reservations
+WHERE status = 'approved'
+GROUP BY room_id, slot_id
+HAVING COUNT(*) > 1;
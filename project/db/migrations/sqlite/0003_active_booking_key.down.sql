@@ -0,0 +1,2 @@
+DROP INDEX IF EXISTS uq_reservations_active_booking;
+ALTER TABLE reservations DROP COLUMN active_slot_id;
@@ -0,0 +1,19 @@
+-- One active (pending/approved) reservation per room and slot (see mysql/0003).
+-- Pending duplicates are rejected: an approved reservation wins, otherwise the oldest pending one
+UPDATE reservations
+SET status = 'rejected'
+WHERE status = 'pending'
+  AND EXISTS (
+    SELECT 1 FROM reservations keep
+    WHERE keep.room_id = reservations.room_id
+      AND keep.slot_id = reservations.slot_id
+      AND keep.id <> reservations.id
+      AND (keep.status = 'approved' OR (keep.status = 'pending' AND keep.id < reservations.id))
+  );
+
+-- SQLite can only add VIRTUAL generated columns; they are indexable all the same
+ALTER TABLE reservations
+  ADD COLUMN active_slot_id INT
+  GENERATED ALWAYS AS (CASE WHEN status IN ('pending', 'approved') THEN slot_id END) VIRTUAL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_reservations_active_booking ON reservations (room_id, active_slot_id);
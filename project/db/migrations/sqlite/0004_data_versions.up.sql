@@ -0,0 +1,14 @@
+-- Version stamps bumped by the model write paths. Every worker compares them
+-- once per request and drops cached entries for namespaces that moved on.
+CREATE TABLE IF NOT EXISTS data_versions (
+  name VARCHAR(100) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_versions (name, version)
+SELECT * FROM (
+  SELECT 'rooms' AS name, 0 AS version
+  UNION ALL SELECT 'timeslots', 0
+) AS seed
+WHERE NOT EXISTS (SELECT 1 FROM data_versions);
@@ -0,0 +1,39 @@
+-- Archive tables and job progress for retention (see mysql/0006).
+CREATE TABLE IF NOT EXISTS reservations_archive (
+  id INTEGER PRIMARY KEY,
+  user_id INT NOT NULL,
+  room_id INT NOT NULL,
+  slot_id INT NOT NULL,
+  slot_date DATE NOT NULL,
+  purpose VARCHAR(255),
+  status VARCHAR(20) NOT NULL,
+  created_at DATETIME,
+  archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_reservations_archive_user ON reservations_archive (user_id, slot_date);
+CREATE INDEX IF NOT EXISTS idx_reservations_archive_date ON reservations_archive (slot_date);
+
+CREATE TABLE IF NOT EXISTS approvals_archive (
+  id INTEGER PRIMARY KEY,
+  reservation_id INT NOT NULL,
+  admin_id INT NOT NULL,
+  decision VARCHAR(20) NOT NULL,
+  decision_time DATETIME,
+  notes VARCHAR(255),
+  archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_approvals_archive_reservation ON approvals_archive (reservation_id);
+
+CREATE TABLE IF NOT EXISTS maintenance_jobs (
+  name VARCHAR(100) PRIMARY KEY,
+  cursor_id BIGINT NOT NULL DEFAULT 0,
+  cutoff DATE,
+  processed BIGINT NOT NULL DEFAULT 0,
+  started_at DATETIME,
+  updated_at DATETIME,
+  finished_at DATETIME,
+  lease_owner VARCHAR(100),
+  lease_until DATETIME
+);
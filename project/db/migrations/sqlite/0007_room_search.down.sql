@@ -0,0 +1,3 @@
+DROP INDEX IF EXISTS idx_rooms_location;
+DROP INDEX IF EXISTS idx_rooms_capacity;
+DROP INDEX IF EXISTS idx_rooms_type_capacity;
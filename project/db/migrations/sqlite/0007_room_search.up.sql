@@ -0,0 +1,4 @@
+-- Room search indexes (see mysql/0007).
+CREATE INDEX IF NOT EXISTS idx_rooms_type_capacity ON rooms (room_type, capacity);
+CREATE INDEX IF NOT EXISTS idx_rooms_capacity ON rooms (capacity);
+CREATE INDEX IF NOT EXISTS idx_rooms_location ON rooms (location);
@@ -1,3 +1,6 @@
+-- Full schema snapshot for new databases. Existing databases are upgraded
+-- with the numbered files in db/migrations (python migrate.py up).
+
 CREATE TABLE IF NOT EXISTS users (
   id INT AUTO_INCREMENT PRIMARY KEY,
   name VARCHAR(100) NOT NULL,
@@ -11,14 +14,18 @@ CREATE TABLE IF NOT EXISTS rooms (
   room_name VARCHAR(100) NOT NULL,
   capacity INT NOT NULL,
   room_type VARCHAR(50) NOT NULL,
-  location VARCHAR(150) NOT NULL
+  location VARCHAR(150) NOT NULL,
+  INDEX idx_rooms_type_capacity (room_type, capacity),
+  INDEX idx_rooms_capacity (capacity),
+  INDEX idx_rooms_location (location)
 );
 
 CREATE TABLE IF NOT EXISTS timeslots (
   id INT AUTO_INCREMENT PRIMARY KEY,
   slot_date DATE NOT NULL,
   start_time TIME NOT NULL,
-  end_time TIME NOT NULL
+  end_time TIME NOT NULL,
+  INDEX idx_timeslots_date_start (slot_date, start_time)
 );
 
 CREATE TABLE IF NOT EXISTS reservations (
@@ -29,9 +36,19 @@ CREATE TABLE IF NOT EXISTS reservations (
   purpose VARCHAR(255),
   status ENUM('pending','approved','rejected','cancelled') DEFAULT 'pending',
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  -- slot_id while the reservation is pending/approved, NULL otherwise
+  active_slot_id INT GENERATED ALWAYS AS (CASE WHEN status IN ('pending', 'approved') THEN slot_id END) STORED,
   FOREIGN KEY (user_id) REFERENCES users(id),
   FOREIGN KEY (room_id) REFERENCES rooms(id),
-  FOREIGN KEY (slot_id) REFERENCES timeslots(id)
+  FOREIGN KEY (slot_id) REFERENCES timeslots(id),
+  -- One active reservation per room and slot
+  UNIQUE INDEX uq_reservations_active_booking (room_id, active_slot_id),
+  -- Booking conflict check
+  INDEX idx_reservations_room_slot_status (room_id, slot_id, status),
+  -- Keyset pagination on (created_at, id) for the listing pages
+  INDEX idx_reservations_created (created_at, id),
+  INDEX idx_reservations_user_created (user_id, created_at, id),
+  INDEX idx_reservations_status_created (status, created_at, id)
 );
 
 CREATE TABLE IF NOT EXISTS approvals (
@@ -42,7 +59,71 @@ CREATE TABLE IF NOT EXISTS approvals (
   decision_time DATETIME DEFAULT CURRENT_TIMESTAMP,
   notes VARCHAR(255),
   FOREIGN KEY (reservation_id) REFERENCES reservations(id),
-  FOREIGN KEY (admin_id) REFERENCES users(id)
+  FOREIGN KEY (admin_id) REFERENCES users(id),
+  INDEX idx_approvals_reservation (reservation_id, decision_time)
+);
+
+-- Version stamps bumped by the model write paths (see models/cache.py)
+CREATE TABLE IF NOT EXISTS data_versions (
+  name VARCHAR(100) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS reservation_versions (
+  user_id INT PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS reservations_archive (
+  id INT PRIMARY KEY,
+  user_id INT NOT NULL,
+  room_id INT NOT NULL,
+  slot_id INT NOT NULL,
+  slot_date DATE NOT NULL,
+  purpose VARCHAR(255),
+  status VARCHAR(20) NOT NULL,
+  created_at DATETIME,
+  archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_reservations_archive_user (user_id, slot_date),
+  INDEX idx_reservations_archive_date (slot_date)
+);
+
+CREATE TABLE IF NOT EXISTS approvals_archive (
+  id INT PRIMARY KEY,
+  reservation_id INT NOT NULL,
+  admin_id INT NOT NULL,
+  decision VARCHAR(20) NOT NULL,
+  decision_time DATETIME,
+  notes VARCHAR(255),
+  archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_approvals_archive_reservation (reservation_id)
+);
+
+CREATE TABLE IF NOT EXISTS maintenance_jobs (
+  name VARCHAR(100) PRIMARY KEY,
+  cursor_id BIGINT NOT NULL DEFAULT 0,
+  cutoff DATE,
+  processed BIGINT NOT NULL DEFAULT 0,
+  started_at DATETIME,
+  updated_at DATETIME,
+  finished_at DATETIME,
+  lease_owner VARCHAR(100),
+  lease_until DATETIME
+);
+
+-- Bearer tokens for /api/v1 clients; only the SHA-256 of a token is stored
+CREATE TABLE IF NOT EXISTS api_tokens (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  user_id INT NOT NULL,
+  name VARCHAR(100) NOT NULL,
+  token_hash CHAR(64) NOT NULL,
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  last_used_at DATETIME NULL,
+  UNIQUE INDEX uq_api_tokens_hash (token_hash),
+  INDEX idx_api_tokens_user (user_id),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
 -- Seed Data
@@ -0,0 +1,74 @@
+"""Bulk data setup: recurring timeslots and CSV imports.
+
+Usage:
+    python import_data.py timeslots FROM TO --weekdays mon,tue,wed,thu,fri
+                          --start 08:00 --end 18:00 --minutes 60 [--break 0]
+    python import_data.py csv {rooms,timeslots,users} FILE
+
+CSV files need a header row; the columns are
+    rooms:      room_name, capacity, room_type, location
+    timeslots:  slot_date (YYYY-MM-DD), start_time, end_time (HH:MM)
+    users:      name, email, password[, role]
+The whole file is validated before anything is written. Existing timeslots
+(same date and times) and existing accounts (same email) are skipped.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+from config import Config
+from models.bulk_import import BulkImport
+
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+def parse_weekdays(value):
+    try:
+        return [WEEKDAYS.index(day.strip().lower()[:3]) for day in value.split(',') if day.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"weekdays are {','.join(WEEKDAYS)}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('timeslots', help='generate recurring timeslots')
+    generate.add_argument('date_from', type=date.fromisoformat)
+    generate.add_argument('date_to', type=date.fromisoformat)
+    generate.add_argument('--weekdays', type=parse_weekdays, default=[0, 1, 2, 3, 4])
+    generate.add_argument('--start', default='08:00', help='first slot of the day starts at')
+    generate.add_argument('--end', default='18:00', help='last slot of the day ends by')
+    generate.add_argument('--minutes', type=int, default=60, help='slot length')
+    generate.add_argument('--break', dest='break_minutes', type=int, default=0,
+                          help='minutes between slots')
+
+    load = commands.add_parser('csv', help='import a CSV file')
+    load.add_argument('entity', choices=sorted(BulkImport.COLUMNS))
+    load.add_argument('file')
+    load.add_argument('--hash-workers', type=int, default=os.cpu_count() or 1,
+                      help='threads hashing imported passwords (default: one per CPU)')
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    if args.command == 'timeslots':
+        result = BulkImport.generate_timeslots(args.date_from, args.date_to, args.weekdays, args.start,
+                                               args.end, args.minutes, args.break_minutes)
+        entity = 'timeslots'
+    else:
+        # Its own process, so it may use every core (the web import keeps IMPORT_HASH_WORKERS)
+        Config.IMPORT_HASH_WORKERS = args.hash_workers
+        with open(args.file, newline='', encoding='utf-8-sig') as f:
+            result = BulkImport.import_csv(args.entity, f.read())
+        entity = args.entity
+    for error in result['errors']:
+        print(error)
+    print(f"{result['inserted']} {entity} imported, {result['skipped']} skipped.")
+    return 1 if result['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
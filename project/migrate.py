@@ -0,0 +1,362 @@
+"""Versioned schema migrations.
+
+Migrations live in db/migrations/<backend> (mysql or sqlite, following
+DB_BACKEND) as numbered pairs of files:
+    0002_performance_indexes.up.sql
+    0002_performance_indexes.down.sql
+Both dialects keep the same version numbers. Applied versions are recorded in
+the schema_migrations table. An optional 0003_name.check.sql runs first: if
+its SELECT returns rows, they are printed and nothing is applied.
+
+Usage:
+    python migrate.py up [VERSION]     apply pending migrations (up to VERSION)
+    python migrate.py down [VERSION]   roll back to VERSION (default: undo the latest)
+    python migrate.py status           list applied and pending migrations
+    python migrate.py check            EXPLAIN every model query and flag full scans
+"""
+import ast
+import glob
+import os
+import re
+import sys
+
+from config import Config
+from models.db_connection import get_db_connection
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS_ROOT = os.path.join(BASE_DIR, 'db', 'migrations')
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+# Model modules whose SQL strings aren't queries on the app database
+CHECK_SKIP_MODULES = ('sqlite_backend.py', 'rate_limiter.py')
+
+# Errors meaning the object is already in the state the statement asks for,
+# which makes re-running a partially applied migration safe.
+ALREADY_APPLIED_ERRORS = {
+    1050,  # table already exists
+    1060,  # duplicate column name
+    1061,  # duplicate key name
+    1826,  # duplicate foreign key constraint name
+}
+ALREADY_REVERTED_ERRORS = {
+    1051,  # unknown table
+    1091,  # can't drop; check that column/key exists
+}
+# sqlite3 has no per-condition error codes, only messages
+SQLITE_ALREADY_APPLIED = ('already exists', 'duplicate column name')
+SQLITE_ALREADY_REVERTED = ('no such table', 'no such index', 'no such column')
+
+
+class MigrationError(Exception):
+    pass
+
+
+def split_sql(text):
+    """Split a SQL script into statements, ignoring ';' inside quotes and comments.
+
+    The body of a CREATE TRIGGER ... BEGIN ... END block stays one statement.
+    """
+    statements = []
+    current = []
+    i = 0
+    quote = None
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            current.append(ch)
+            if ch == '\\' and quote != '`' and i + 1 < len(text):
+                current.append(text[i + 1])
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in ("'", '"', '`'):
+            quote = ch
+            current.append(ch)
+        elif text.startswith('--', i) or ch == '#':
+            end = text.find('\n', i)
+            i = len(text) if end == -1 else end
+            continue
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = len(text) if end == -1 else end + 2
+            continue
+        elif ch == ';':
+            statement = ''.join(current).strip()
+            if (re.match(r'CREATE\s+TRIGGER\b', statement, re.IGNORECASE)
+                    and not re.search(r'\bEND$', statement, re.IGNORECASE)):
+                current.append(ch)
+                i += 1
+                continue
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    statement = ''.join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def migrations_dir(backend=None):
+    return os.path.join(MIGRATIONS_ROOT, backend or Config.DB_BACKEND)
+
+
+def discover_migrations(backend=None):
+    """Return [(version, name, up_path, down_path)] sorted by version."""
+    migrations = []
+    for up_path in glob.glob(os.path.join(migrations_dir(backend), '*.up.sql')):
+        filename = os.path.basename(up_path)
+        match = re.match(r'^(\d+)_(.+)\.up\.sql$', filename)
+        if not match:
+            raise MigrationError(f"Badly named migration file: {filename}")
+        down_path = up_path[:-len('.up.sql')] + '.down.sql'
+        migrations.append((int(match.group(1)), match.group(2), up_path,
+                           down_path if os.path.exists(down_path) else None))
+    migrations.sort()
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError("Duplicate migration version numbers")
+    return migrations
+
+
+def ensure_tracking_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+          version INT PRIMARY KEY,
+          name VARCHAR(255) NOT NULL,
+          applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations ORDER BY version")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _error_message(err):
+    return getattr(err, 'msg', None) or str(err)
+
+
+def _run_file(conn, cursor, path, tolerated, tolerated_messages):
+    with open(path, 'r') as f:
+        statements = split_sql(f.read())
+    for stmt in statements:
+        try:
+            cursor.execute(stmt)
+        except Exception as err:
+            message = _error_message(err)
+            if (getattr(err, 'errno', None) in tolerated
+                    or any(m in message for m in tolerated_messages)):
+                print(f"  skipped (already done): {message}")
+                continue
+            conn.rollback()
+            raise MigrationError(f"{os.path.basename(path)} failed: {message}\n  {stmt[:200]}")
+    conn.commit()
+
+
+def _run_guard(cursor, path):
+    """Run a migration's .check.sql; rows returned are problems to fix by hand first."""
+    with open(path, 'r') as f:
+        statements = split_sql(f.read())
+    for stmt in statements:
+        cursor.execute(stmt)
+        columns = [column[0] for column in cursor.description or ()]
+        rows = cursor.fetchall()
+        if rows:
+            listing = '\n'.join('  ' + ', '.join(f"{c}={v}" for c, v in zip(columns, row)) for row in rows[:50])
+            more = f"\n  ... and {len(rows) - 50} more" if len(rows) > 50 else ''
+            raise MigrationError(f"{os.path.basename(path)} found {len(rows)} row(s) to resolve "
+                                 f"before migrating:\n{listing}{more}")
+
+
+def upgrade(conn, target=None, backend=None):
+    cursor = conn.cursor()
+    try:
+        ensure_tracking_table(cursor)
+        done = set(applied_versions(cursor))
+        applied = 0
+        for version, name, up_path, _ in discover_migrations(backend):
+            if version in done or (target is not None and version > target):
+                continue
+            print(f"Applying {version:04d}_{name}")
+            check_path = up_path[:-len('.up.sql')] + '.check.sql'
+            if os.path.exists(check_path):
+                _run_guard(cursor, check_path)
+            _run_file(conn, cursor, up_path, ALREADY_APPLIED_ERRORS, SQLITE_ALREADY_APPLIED)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            conn.commit()
+            applied += 1
+        print(f"{applied} migration(s) applied.")
+        return applied
+    finally:
+        cursor.close()
+
+
+def downgrade(conn, target=None, backend=None):
+    """Roll back migrations newer than `target` (default: only the latest)."""
+    cursor = conn.cursor()
+    try:
+        ensure_tracking_table(cursor)
+        done = applied_versions(cursor)
+        if not done:
+            print("Nothing to roll back.")
+            return 0
+        if target is None:
+            target = done[-2] if len(done) > 1 else 0
+        by_version = {m[0]: m for m in discover_migrations(backend)}
+        reverted = 0
+        for version in reversed(done):
+            if version <= target:
+                break
+            if version not in by_version or by_version[version][3] is None:
+                raise MigrationError(f"No down migration for version {version}")
+            _, name, _, down_path = by_version[version]
+            print(f"Reverting {version:04d}_{name}")
+            _run_file(conn, cursor, down_path, ALREADY_REVERTED_ERRORS, SQLITE_ALREADY_REVERTED)
+            cursor.execute("DELETE FROM schema_migrations WHERE version = %s", (version,))
+            conn.commit()
+            reverted += 1
+        print(f"{reverted} migration(s) rolled back.")
+        return reverted
+    finally:
+        cursor.close()
+
+
+def status(conn):
+    cursor = conn.cursor()
+    try:
+        ensure_tracking_table(cursor)
+        done = set(applied_versions(cursor))
+    finally:
+        cursor.close()
+    for version, name, _, _ in discover_migrations():
+        mark = 'applied' if version in done else 'pending'
+        print(f"{version:04d}_{name:<40} {mark}")
+
+
+def _is_placeholder_list(node):
+    """True for `placeholders` or `', '.join(['%s'] * n)`: a list of query parameters."""
+    if isinstance(node, ast.Name):
+        return node.id == 'placeholders'
+    return (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'join'
+            and len(node.args) == 1 and isinstance(node.args[0], ast.BinOp)
+            and isinstance(node.args[0].left, ast.List)
+            and all(isinstance(e, ast.Constant) and e.value == '%s' for e in node.args[0].left.elts))
+
+
+def iter_model_queries():
+    """Yield (path, line, sql, dynamic) for every SQL string literal in the models.
+
+    In f-strings, parameter lists (`IN ({placeholders})`) become a single %s.
+    Any other interpolated part is SQL built at runtime (WHERE builders, SET
+    lists); `dynamic` then names it and the query can't be checked as written.
+    """
+    for path in sorted(glob.glob(os.path.join(MODELS_DIR, '*.py'))):
+        if os.path.basename(path) in CHECK_SKIP_MODULES:
+            continue
+        with open(path, 'r') as f:
+            tree = ast.parse(f.read(), filename=path)
+        skipped = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.JoinedStr):
+                skipped.update(id(value) for value in node.values)
+            elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant):
+                skipped.add(id(node.value))   # docstrings
+        for node in ast.walk(tree):
+            dynamic = []
+            if isinstance(node, ast.JoinedStr):
+                parts = []
+                for value in node.values:
+                    if isinstance(value, ast.Constant):
+                        parts.append(str(value.value))
+                    elif _is_placeholder_list(value.value):
+                        parts.append('%s')
+                    else:
+                        dynamic.append(ast.unparse(value.value))
+                        parts.append('{' + dynamic[-1] + '}')
+                sql = ''.join(parts)
+            elif (isinstance(node, ast.Constant) and isinstance(node.value, str)
+                  and id(node) not in skipped):
+                sql = node.value
+            else:
+                continue
+            if re.match(r'\s*(SELECT|UPDATE|DELETE)\b', sql):
+                yield os.path.relpath(path, BASE_DIR), node.lineno, ' '.join(sql.split()), dynamic
+
+
+def _scans(cursor, sql):
+    """Yield (table, scan type, key, rows) for each table or index scan in the plan."""
+    if Config.DB_BACKEND == 'sqlite':
+        cursor.execute("EXPLAIN QUERY PLAN " + sql)
+        for row in cursor.fetchall():
+            match = re.match(r'SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?', row['detail'])
+            if match and not row['detail'].startswith('SCAN CONSTANT ROW'):
+                yield match.group(1), 'index' if match.group(2) else 'ALL', match.group(2), None
+        return
+    cursor.execute("EXPLAIN " + sql)
+    for row in cursor.fetchall():
+        if row.get('type') in ('ALL', 'index'):
+            yield row.get('table'), row['type'], row.get('key'), row.get('rows')
+
+
+def check(conn):
+    """EXPLAIN each model query and report table scans. Returns the number of
+    filtered queries that still scan a whole table."""
+    cursor = conn.cursor(dictionary=True)
+    problems = 0
+    try:
+        for path, line, sql, dynamic in iter_model_queries():
+            if dynamic:
+                print(f"[SKIPPED]   {path}:{line} (SQL built at runtime: {', '.join(dynamic)})")
+                continue
+            # Sample parameters: LIMIT needs a number, everything else a literal
+            explain_sql = re.sub(r'LIMIT\s+%s', 'LIMIT 1', sql, flags=re.IGNORECASE)
+            explain_sql = explain_sql.replace('%s', "'1'")
+            try:
+                plan = list(_scans(cursor, explain_sql))
+            except Exception as err:
+                print(f"[SKIPPED]   {path}:{line} ({_error_message(err)})")
+                continue
+            filtered = ' where ' in f" {sql.lower()} "
+            for table, scan_type, key, rows in plan:
+                if filtered:
+                    label = '[FULL SCAN]' if scan_type == 'ALL' else '[IDX SCAN] '
+                    problems += 1
+                else:
+                    label = '[UNFILTERED]'
+                print(f"{label} {path}:{line} table={table} type={scan_type} "
+                      f"key={key} rows={rows}\n    {sql[:160]}")
+    finally:
+        cursor.close()
+    print(f"{problems} filtered quer{'y' if problems == 1 else 'ies'} scanning a full table or index.")
+    return problems
+
+
+def main(argv):
+    if not argv or argv[0] not in ('up', 'down', 'status', 'check'):
+        print(__doc__)
+        return 2
+    command = argv[0]
+    target = int(argv[1]) if len(argv) > 1 else None
+    conn = get_db_connection()
+    try:
+        if command == 'up':
+            upgrade(conn, target)
+        elif command == 'down':
+            downgrade(conn, target)
+        elif command == 'status':
+            status(conn)
+        else:
+            return 1 if check(conn) else 0
+    except MigrationError as err:
+        print(f"Migration failed: {err}")
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,98 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+
+from config import Config
+from .db_connection import get_db_connection
+
+
+def _digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class ApiToken:
+    """Bearer tokens for the /api/v1 clients (kiosks, mobile app).
+
+    Tokens are random, so a plain SHA-256 is enough to keep them out of the
+    database and turns the lookup into one unique-index probe per request.
+    """
+
+    @staticmethod
+    def create(user_id, name):
+        """Store a new token for `user_id`; returns the token (only shown once) or None."""
+        token = secrets.token_urlsafe(32)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "INSERT INTO api_tokens (user_id, name, token_hash) VALUES (%s, %s, %s)",
+                (user_id, name, _digest(token))
+            )
+            conn.commit()
+            return token
+        except Exception as e:
+            print(f"Error creating API token: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def authenticate(token):
+        """The user (id, name, role) owning `token`, or None."""
+        if not token:
+            return None
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT t.id AS token_id, t.last_used_at, u.id, u.name, u.role
+                FROM api_tokens t
+                JOIN users u ON u.id = t.user_id
+                WHERE t.token_hash = %s
+            """, (_digest(token),))
+            user = cursor.fetchone()
+            if user is None:
+                return None
+            # Record use at most once per API_TOKEN_TOUCH_INTERVAL, not a write per request
+            now = datetime.now()
+            last_used = user.pop('last_used_at')
+            if last_used is None or now - last_used > timedelta(seconds=Config.API_TOKEN_TOUCH_INTERVAL):
+                cursor.execute("UPDATE api_tokens SET last_used_at = %s WHERE id = %s", (now, user['token_id']))
+                conn.commit()
+            return user
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def get_tokens_by_user(user_id):
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT id, name, created_at, last_used_at FROM api_tokens WHERE user_id = %s ORDER BY id",
+            (user_id,)
+        )
+        tokens = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        return tokens
+
+    @staticmethod
+    def revoke(token_id, user_id=None):
+        """Delete a token (only if it belongs to `user_id`, when given). True if one was deleted."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            if user_id is None:
+                cursor.execute("DELETE FROM api_tokens WHERE id = %s", (token_id,))
+            else:
+                cursor.execute("DELETE FROM api_tokens WHERE id = %s AND user_id = %s", (token_id, user_id))
+            conn.commit()
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error revoking API token: {e}")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
@@ -0,0 +1,92 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from .db_connection import get_db_connection, format_time
+from .room_model import Room, Timeslot
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+class Availability:
+    """Room x timeslot occupancy for a date range.
+
+    Rooms and timeslots come from the read-through cache; only the occupied
+    (room, slot) pairs are queried, with one query per date range. Occupancy is
+    returned as one integer bitmap per room where bit i is set when slots[i],
+    or a slot overlapping it, has a pending or approved reservation.
+    """
+
+    @staticmethod
+    def get_slots_in_range(date_from, date_to):
+        # get_all_timeslots is ordered by slot_date, so the range is a slice
+        slots = Timeslot.get_all_timeslots()
+        dates = [_as_date(s['slot_date']) for s in slots]
+        return slots[bisect_left(dates, date_from):bisect_right(dates, date_to)]
+
+    @staticmethod
+    def get_occupied(date_from, date_to):
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT r.room_id, r.slot_id
+                FROM timeslots t
+                JOIN reservations r ON r.slot_id = t.id
+                WHERE t.slot_date BETWEEN %s AND %s
+                  AND r.status IN ('pending', 'approved')
+            """, (date_from, date_to))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def get_matrix(date_from, date_to, min_capacity=None, max_capacity=None):
+        date_from, date_to = _as_date(date_from), _as_date(date_to)
+        rooms = [
+            r for r in Room.get_all_rooms()
+            if (min_capacity is None or r['capacity'] >= min_capacity)
+            and (max_capacity is None or r['capacity'] <= max_capacity)
+        ]
+        slots = Availability.get_slots_in_range(date_from, date_to)
+        slot_index = {s['id']: i for i, s in enumerate(slots)}
+        occupied = {r['id']: 0 for r in rooms}
+        intervals = Timeslot.get_interval_index()
+        for room_id, slot_id in Availability.get_occupied(date_from, date_to):
+            if room_id not in occupied:
+                continue
+            # A booking also blocks every slot overlapping its own (same day, so in range)
+            for taken in intervals.overlapping_key(slot_id) or [slot_id]:
+                if taken in slot_index:
+                    occupied[room_id] |= 1 << slot_index[taken]
+        return {'rooms': rooms, 'slots': slots, 'occupied': occupied}
+
+    @staticmethod
+    def free_combinations(matrix):
+        """Rooms with at least one free slot and slots free in at least one room."""
+        full = (1 << len(matrix['slots'])) - 1
+        rooms = [r for r in matrix['rooms'] if matrix['occupied'][r['id']] != full]
+        taken_everywhere = full
+        for room in rooms:
+            taken_everywhere &= matrix['occupied'][room['id']]
+        slots = [s for i, s in enumerate(matrix['slots']) if not taken_everywhere >> i & 1]
+        return rooms, slots
+
+    @staticmethod
+    def to_json(matrix):
+        return {
+            'rooms': [
+                {'id': r['id'], 'room_name': r['room_name'], 'capacity': r['capacity'],
+                 'room_type': r['room_type'], 'location': r['location']}
+                for r in matrix['rooms']
+            ],
+            'slots': [
+                {'id': s['id'], 'slot_date': str(s['slot_date']),
+                 'start_time': format_time(s['start_time']), 'end_time': format_time(s['end_time'])}
+                for s in matrix['slots']
+            ],
+            # Hex bitmap per room: bit i set means slots[i] is taken
+            'occupied': {str(room_id): format(bits, 'x') for room_id, bits in matrix['occupied'].items()},
+        }
@@ -0,0 +1,228 @@
+import os
+import threading
+import time
+
+from config import Config
+from .cache import DataCache
+from .reservation_model import Reservation, SLOT_TAKEN_MESSAGE, OVERLAP_MESSAGE, SLOT_RELEASES
+
+# Why a slot is known taken, as written to the markers
+TAKEN_REASONS = {'slot': SLOT_TAKEN_MESSAGE, 'overlap': OVERLAP_MESSAGE}
+
+
+class BookingAdmission:
+    """Coalesces competing single bookings before they reach the database.
+
+    Attempts on the same (room_id, slot_id) are serialized by an in-process
+    sharded lock table, and across gunicorn workers by a marker file created
+    with O_EXCL. Once an attempt books the slot (or finds it taken), the pair
+    goes into a recently-booked cache and the marker is rewritten as 'taken',
+    so the rest of a burst is answered without opening a connection.
+
+    Cached 'taken' answers keep the reason the attempt failed (the slot itself
+    or an overlapping one is booked) and are tagged with the slot_releases and
+    timeslots version stamps. The write paths bump those when a reservation is
+    rejected or deleted or a timeslot is edited, so a released or changed slot
+    becomes bookable again on every worker's next request.
+    The unique active-booking key stays the authority: when in doubt (waits
+    time out, markers unavailable) the attempt simply goes to the database.
+    """
+    _shards = [threading.Lock() for _ in range(max(1, Config.ADMISSION_SHARDS))]
+    _lock = threading.Lock()
+    _taken = {}   # (room_id, slot_id) -> (expires_at, version, reason)
+    _counters = {'admitted': 0, 'short_circuited': 0, 'waited': 0, 'wait_timeouts': 0}
+    _marker_dir_ready = None
+
+    @staticmethod
+    def reserve(user_id, room_id, slot_id, purpose):
+        """Drop-in for Reservation.create_reservation with admission control."""
+        if not Config.BOOKING_ADMISSION:
+            return Reservation.create_reservation(user_id, room_id, slot_id, purpose)
+        key = (int(room_id), int(slot_id))
+        version = BookingAdmission._version()
+        reason = BookingAdmission._known_taken(key, version)
+        if reason:
+            return BookingAdmission._short_circuit(reason)
+
+        shard = BookingAdmission._shards[hash(key) % len(BookingAdmission._shards)]
+        locked = shard.acquire(timeout=Config.ADMISSION_WAIT)
+        try:
+            if not locked:
+                BookingAdmission._count('wait_timeouts')
+            else:
+                reason = BookingAdmission._known_taken(key, version)
+                if reason:
+                    # The attempt we queued behind booked it (or found it blocked)
+                    return BookingAdmission._short_circuit(reason)
+
+            marker, reason = BookingAdmission._claim_marker(key, version)
+            if marker == 'taken':
+                BookingAdmission._remember(key, version, reason)
+                return BookingAdmission._short_circuit(reason)
+
+            BookingAdmission._count('admitted')
+            success, message = False, None
+            try:
+                success, message = Reservation.create_reservation(user_id, room_id, slot_id, purpose)
+            finally:
+                # An overlapping booking blocks the slot just as well, until it is released
+                if success or message == SLOT_TAKEN_MESSAGE:
+                    BookingAdmission._remember(key, version, 'slot', marker)
+                elif message == OVERLAP_MESSAGE:
+                    BookingAdmission._remember(key, version, 'overlap', marker)
+                else:
+                    BookingAdmission._drop_marker(key, marker)
+            return success, message
+        finally:
+            if locked:
+                shard.release()
+
+    @staticmethod
+    def _version():
+        """The stamps a cached 'taken' answer depends on, or None when unreadable."""
+        releases, timeslots = DataCache.version(SLOT_RELEASES), DataCache.version('timeslots')
+        if releases is None or timeslots is None:
+            return None
+        return f"{releases}.{timeslots}"
+
+    @staticmethod
+    def _short_circuit(reason):
+        BookingAdmission._count('short_circuited')
+        return False, TAKEN_REASONS[reason]
+
+    @staticmethod
+    def _count(name):
+        with BookingAdmission._lock:
+            BookingAdmission._counters[name] += 1
+
+    @staticmethod
+    def _known_taken(key, version):
+        """The reason `key` is known taken under `version`, or None."""
+        if version is None:
+            return None
+        with BookingAdmission._lock:
+            entry = BookingAdmission._taken.get(key)
+            if entry and entry[1] == version and entry[0] > time.monotonic():
+                return entry[2]
+            return None
+
+    @staticmethod
+    def _remember(key, version, reason, marker=None):
+        if version is None:
+            BookingAdmission._drop_marker(key, marker)
+            return
+        now = time.monotonic()
+        with BookingAdmission._lock:
+            if len(BookingAdmission._taken) > 10000:
+                for stale in [k for k, v in BookingAdmission._taken.items() if v[0] <= now]:
+                    del BookingAdmission._taken[stale]
+            BookingAdmission._taken[key] = (now + Config.ADMISSION_TAKEN_TTL, version, reason)
+        if marker == 'claimed':
+            path = BookingAdmission._marker_path(key)
+            try:
+                # Replace atomically so readers never see a half-written marker
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}"
+                with open(tmp_path, 'w') as f:
+                    f.write(f"taken {version} {reason}")
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Error writing booking marker: {e}")
+                BookingAdmission._drop_marker(key, marker)
+
+    @staticmethod
+    def _marker_path(key):
+        directory = Config.ADMISSION_MARKER_DIR
+        if not directory:
+            return None
+        if BookingAdmission._marker_dir_ready is None:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                BookingAdmission._marker_dir_ready = True
+            except OSError as e:
+                print(f"Booking markers disabled, can't create {directory}: {e}")
+                BookingAdmission._marker_dir_ready = False
+        if not BookingAdmission._marker_dir_ready:
+            return None
+        return os.path.join(directory, f"{key[0]}-{key[1]}")
+
+    @staticmethod
+    def _read_marker(path, version):
+        """Return the state of an existing marker and, when 'taken', its reason.
+
+        States are 'taken', 'inflight', 'stale' or 'gone'.
+        """
+        try:
+            with open(path, 'r') as f:
+                content = f.read().split()
+            age = time.time() - os.path.getmtime(path)
+        except FileNotFoundError:
+            return 'gone', None
+        if content and content[0] == 'taken':
+            fresh = age < Config.ADMISSION_TAKEN_TTL
+            if (fresh and version is not None and len(content) == 3 and content[1] == version
+                    and content[2] in TAKEN_REASONS):
+                return 'taken', content[2]
+            return 'stale', None
+        # Empty while its creator is still writing it
+        return ('stale' if age > Config.ADMISSION_MARKER_TTL else 'inflight'), None
+
+    @staticmethod
+    def _claim_marker(key, version):
+        """Claim the cross-worker marker for a room+slot.
+
+        Returns (marker, reason): marker is 'claimed', 'taken' (another worker
+        booked it or found it blocked, for `reason`), or None when markers
+        are unavailable or the wait for another worker timed out.
+        """
+        path = BookingAdmission._marker_path(key)
+        if path is None:
+            return None, None
+        deadline = time.monotonic() + Config.ADMISSION_WAIT
+        waited = False
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                state, reason = BookingAdmission._read_marker(path, version)
+                if state == 'taken':
+                    return 'taken', reason
+                if state == 'stale':
+                    # Left behind by a crashed worker or an older release version.
+                    # Racing removals at worst let one extra attempt through.
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                    continue
+                if state == 'inflight':
+                    if time.monotonic() >= deadline:
+                        BookingAdmission._count('wait_timeouts')
+                        return None, None
+                    if not waited:
+                        BookingAdmission._count('waited')
+                        waited = True
+                    time.sleep(0.01)
+                continue
+            except OSError as e:
+                print(f"Error creating booking marker: {e}")
+                return None, None
+            with os.fdopen(fd, 'w') as f:
+                f.write(f"inflight {os.getpid()}")
+            return 'claimed', None
+
+    @staticmethod
+    def _drop_marker(key, marker):
+        if marker != 'claimed':
+            return
+        try:
+            os.unlink(BookingAdmission._marker_path(key))
+        except OSError:
+            pass
+
+    @staticmethod
+    def get_stats():
+        with BookingAdmission._lock:
+            stats = dict(BookingAdmission._counters)
+            now = time.monotonic()
+            stats['taken_cached'] = sum(1 for v in BookingAdmission._taken.values() if v[0] > now)
+        return stats
@@ -0,0 +1,245 @@
+import csv
+import io
+import re
+from datetime import date, datetime, timedelta
+
+from config import Config
+from .cache import DataCache
+from .db_connection import format_time, get_db_connection
+from .password_hasher import PasswordHasher
+
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+ROLES = ('student', 'faculty', 'admin')
+# Errors reported back to the admin; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+def _time_text(value):
+    """'9:00', '09:00' or a timedelta -> 'HH:MM:SS', the form MySQL returns."""
+    if isinstance(value, timedelta):
+        return format_time(value)
+    return datetime.strptime(value.strip(), '%H:%M:%S' if value.count(':') == 2 else '%H:%M').strftime('%H:%M:%S')
+
+
+def _chunks(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+class BulkImport:
+    """Set-up-a-semester tooling: timeslot generation and CSV import.
+
+    Input is validated as a whole first, nothing is written if any row is
+    invalid. Valid rows are inserted with executemany in chunks of
+    IMPORT_CHUNK_SIZE, one transaction per chunk, with the version stamp
+    bumped once per chunk so caches and listing pages see the new rows.
+    Every method returns {'inserted', 'skipped', 'errors'}.
+    """
+
+    COLUMNS = {
+        'rooms': ('room_name', 'capacity', 'room_type', 'location'),
+        'timeslots': ('slot_date', 'start_time', 'end_time'),
+        'users': ('name', 'email', 'password', 'role'),
+    }
+
+    @staticmethod
+    def recurring_slots(date_from, date_to, weekdays, day_start, day_end, slot_minutes, break_minutes=0):
+        """(date, start, end) tuples for back-to-back slots on the given weekdays (0 = Monday)."""
+        day_start = datetime.strptime(_time_text(day_start), '%H:%M:%S')
+        day_end = datetime.strptime(_time_text(day_end), '%H:%M:%S')
+        length = timedelta(minutes=slot_minutes)
+        step = length + timedelta(minutes=break_minutes)
+        weekdays = set(weekdays)
+        slots = []
+        day = date_from
+        while day <= date_to:
+            if day.weekday() in weekdays:
+                start = day_start
+                while start + length <= day_end:
+                    slots.append((day, start.strftime('%H:%M:%S'), (start + length).strftime('%H:%M:%S')))
+                    start += step
+            day += timedelta(days=1)
+        return slots
+
+    @staticmethod
+    def generate_timeslots(date_from, date_to, weekdays, day_start, day_end, slot_minutes, break_minutes=0):
+        errors = []
+        if date_to < date_from:
+            errors.append("The end date is before the start date.")
+        if (date_to - date_from).days > Config.IMPORT_MAX_DAYS:
+            errors.append(f"The date range is longer than {Config.IMPORT_MAX_DAYS} days.")
+        if not weekdays:
+            errors.append("Choose at least one weekday.")
+        if slot_minutes <= 0 or break_minutes < 0:
+            errors.append("The slot length must be positive and the break can't be negative.")
+        if errors:
+            return {'inserted': 0, 'skipped': 0, 'errors': errors}
+        slots = BulkImport.recurring_slots(date_from, date_to, weekdays, day_start, day_end,
+                                           slot_minutes, break_minutes)
+        return BulkImport._insert_timeslots(slots)
+
+    @staticmethod
+    def import_csv(entity, text):
+        """Import rooms, timeslots or users from CSV text with a header row."""
+        columns = BulkImport.COLUMNS[entity]
+        reader = csv.DictReader(io.StringIO(text))
+        header = [h.strip() for h in (reader.fieldnames or [])]
+        required = columns[:-1] if entity == 'users' else columns  # role is optional
+        missing = [c for c in required if c not in header]
+        if missing:
+            return {'inserted': 0, 'skipped': 0, 'errors': [f"Missing column(s): {', '.join(missing)}"]}
+        reader.fieldnames = header
+
+        parse = {'rooms': BulkImport._parse_room, 'timeslots': BulkImport._parse_timeslot,
+                 'users': BulkImport._parse_user}[entity]
+        rows, errors, error_count = [], [], 0
+        # Line 1 is the header
+        for line, record in enumerate(reader, start=2):
+            try:
+                rows.append(parse({k: (v or '').strip() for k, v in record.items() if k}))
+            except ValueError as e:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(f"Line {line}: {e}")
+        if error_count > len(errors):
+            errors.append(f"... and {error_count - len(errors)} more invalid line(s).")
+        if errors:
+            return {'inserted': 0, 'skipped': 0, 'errors': errors}
+
+        if entity == 'rooms':
+            return BulkImport._insert_rows(
+                "INSERT INTO rooms (room_name, capacity, room_type, location) VALUES (%s, %s, %s, %s)",
+                rows, 'rooms')
+        if entity == 'timeslots':
+            return BulkImport._insert_timeslots(rows)
+        return BulkImport._insert_users(rows)
+
+    @staticmethod
+    def _parse_room(record):
+        if not record['room_name']:
+            raise ValueError("room_name is empty")
+        try:
+            capacity = int(record['capacity'])
+        except ValueError:
+            raise ValueError(f"capacity '{record['capacity']}' is not a number")
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        return (record['room_name'], capacity, record['room_type'] or 'General', record['location'])
+
+    @staticmethod
+    def _parse_timeslot(record):
+        try:
+            slot_date = date.fromisoformat(record['slot_date'])
+        except ValueError:
+            raise ValueError(f"slot_date '{record['slot_date']}' is not YYYY-MM-DD")
+        try:
+            start, end = _time_text(record['start_time']), _time_text(record['end_time'])
+        except ValueError:
+            raise ValueError("start_time/end_time must be HH:MM or HH:MM:SS")
+        if end <= start:
+            raise ValueError("end_time must be after start_time")
+        return (slot_date, start, end)
+
+    @staticmethod
+    def _parse_user(record):
+        if not record['name']:
+            raise ValueError("name is empty")
+        email = record['email'].lower()
+        if not EMAIL_RE.match(email):
+            raise ValueError(f"'{record['email']}' is not an email address")
+        if len(record['password']) < 6:
+            raise ValueError("password is shorter than 6 characters")
+        role = record.get('role') or 'student'
+        if role not in ROLES:
+            raise ValueError(f"role must be one of {', '.join(ROLES)}")
+        return (record['name'], email, record['password'], role)
+
+    @staticmethod
+    def _insert_timeslots(slots):
+        # Skip slots that already exist (same date, start and end), in the file or the table
+        unique = list(dict.fromkeys(slots))
+        skipped = len(slots) - len(unique)
+        if unique:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    "SELECT slot_date, start_time, end_time FROM timeslots WHERE slot_date BETWEEN %s AND %s",
+                    (min(s[0] for s in unique), max(s[0] for s in unique))
+                )
+                existing = {(d, _time_text(s), _time_text(e)) for d, s, e in cursor.fetchall()}
+            finally:
+                cursor.close()
+                conn.close()
+            fresh = [s for s in unique if s not in existing]
+            skipped += len(unique) - len(fresh)
+            unique = fresh
+        result = BulkImport._insert_rows(
+            "INSERT INTO timeslots (slot_date, start_time, end_time) VALUES (%s, %s, %s)",
+            unique, 'timeslots')
+        result['skipped'] += skipped
+        return result
+
+    @staticmethod
+    def _insert_users(users):
+        # Emails must be unique: reject duplicates within the file, skip existing accounts
+        seen, errors = set(), []
+        for name, email, _, _ in users:
+            if email in seen and len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"{email} appears more than once.")
+            seen.add(email)
+        if errors:
+            return {'inserted': 0, 'skipped': 0, 'errors': errors}
+
+        existing = set()
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            for chunk in _chunks(sorted(seen), Config.IMPORT_CHUNK_SIZE):
+                cursor.execute(
+                    f"SELECT email FROM users WHERE email IN ({', '.join(['%s'] * len(chunk))})", chunk)
+                existing.update(row[0].lower() for row in cursor.fetchall())
+        finally:
+            cursor.close()
+            conn.close()
+        fresh = [u for u in users if u[1] not in existing]
+
+        # Hash each chunk in parallel right before inserting it, so plain
+        # passwords and hashes are only held one chunk at a time
+        def hashed_chunks():
+            for chunk in _chunks(fresh, Config.IMPORT_CHUNK_SIZE):
+                hashes = PasswordHasher.hash_many([u[2] for u in chunk])
+                yield [(name, email, h, role) for (name, email, _, role), h in zip(chunk, hashes)]
+
+        result = BulkImport._insert_rows(
+            "INSERT INTO users (name, email, password_hash, role) VALUES (%s, %s, %s, %s)",
+            hashed_chunks(), 'users', chunked=True)
+        result['skipped'] += len(users) - len(fresh)
+        return result
+
+    @staticmethod
+    def _insert_rows(query, rows, namespace, chunked=False):
+        """executemany in chunks, one transaction per chunk."""
+        chunks = rows if chunked else _chunks(rows, Config.IMPORT_CHUNK_SIZE)
+        inserted = 0
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                cursor.executemany(query, chunk)
+                DataCache.bump_version(cursor, namespace)
+                conn.commit()
+                inserted += len(chunk)
+        except Exception as e:
+            conn.rollback()
+            print(f"Error importing {namespace}: {e}")
+            return {'inserted': inserted, 'skipped': 0,
+                    'errors': [f"Stopped after {inserted} row(s): {e}"]}
+        finally:
+            cursor.close()
+            conn.close()
+            if inserted:
+                DataCache.invalidate(namespace)
+        return {'inserted': inserted, 'skipped': 0, 'errors': []}
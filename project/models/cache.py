@@ -0,0 +1,161 @@
+import threading
+import time
+
+from config import Config
+from .db_connection import get_db_connection, is_duplicate_key
+
+
+class DataCache:
+    """In-process read-through cache for rarely changing tables.
+
+    Entries are grouped by namespace ('rooms', 'timeslots'). Each namespace has
+    a version stamp in the data_versions table that the write paths bump inside
+    their own transaction. Workers re-read the stamps once per request (see
+    begin_request) and ignore entries cached under an older version, so an
+    admin edit in one gunicorn worker is visible to all of them on their next
+    request. Stamps and loaders read the primary, never a replica, so an entry
+    is never older than the version it is tagged with. At most MAX_ENTRIES
+    entries are kept: expired and outdated ones are pruned first, then the
+    oldest.
+    """
+    MAX_ENTRIES = 10000
+    _lock = threading.Lock()
+    _entries = {}    # (namespace, key) -> (value, expires_at, version)
+    _versions = {}   # namespace -> latest version seen in data_versions
+    _counters = {}   # namespace -> {'hits': n, 'misses': n, 'invalidations': n}
+    _last_sync = 0.0
+    _local = threading.local()
+
+    @staticmethod
+    def begin_request():
+        """Called before each request so the first cache read re-checks versions."""
+        DataCache._local.synced = False
+
+    @staticmethod
+    def _needs_sync():
+        synced = getattr(DataCache._local, 'synced', None)
+        if synced is None:
+            # Not running inside a request (scripts, background threads)
+            return time.monotonic() - DataCache._last_sync > Config.CACHE_VERSION_CHECK_INTERVAL
+        return not synced
+
+    @staticmethod
+    def _counter(namespace):
+        return DataCache._counters.setdefault(
+            namespace, {'hits': 0, 'misses': 0, 'invalidations': 0})
+
+    @staticmethod
+    def fetch_versions():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT name, version FROM data_versions")
+            return {name: version for name, version in cursor.fetchall()}
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def sync():
+        """Re-read the version stamps and drop entries of namespaces that changed."""
+        versions = DataCache.fetch_versions()
+        with DataCache._lock:
+            for namespace, version in versions.items():
+                known = DataCache._versions.get(namespace)
+                if known is not None and known != version:
+                    DataCache._drop(namespace)
+                DataCache._versions[namespace] = version
+            DataCache._last_sync = time.monotonic()
+        if getattr(DataCache._local, 'synced', None) is not None:
+            DataCache._local.synced = True
+        return versions
+
+    @staticmethod
+    def get_or_load(namespace, key, loader):
+        if Config.CACHE_TTL <= 0:
+            return loader()
+        if DataCache._needs_sync():
+            try:
+                DataCache.sync()
+            except Exception as e:
+                print(f"Error reading data versions, bypassing cache: {e}")
+                return loader()
+
+        with DataCache._lock:
+            version = DataCache._versions.get(namespace)
+            entry = DataCache._entries.get((namespace, key))
+            if entry and entry[2] == version and entry[1] > time.monotonic():
+                DataCache._counter(namespace)['hits'] += 1
+                return entry[0]
+            DataCache._counter(namespace)['misses'] += 1
+
+        # Tagged with the version read before loading: if a write lands in
+        # between, the next sync sees a newer version and ignores this entry.
+        value = loader()
+        now = time.monotonic()
+        with DataCache._lock:
+            if len(DataCache._entries) >= DataCache.MAX_ENTRIES:
+                for stale in [k for k, e in DataCache._entries.items()
+                              if e[1] <= now or e[2] != DataCache._versions.get(k[0])]:
+                    del DataCache._entries[stale]
+            while len(DataCache._entries) >= DataCache.MAX_ENTRIES:
+                # Still full: drop the oldest entry (dicts keep insertion order)
+                del DataCache._entries[next(iter(DataCache._entries))]
+            DataCache._entries[(namespace, key)] = (value, now + Config.CACHE_TTL, version)
+        return value
+
+    @staticmethod
+    def version(namespace):
+        """Current version stamp of a namespace, re-read once per request.
+
+        Returns 0 for a namespace that was never bumped and None when the
+        stamps can't be read, so callers can skip anything version-tagged.
+        """
+        if DataCache._needs_sync():
+            try:
+                DataCache.sync()
+            except Exception as e:
+                print(f"Error reading data versions: {e}")
+                return None
+        with DataCache._lock:
+            return DataCache._versions.get(namespace, 0)
+
+    @staticmethod
+    def bump_version(cursor, namespace):
+        """Bump a namespace's version stamp inside the caller's transaction."""
+        update_query = """
+            UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE name = %s
+        """
+        cursor.execute(update_query, (namespace,))
+        if cursor.rowcount == 0:
+            try:
+                cursor.execute("INSERT INTO data_versions (name, version) VALUES (%s, 1)", (namespace,))
+            except Exception as e:
+                # Another writer created the row first
+                if not is_duplicate_key(e):
+                    raise
+                cursor.execute(update_query, (namespace,))
+
+    @staticmethod
+    def invalidate(namespace):
+        """Drop this worker's entries for a namespace right after a committed write."""
+        with DataCache._lock:
+            DataCache._drop(namespace)
+
+    @staticmethod
+    def _drop(namespace):
+        for key in [k for k in DataCache._entries if k[0] == namespace]:
+            del DataCache._entries[key]
+        DataCache._counter(namespace)['invalidations'] += 1
+
+    @staticmethod
+    def get_stats():
+        with DataCache._lock:
+            stats = {}
+            for namespace in set(DataCache._counters) | set(DataCache._versions):
+                counters = dict(DataCache._counter(namespace))
+                counters['entries'] = sum(1 for k in DataCache._entries if k[0] == namespace)
+                counters['version'] = DataCache._versions.get(namespace)
+                stats[namespace] = counters
+            return stats
@@ -0,0 +1,52 @@
+import threading
+from collections import OrderedDict
+
+from config import Config
+
+
+class FragmentCache:
+    """In-process LRU cache of rendered template fragments (HTML strings).
+
+    Callers put the version stamps the fragment was rendered from into the
+    key (see Versions). The model write paths bump those stamps, so a write
+    makes the old fragment unreachable at once in every worker; it is then
+    evicted as least recently used. At most FRAGMENT_CACHE_SIZE entries.
+    """
+    _lock = threading.Lock()
+    _entries = OrderedDict()   # key -> html
+    _counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def get_or_render(key, render):
+        if Config.FRAGMENT_CACHE_SIZE <= 0:
+            return render()
+        with FragmentCache._lock:
+            html = FragmentCache._entries.get(key)
+            if html is not None:
+                FragmentCache._entries.move_to_end(key)
+                FragmentCache._counters['hits'] += 1
+                return html
+            FragmentCache._counters['misses'] += 1
+
+        html = render()
+        with FragmentCache._lock:
+            FragmentCache._entries[key] = html
+            FragmentCache._entries.move_to_end(key)
+            while len(FragmentCache._entries) > Config.FRAGMENT_CACHE_SIZE:
+                FragmentCache._entries.popitem(last=False)
+                FragmentCache._counters['evictions'] += 1
+        return html
+
+    @staticmethod
+    def clear():
+        with FragmentCache._lock:
+            FragmentCache._entries.clear()
+
+    @staticmethod
+    def get_stats():
+        with FragmentCache._lock:
+            stats = dict(FragmentCache._counters)
+            stats['entries'] = len(FragmentCache._entries)
+            stats['bytes'] = sum(len(html.encode()) for html in FragmentCache._entries.values())
+            stats['size'] = Config.FRAGMENT_CACHE_SIZE
+            return stats
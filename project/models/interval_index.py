@@ -0,0 +1,58 @@
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+
+def _seconds(value):
+    # TIME columns arrive as timedelta; 'HH:MM[:SS]' strings and seconds are accepted too
+    if isinstance(value, int):
+        return value
+    if isinstance(value, timedelta):
+        return int(value.total_seconds())
+    parts = [int(p) for p in str(value).split(':')]
+    return parts[0] * 3600 + parts[1] * 60 + (parts[2] if len(parts) > 2 else 0)
+
+
+class IntervalIndex:
+    """Half-open [start, end) time intervals per day, for overlap queries.
+
+    Each day's intervals are sorted by start. An interval overlapping
+    [start, end) begins before `end` and, being at most `longest` long, after
+    `start - longest`, so a query is two bisections plus a scan of that
+    window: O(log n + k) even for dense grids of overlapping timeslots.
+    """
+
+    def __init__(self, intervals=()):
+        """`intervals` yields (key, day, start, end) tuples."""
+        by_day = {}
+        self._intervals = {}
+        for key, day, start, end in intervals:
+            start, end = _seconds(start), _seconds(end)
+            by_day.setdefault(day, []).append((start, end, key))
+            self._intervals[key] = (day, start, end)
+        self._days = {}
+        for day, items in by_day.items():
+            items.sort()
+            longest = max(end - start for start, end, _ in items)
+            self._days[day] = ([start for start, _, _ in items], items, longest)
+
+    def __contains__(self, key):
+        return key in self._intervals
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def overlapping(self, day, start, end):
+        """Keys of the intervals on `day` that overlap [start, end)."""
+        entry = self._days.get(day)
+        if entry is None:
+            return []
+        starts, items, longest = entry
+        start, end = _seconds(start), _seconds(end)
+        lo = bisect_right(starts, start - longest)
+        hi = bisect_left(starts, end)
+        return [key for _, item_end, key in items[lo:hi] if item_end > start]
+
+    def overlapping_key(self, key):
+        """Keys overlapping the interval stored under `key`, itself included."""
+        interval = self._intervals.get(key)
+        return self.overlapping(*interval) if interval else []
@@ -0,0 +1,229 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from config import Config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and IN-list placeholders so one query is one label."""
+    sql = ' '.join(sql.split())
+    sql = re.sub(r'%s(?:\s*,\s*%s)+', '%s, ...', sql)
+    sql = re.sub(r'\(%s, %s\)(?:, \(%s, %s\))+', '(%s, %s), ...', sql)
+    sql = re.sub(r'\(room_id = %s AND slot_id = %s\)(?: OR \(room_id = %s AND slot_id = %s\))+',
+                 '(room_id = %s AND slot_id = %s) OR ...', sql)
+    return sql[:200]
+
+
+def _labels(**labels):
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def _merge_labels(labels, extra):
+    return labels[:-1] + ',' + extra + '}' if labels != '{}' else '{' + extra + '}'
+
+
+class Metrics:
+    """Request and query instrumentation, rendered in Prometheus text format.
+
+    app.py registers begin_request/end_request as request hooks and
+    get_db_connection wraps every connection in InstrumentedConnection, whose
+    cursors time each execute(). Queries and DB time are also accumulated per
+    request (thread-local), which makes N-query pages stand out. Counters are
+    per worker process, like the pool and cache stats.
+    """
+    _lock = threading.Lock()
+    _local = threading.local()
+    _requests = {}         # (endpoint, method, status) -> Histogram of seconds
+    _request_queries = {}  # endpoint -> Histogram of queries per request
+    _request_db_time = {}  # endpoint -> Histogram of DB seconds per request
+    _queries = {}          # statement verb -> Histogram of seconds
+    _connection_open = Histogram(QUERY_BUCKETS)
+    _slow = {}             # normalized sql -> [count, total seconds, max seconds]
+
+    @staticmethod
+    def begin_request():
+        Metrics._local.request = {'started': time.perf_counter(), 'queries': 0, 'db_time': 0.0}
+
+    @staticmethod
+    def end_request(endpoint, method, status):
+        state = getattr(Metrics._local, 'request', None)
+        if state is None:
+            return
+        Metrics._local.request = None
+        elapsed = time.perf_counter() - state['started']
+        endpoint = endpoint or 'unknown'
+        with Metrics._lock:
+            key = (endpoint, method, str(status))
+            Metrics._requests.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(elapsed)
+            Metrics._request_queries.setdefault(endpoint, Histogram(COUNT_BUCKETS)).observe(state['queries'])
+            Metrics._request_db_time.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(state['db_time'])
+
+    @staticmethod
+    def request_state():
+        """This request's query counters, to hand to helper threads (None outside requests)."""
+        return getattr(Metrics._local, 'request', None)
+
+    @staticmethod
+    def apply_request_state(state):
+        """Count this thread's queries into the request `state` came from.
+
+        The thread counts into its own dict; None adds that to the request's
+        counters and resets the thread.
+        """
+        if state is not None:
+            Metrics._local.request = {'parent': state, 'queries': 0, 'db_time': 0.0}
+            return
+        own = getattr(Metrics._local, 'request', None)
+        Metrics._local.request = None
+        if own is not None and 'parent' in own:
+            with Metrics._lock:
+                own['parent']['queries'] += own['queries']
+                own['parent']['db_time'] += own['db_time']
+
+    @staticmethod
+    def observe_connection(seconds):
+        with Metrics._lock:
+            Metrics._connection_open.observe(seconds)
+        state = getattr(Metrics._local, 'request', None)
+        if state is not None:
+            state['db_time'] += seconds
+
+    @staticmethod
+    def observe_query(sql, seconds):
+        verb = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else 'UNKNOWN'
+        state = getattr(Metrics._local, 'request', None)
+        if state is not None:
+            state['queries'] += 1
+            state['db_time'] += seconds
+        slow = seconds * 1000 >= Config.SLOW_QUERY_MS
+        normalized = normalize_sql(sql) if slow else None
+        with Metrics._lock:
+            Metrics._queries.setdefault(verb, Histogram(QUERY_BUCKETS)).observe(seconds)
+            if slow:
+                entry = Metrics._slow.setdefault(normalized, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    @staticmethod
+    def render(extra=()):
+        """Prometheus text exposition; `extra` is a list of (prefix, stats dict)."""
+        lines = []
+        with Metrics._lock:
+            Metrics._render_histograms(
+                lines, 'http_request_duration_seconds', 'Request latency by endpoint.',
+                {_labels(endpoint=e, method=m, status=s): h for (e, m, s), h in Metrics._requests.items()})
+            Metrics._render_histograms(
+                lines, 'http_request_db_queries', 'Database queries per request.',
+                {_labels(endpoint=e): h for e, h in Metrics._request_queries.items()})
+            Metrics._render_histograms(
+                lines, 'http_request_db_seconds', 'Database time (connection open + queries) per request.',
+                {_labels(endpoint=e): h for e, h in Metrics._request_db_time.items()})
+            Metrics._render_histograms(
+                lines, 'db_query_duration_seconds', 'Query execution time by statement type.',
+                {_labels(statement=v): h for v, h in Metrics._queries.items()})
+            Metrics._render_histograms(
+                lines, 'db_connection_open_seconds', 'Time to get a connection (pool wait or connect).',
+                {'{}': Metrics._connection_open})
+            lines.append(f'# HELP db_slow_queries_total Queries slower than {Config.SLOW_QUERY_MS} ms.')
+            lines.append('# TYPE db_slow_queries_total counter')
+            for sql, (count, _, _) in sorted(Metrics._slow.items()):
+                lines.append(f'db_slow_queries_total{_labels(sql=sql)} {count}')
+            lines.append('# HELP db_slow_query_seconds_max Slowest execution of each slow query.')
+            lines.append('# TYPE db_slow_query_seconds_max gauge')
+            for sql, (_, _, longest) in sorted(Metrics._slow.items()):
+                lines.append(f'db_slow_query_seconds_max{_labels(sql=sql)} {longest:.6f}')
+        for prefix, stats in extra:
+            Metrics._render_stats(lines, prefix, stats)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histograms(lines, name, help_text, histograms):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f'{name}_bucket{_merge_labels(labels, le)} {cumulative}')
+            lines.append(f'{name}_sum{labels if labels != "{}" else ""} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{labels if labels != "{}" else ""} {histogram.count}')
+
+    @staticmethod
+    def _render_stats(lines, prefix, stats):
+        # Flat dicts become one gauge per key; nested dicts get a 'name' label.
+        # Samples are grouped per metric name, as the exposition format requires.
+        families = {}
+        for key, value in sorted(stats.items()):
+            samples = value.items() if isinstance(value, dict) else [(key, value)]
+            for metric, sample in sorted(samples):
+                if isinstance(sample, (int, float)) and not isinstance(sample, bool):
+                    labels = _labels(name=key) if isinstance(value, dict) else ''
+                    families.setdefault(f'{prefix}_{metric}', []).append(f'{labels} {sample}')
+        for name, samples in sorted(families.items()):
+            lines.append(f'# TYPE {name} gauge')
+            lines.extend(name + sample for sample in samples)
+
+
+class InstrumentedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            Metrics.observe_query(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_of_params, *args, **kwargs)
+        finally:
+            Metrics.observe_query(sql, time.perf_counter() - started)
+
+
+class InstrumentedConnection:
+    """Passes everything through to the wrapped connection except cursor()."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if '_conn' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
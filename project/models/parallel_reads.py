@@ -0,0 +1,60 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from .db_connection import routing_state, apply_routing_state
+from .metrics import Metrics
+
+
+class ParallelReads:
+    """Runs independent read-only model calls at the same time, for async loaders.
+
+    Each call borrows its own pooled connection on a shared thread pool
+    (ASYNC_READ_WORKERS per process), so a view waits for its slowest query
+    instead of the sum of all of them. The calls follow the request's read
+    routing (its replica, or the primary pin after a write), and their queries
+    count towards the request's metrics.
+    """
+    _lock = threading.Lock()
+    _executor = None
+    _pid = None
+
+    @staticmethod
+    def _get_executor():
+        with ParallelReads._lock:
+            # Executor threads don't survive a fork; each gunicorn worker makes its own
+            if ParallelReads._executor is None or ParallelReads._pid != os.getpid():
+                ParallelReads._executor = ThreadPoolExecutor(
+                    max_workers=Config.ASYNC_READ_WORKERS, thread_name_prefix='parallel-read')
+                ParallelReads._pid = os.getpid()
+            return ParallelReads._executor
+
+    @staticmethod
+    def run(load):
+        """Call the async function `load` from a sync view and return its result.
+
+        The event loop runs on the request thread, so gather() sees the
+        request's read routing.
+        """
+        return asyncio.run(load())
+
+    @staticmethod
+    async def gather(*calls):
+        """Await the zero-argument callables `calls` concurrently; results in order."""
+        state = routing_state()
+        metrics = Metrics.request_state()
+
+        def run(call):
+            apply_routing_state(state)
+            Metrics.apply_request_state(metrics)
+            try:
+                return call()
+            finally:
+                Metrics.apply_request_state(None)
+                apply_routing_state(None)
+
+        loop = asyncio.get_running_loop()
+        executor = ParallelReads._get_executor()
+        return await asyncio.gather(*(loop.run_in_executor(executor, run, call) for call in calls))
@@ -0,0 +1,138 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from config import Config
+
+
+class HashingBusyError(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+class PasswordHasher:
+    """Runs password hashing on a small bounded thread pool.
+
+    scrypt and pbkdf2 release the GIL inside hashlib, so PASSWORD_HASH_WORKERS
+    threads cap how many cores login/register spikes can pin while the
+    request threads keep serving everything else. At most PASSWORD_HASH_QUEUE
+    hashes may be running or waiting; beyond that HashingBusyError is raised
+    and turned into a 503 with Retry-After. One pool per worker process.
+    """
+    _lock = threading.Lock()
+    _executor = None
+    _pid = None
+    _slots = None
+    _counters = {'hashed': 0, 'verified': 0, 'rehashed': 0, 'rejected': 0}
+
+    @staticmethod
+    def _get_executor():
+        with PasswordHasher._lock:
+            # Forked workers must not share the parent's threads
+            if PasswordHasher._executor is None or PasswordHasher._pid != os.getpid():
+                PasswordHasher._executor = ThreadPoolExecutor(
+                    max_workers=Config.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+                PasswordHasher._slots = threading.BoundedSemaphore(max(1, Config.PASSWORD_HASH_QUEUE))
+                PasswordHasher._pid = os.getpid()
+            return PasswordHasher._executor
+
+    @staticmethod
+    def _count(name):
+        with PasswordHasher._lock:
+            PasswordHasher._counters[name] += 1
+
+    @staticmethod
+    def _submit(func, *args):
+        executor = PasswordHasher._get_executor()
+        slots = PasswordHasher._slots
+        if not slots.acquire(blocking=False):
+            PasswordHasher._count('rejected')
+            raise HashingBusyError("Too many password hashes queued")
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    @staticmethod
+    def _run(func, *args):
+        if Config.PASSWORD_HASH_WORKERS <= 0:
+            return func(*args)
+        return PasswordHasher._submit(func, *args).result()
+
+    @staticmethod
+    def hash(password):
+        PasswordHasher._count('hashed')
+        return PasswordHasher._run(generate_password_hash, password, Config.PASSWORD_HASH_METHOD)
+
+    @staticmethod
+    def hash_many(passwords):
+        """Hash a batch (bulk user import) on its own IMPORT_HASH_WORKERS threads.
+
+        Kept off the login pool so an import neither fills its queue nor gets
+        shed by it, and kept small (default 1) so it can't take the cores the
+        login pool relies on; hashes come back in input order.
+        """
+        passwords = list(passwords)
+        with PasswordHasher._lock:
+            PasswordHasher._counters['hashed'] += len(passwords)
+        method = Config.PASSWORD_HASH_METHOD
+        if Config.IMPORT_HASH_WORKERS <= 1 or len(passwords) <= 1:
+            return [generate_password_hash(p, method) for p in passwords]
+        with ThreadPoolExecutor(max_workers=Config.IMPORT_HASH_WORKERS,
+                                thread_name_prefix='import-hash') as executor:
+            return list(executor.map(generate_password_hash, passwords, [method] * len(passwords)))
+
+    @staticmethod
+    def verify(stored_hash, password):
+        PasswordHasher._count('verified')
+        return PasswordHasher._run(check_password_hash, stored_hash, password)
+
+    @staticmethod
+    def needs_rehash(stored_hash):
+        """True when a hash was made with a different method or cost than configured."""
+        return stored_hash.split('$', 1)[0] != _method_prefix(Config.PASSWORD_HASH_METHOD)
+
+    @staticmethod
+    def rehash_in_background(func, password):
+        """Hash `password` on the pool and pass the result to `func`.
+
+        Used for transparent upgrades after a successful login, so it never
+        blocks the request and is simply skipped when the queue is full.
+        With PASSWORD_HASH_WORKERS=0 every hash already runs on the request
+        thread, so the upgrade does too.
+        """
+        def run():
+            try:
+                func(generate_password_hash(password, Config.PASSWORD_HASH_METHOD))
+                PasswordHasher._count('rehashed')
+            except Exception as e:
+                print(f"Error rehashing password: {e}")
+
+        if Config.PASSWORD_HASH_WORKERS <= 0:
+            run()
+            return True
+        try:
+            PasswordHasher._submit(run)
+            return True
+        except HashingBusyError:
+            return False
+
+    @staticmethod
+    def get_stats():
+        with PasswordHasher._lock:
+            stats = dict(PasswordHasher._counters)
+        stats['workers'] = Config.PASSWORD_HASH_WORKERS
+        stats['queue_limit'] = Config.PASSWORD_HASH_QUEUE
+        stats['method'] = _method_prefix(Config.PASSWORD_HASH_METHOD)
+        return stats
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    # werkzeug expands defaults ('scrypt' -> 'scrypt:32768:8:1'); hash once to learn the full form
+    return generate_password_hash('', method).split('$', 1)[0]
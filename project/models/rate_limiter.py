@@ -0,0 +1,220 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from config import Config
+
+# Endpoint groups sharing a concurrency cap, Config.<GROUP>_MAX_CONCURRENT
+# (POST only). Their buckets are named by the caller, see RateLimiter.admit.
+RULES = {
+    'login': ('auth.login', 'auth.register', 'api_v1.create_token'),
+    'reserve': ('reservation.reserve', 'api.batch_booking', 'api_v1.bookings'),
+}
+_ENDPOINT_RULES = {endpoint: rule for rule, endpoints in RULES.items() for endpoint in endpoints}
+
+
+class RateLimitedError(Exception):
+    """Raised when a request is shed; `reason` is 'rate' or 'concurrency'."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Request shed ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _take(bucket, now, rate, burst):
+    """Refill a (tokens, updated) bucket up to `now` and take one token.
+
+    Returns the new bucket and the seconds to wait before a token is
+    available (0 when one was taken).
+    """
+    tokens, updated = bucket if bucket else (burst, now)
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class MemoryBuckets:
+    """Token buckets in this worker process."""
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}   # key -> (tokens, updated)
+
+    def take(self, key, rate, burst):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) > self.MAX_KEYS:
+                # Buckets idle long enough to be full again carry no state
+                idle = burst / rate
+                for stale in [k for k, b in self._buckets.items() if now - b[1] > idle]:
+                    del self._buckets[stale]
+            self._buckets[key], wait = _take(self._buckets.get(key), now, rate, burst)
+        return wait
+
+    def size(self):
+        with self._lock:
+            return len(self._buckets)
+
+
+class SharedBuckets:
+    """Token buckets in a SQLite file, shared by all workers on one host.
+
+    Each take is one short IMMEDIATE transaction, so concurrent workers see
+    each other's updates. Rows of buckets that have refilled are pruned now
+    and then.
+    """
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path):
+        self._path = path
+        self._local = threading.local()
+        self._takes = 0
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self._path, timeout=Config.SQLITE_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    bucket_key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    full_at REAL NOT NULL
+                )
+            """)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, key, rate, burst):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE bucket_key = ?", (key,)).fetchone()
+            (tokens, updated), wait = _take(row, now, rate, burst)
+            conn.execute("INSERT OR REPLACE INTO rate_buckets (bucket_key, tokens, updated, full_at) "
+                         "VALUES (?, ?, ?, ?)", (key, tokens, updated, now + (burst - tokens) / rate))
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM rate_buckets WHERE full_at < ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def size(self):
+        return self._conn().execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+
+
+class RateLimiter:
+    """Admission control for the expensive POSTs (logins, bookings).
+
+    Two checks per request, see RULES for the endpoint groups:
+    - a concurrency cap per group and worker process (<GROUP>_MAX_CONCURRENT);
+      beyond it the request is shed with 503 instead of queueing for a
+      database connection or a hashing thread;
+    - token buckets named by the caller, e.g. one per account and IP plus a
+      looser one per IP, each refilled at <LIMIT>_RATE_PER_MINUTE up to
+      <LIMIT>_BURST; an empty bucket answers 429 with Retry-After.
+    Buckets live in this process (RATE_LIMIT_BACKEND=memory) or in a SQLite
+    file all workers share (shared). If the shared file fails, requests are
+    let through rather than shed.
+    """
+    _lock = threading.Lock()
+    _backend = None
+    _slots = {}
+    _pid = None
+    _counters = {}   # rule -> {'allowed': n, 'shed_rate': n, 'shed_concurrency': n, 'backend_errors': n}
+
+    @staticmethod
+    def rule_for(endpoint, method):
+        if method != 'POST':
+            return None
+        return _ENDPOINT_RULES.get(endpoint)
+
+    @staticmethod
+    def _limit(rule, name):
+        return getattr(Config, f'{rule.upper()}_{name}')
+
+    @staticmethod
+    def _state():
+        with RateLimiter._lock:
+            # Semaphores and SQLite handles are per process
+            if RateLimiter._backend is None or RateLimiter._pid != os.getpid():
+                if Config.RATE_LIMIT_BACKEND == 'shared':
+                    RateLimiter._backend = SharedBuckets(Config.RATE_LIMIT_PATH)
+                else:
+                    RateLimiter._backend = MemoryBuckets()
+                RateLimiter._slots = {
+                    rule: threading.BoundedSemaphore(RateLimiter._limit(rule, 'MAX_CONCURRENT'))
+                    for rule in RULES if RateLimiter._limit(rule, 'MAX_CONCURRENT') > 0
+                }
+                RateLimiter._pid = os.getpid()
+            return RateLimiter._backend, RateLimiter._slots
+
+    @staticmethod
+    def _count(rule, name):
+        with RateLimiter._lock:
+            counters = RateLimiter._counters.setdefault(
+                rule, {'allowed': 0, 'shed_rate': 0, 'shed_concurrency': 0, 'backend_errors': 0})
+            counters[name] += 1
+
+    @staticmethod
+    def admit(rule, buckets):
+        """Admit one request of `rule` or raise RateLimitedError.
+
+        `buckets` is a list of (limit, client): a token is taken from the
+        bucket of `client` under the limits Config.<limit>_RATE_PER_MINUTE and
+        <limit>_BURST, and every bucket must have one. Returns True when a
+        concurrency slot was taken; pass the rule to release() once the
+        request is done.
+        """
+        backend, slots = RateLimiter._state()
+        slot = slots.get(rule)
+        if slot is not None and not slot.acquire(blocking=False):
+            RateLimiter._count(rule, 'shed_concurrency')
+            raise RateLimitedError('concurrency', 1)
+
+        wait = 0.0
+        for limit, client in buckets:
+            rate = RateLimiter._limit(limit, 'RATE_PER_MINUTE') / 60.0
+            if rate <= 0:
+                continue
+            try:
+                wait = max(wait, backend.take(f"{limit.lower()}:{client}", rate,
+                                              max(1, RateLimiter._limit(limit, 'BURST'))))
+            except Exception as e:
+                print(f"Error reading rate limit bucket, letting the request through: {e}")
+                RateLimiter._count(rule, 'backend_errors')
+        if wait > 0:
+            if slot is not None:
+                slot.release()
+            RateLimiter._count(rule, 'shed_rate')
+            raise RateLimitedError('rate', math.ceil(wait))
+        RateLimiter._count(rule, 'allowed')
+        return slot is not None
+
+    @staticmethod
+    def release(rule):
+        _, slots = RateLimiter._state()
+        slots[rule].release()
+
+    @staticmethod
+    def get_stats():
+        backend, _ = RateLimiter._state()
+        with RateLimiter._lock:
+            stats = {rule: dict(counters) for rule, counters in RateLimiter._counters.items()}
+        try:
+            stats['buckets'] = backend.size()
+        except Exception as e:
+            print(f"Error counting rate limit buckets: {e}")
+        stats['backend'] = Config.RATE_LIMIT_BACKEND
+        return stats
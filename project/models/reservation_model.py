@@ -1,47 +1,163 @@
-from .db_connection import get_db_connection
+import random
+import time
+from datetime import datetime
+
+from config import Config
+from .cache import DataCache
+from .db_connection import get_db_connection, get_dedicated_connection, is_duplicate_key, is_retryable
+from .room_model import Timeslot
+from .version_model import Versions
+
+SLOT_TAKEN_MESSAGE = "Room is already booked or pending approval for this timeslot."
+OVERLAP_MESSAGE = "Room is already booked or pending approval for an overlapping time."
+# Version stamp bumped whenever an active booking stops blocking its slot
+# (rejected or deleted); see BookingAdmission
+SLOT_RELEASES = 'slot_releases'
 
 class Reservation:
+    @staticmethod
+    def _lock_room_and_find_taken(conn, cursor, room_id, slot_ids):
+        """Lock the room row and return which of `slot_ids` are actively booked in it.
+
+        Only needed for timeslots that overlap other timeslots: two bookings
+        of 09:00-10:00 and 09:30-11:00 don't collide in the unique index, so
+        they serialize on the room row and check for overlaps before inserting.
+        Must be the first statement of the transaction.
+        """
+        conn.start_transaction()
+        cursor.execute("SELECT id FROM rooms WHERE id = %s FOR UPDATE", (room_id,))
+        cursor.fetchall()
+        cursor.execute(
+            f"SELECT active_slot_id FROM reservations "
+            f"WHERE room_id = %s AND active_slot_id IN ({', '.join(['%s'] * len(slot_ids))})",
+            [room_id] + list(slot_ids)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
     @staticmethod
     def create_reservation(user_id, room_id, slot_id, purpose):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            # Start transaction
-            conn.start_transaction()
-            
-            # Check for existing approved or pending reservation for same room and slot
-            # Use SELECT ... FOR UPDATE to lock rows
-            query = """
-                SELECT id FROM reservations 
-                WHERE room_id = %s AND slot_id = %s AND status IN ('approved', 'pending')
-                FOR UPDATE
-            """
-            cursor.execute(query, (room_id, slot_id))
-            existing = cursor.fetchone()
-            
-            if existing:
+        # No locking read: the unique (room_id, active_slot_id) index rejects a
+        # second pending/approved booking, so a single INSERT decides the race.
+        # Slots that overlap other slots also lock the room row (see above).
+        insert_query = """
+            INSERT INTO reservations (user_id, room_id, slot_id, purpose, status)
+            VALUES (%s, %s, %s, %s, 'pending')
+        """
+        overlapping = Timeslot.get_overlapping(slot_id)
+        attempt = 0
+        while True:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            try:
+                if overlapping and Reservation._lock_room_and_find_taken(conn, cursor, room_id, overlapping):
+                    conn.rollback()
+                    return False, OVERLAP_MESSAGE
+                cursor.execute(insert_query, (user_id, room_id, slot_id, purpose))
+                Versions.bump_reservations(cursor, [user_id])
+                conn.commit()
+                Versions.bump_shared(conn, cursor)
+                return True, "Reservation request submitted successfully."
+            except Exception as e:
                 conn.rollback()
-                return False, "Room is already booked or pending approval for this timeslot."
-            
-            # Insert new reservation
-            insert_query = """
-                INSERT INTO reservations (user_id, room_id, slot_id, purpose, status)
-                VALUES (%s, %s, %s, %s, 'pending')
-            """
-            cursor.execute(insert_query, (user_id, room_id, slot_id, purpose))
-            conn.commit()
-            return True, "Reservation request submitted successfully."
-            
-        except Exception as e:
-            conn.rollback()
-            return False, str(e)
-        finally:
-            cursor.close()
-            conn.close()
+                if is_duplicate_key(e):
+                    return False, SLOT_TAKEN_MESSAGE
+                if not is_retryable(e) or attempt >= Config.BOOKING_MAX_RETRIES:
+                    return False, str(e)
+            finally:
+                cursor.close()
+                conn.close()
+            # Deadlock or lock wait timeout: back off with jitter and retry
+            time.sleep(Config.BOOKING_RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+            attempt += 1
+
+    @staticmethod
+    def create_batch_reservations(user_id, room_id, slot_ids, purpose, all_or_nothing=True):
+        """Book several slots of one room in a single transaction.
+
+        Conflicts are found with one set-based query and the free slots are
+        inserted with executemany. In all-or-nothing mode any conflict books
+        nothing; in best-effort mode the free slots are booked anyway.
+        Returns (booked_count, results) with one result dict per slot id.
+        """
+        slot_ids = list(dict.fromkeys(int(s) for s in slot_ids))
+        if not slot_ids:
+            return 0, []
+        placeholders = ', '.join(['%s'] * len(slot_ids))
+        insert_query = """
+            INSERT INTO reservations (user_id, room_id, slot_id, purpose, status)
+            VALUES (%s, %s, %s, %s, 'pending')
+        """
+        overlapping = {s: Timeslot.get_overlapping(s) for s in slot_ids}
+        # Every slot the batch could collide with: its own slots plus their overlaps
+        checked = sorted(set(slot_ids).union(*overlapping.values()))
+        attempt = 0
+        while True:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            results = {}
+            try:
+                if any(overlapping.values()):
+                    taken = Reservation._lock_room_and_find_taken(conn, cursor, room_id, checked)
+                else:
+                    taken = None
+                cursor.execute(f"SELECT id FROM timeslots WHERE id IN ({placeholders})", slot_ids)
+                existing = {row[0] for row in cursor.fetchall()}
+                if taken is None:
+                    cursor.execute(
+                        f"SELECT active_slot_id FROM reservations "
+                        f"WHERE room_id = %s AND active_slot_id IN ({placeholders})",
+                        [room_id] + slot_ids
+                    )
+                    taken = {row[0] for row in cursor.fetchall()}
+                accepted = set()
+                for slot_id in slot_ids:
+                    if slot_id not in existing:
+                        results[slot_id] = ('invalid', "Timeslot does not exist.")
+                    elif slot_id in taken:
+                        results[slot_id] = ('conflict', SLOT_TAKEN_MESSAGE)
+                    elif taken.intersection(overlapping[slot_id]):
+                        results[slot_id] = ('conflict', OVERLAP_MESSAGE)
+                    elif accepted.intersection(overlapping[slot_id]):
+                        results[slot_id] = ('conflict', "Overlaps another timeslot in this batch.")
+                    else:
+                        accepted.add(slot_id)
+                free = [s for s in slot_ids if s not in results]
+
+                if results and all_or_nothing:
+                    conn.rollback()
+                    for slot_id in free:
+                        results[slot_id] = ('skipped', "Not booked because other slots in the batch are unavailable.")
+                    return 0, Reservation._batch_results(slot_ids, results)
+
+                if free:
+                    cursor.executemany(insert_query, [(user_id, room_id, s, purpose) for s in free])
+                    Versions.bump_reservations(cursor, [user_id])
+                conn.commit()
+                if free:
+                    Versions.bump_shared(conn, cursor)
+                for slot_id in free:
+                    results[slot_id] = ('booked', "Reservation request submitted successfully.")
+                return len(free), Reservation._batch_results(slot_ids, results)
+            except Exception as e:
+                conn.rollback()
+                # A concurrent booking took one of the slots between the check and
+                # the insert, or a deadlock: re-run the set-based check and retry.
+                if not (is_duplicate_key(e) or is_retryable(e)) or attempt >= Config.BOOKING_MAX_RETRIES:
+                    return 0, Reservation._batch_results(
+                        slot_ids, {s: ('error', str(e)) for s in slot_ids})
+            finally:
+                cursor.close()
+                conn.close()
+            time.sleep(Config.BOOKING_RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+            attempt += 1
+
+    @staticmethod
+    def _batch_results(slot_ids, results):
+        return [{'slot_id': s, 'status': results[s][0], 'message': results[s][1]} for s in slot_ids]
 
     @staticmethod
     def get_reservations_by_user(user_id):
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor(dictionary=True)
         query = """
             SELECT r.*, rm.room_name, t.slot_date, t.start_time, t.end_time 
@@ -59,7 +175,7 @@ class Reservation:
 
     @staticmethod
     def get_all_reservations():
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor(dictionary=True)
         query = """
             SELECT r.*, u.name as user_name, rm.room_name, t.slot_date, t.start_time, t.end_time 
@@ -75,46 +191,286 @@ class Reservation:
         conn.close()
         return reservations
 
+    @staticmethod
+    def get_user_reservations_by_ids(user_id, reservation_ids):
+        """The user's reservations among `reservation_ids`, in one query; ids of
+        other users' reservations are left out."""
+        if not reservation_ids:
+            return []
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"""
+                SELECT r.id, r.room_id, rm.room_name, r.slot_id, t.slot_date, t.start_time, t.end_time,
+                       r.purpose, r.status, r.created_at
+                FROM reservations r
+                JOIN rooms rm ON r.room_id = rm.id
+                JOIN timeslots t ON r.slot_id = t.id
+                WHERE r.user_id = %s AND r.id IN ({', '.join(['%s'] * len(reservation_ids))})
+            """, [user_id] + list(reservation_ids))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def encode_cursor(row):
+        """Opaque keyset cursor for the (created_at, id) position of a row."""
+        return f"{row['created_at']:%Y-%m-%dT%H:%M:%S}_{row['id']}"
+
+    @staticmethod
+    def decode_cursor(cursor_value):
+        try:
+            created_at, res_id = cursor_value.rsplit('_', 1)
+            return datetime.strptime(created_at, '%Y-%m-%dT%H:%M:%S'), int(res_id)
+        except (AttributeError, ValueError):
+            return None
+
+    @staticmethod
+    def list_reservations(user_id=None, status=None, room_id=None, date_from=None,
+                          date_to=None, after=None, limit=50):
+        """One page of reservations, newest first, using keyset pagination.
+
+        `after` is a cursor from a previous page. Returns (rows, next_cursor);
+        next_cursor is None on the last page.
+        """
+        conditions = []
+        params = []
+        if user_id is not None:
+            conditions.append("r.user_id = %s")
+            params.append(user_id)
+        if status:
+            conditions.append("r.status = %s")
+            params.append(status)
+        if room_id:
+            conditions.append("r.room_id = %s")
+            params.append(room_id)
+        if date_from:
+            conditions.append("t.slot_date >= %s")
+            params.append(date_from)
+        if date_to:
+            conditions.append("t.slot_date <= %s")
+            params.append(date_to)
+        position = Reservation.decode_cursor(after) if after else None
+        if position:
+            # Expanded form of (created_at, id) < (x, y) so the index range applies
+            conditions.append("r.created_at <= %s AND (r.created_at < %s OR r.id < %s)")
+            params.extend([position[0], position[0], position[1]])
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"""
+            SELECT r.*, u.name as user_name, rm.room_name, t.slot_date, t.start_time, t.end_time
+            FROM reservations r
+            JOIN users u ON r.user_id = u.id
+            JOIN rooms rm ON r.room_id = rm.id
+            JOIN timeslots t ON r.slot_id = t.id
+            {where}
+            ORDER BY r.created_at DESC, r.id DESC
+            LIMIT %s
+        """
+        # Fetch one extra row to know whether another page exists
+        params.append(limit + 1)
+
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = Reservation.encode_cursor(rows[-1])
+        return rows, next_cursor
+
+    EXPORT_COLUMNS = (
+        'reservation_id', 'created_at', 'status', 'user_id', 'user_name', 'user_email',
+        'room_id', 'room_name', 'slot_date', 'start_time', 'end_time', 'purpose',
+        'decision', 'decision_time', 'admin_id', 'admin_name', 'notes',
+    )
+
+    @staticmethod
+    def iter_export(status=None, room_id=None, date_from=None, date_to=None, batch_size=1000):
+        """Yield lists of export rows (reservations with their approvals joined).
+
+        Uses an unbuffered cursor on a dedicated connection and fetchmany, so
+        only one batch is in memory no matter how many rows match. A
+        reservation decided more than once yields one row per decision.
+        """
+        conditions = []
+        params = []
+        if status:
+            conditions.append("r.status = %s")
+            params.append(status)
+        if room_id:
+            conditions.append("r.room_id = %s")
+            params.append(room_id)
+        if date_from:
+            conditions.append("t.slot_date >= %s")
+            params.append(date_from)
+        if date_to:
+            conditions.append("t.slot_date <= %s")
+            params.append(date_to)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"""
+            SELECT r.id AS reservation_id, r.created_at, r.status, r.user_id,
+                   u.name AS user_name, u.email AS user_email, r.room_id, rm.room_name,
+                   t.slot_date, t.start_time, t.end_time, r.purpose,
+                   a.decision, a.decision_time, a.admin_id, adm.name AS admin_name, a.notes
+            FROM reservations r
+            JOIN users u ON r.user_id = u.id
+            JOIN rooms rm ON r.room_id = rm.id
+            JOIN timeslots t ON r.slot_id = t.id
+            LEFT JOIN approvals a ON a.reservation_id = r.id
+            LEFT JOIN users adm ON a.admin_id = adm.id
+            {where}
+            ORDER BY r.id, a.decision_time
+        """
+        conn = get_dedicated_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            # An abandoned stream leaves unread rows behind; the connection is
+            # dedicated, so just drop it instead of draining the result
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            conn.close()
+
     @staticmethod
     def update_status(reservation_id, status, admin_id, notes=""):
+        result = Reservation.bulk_update_status([(reservation_id, status, notes)], admin_id)
+        return result is not None and not result['skipped']
+
+    @staticmethod
+    def bulk_update_status(decisions, admin_id):
+        """Apply many approve/reject decisions in one transaction.
+
+        `decisions` is a list of (reservation_id, status, notes) with status
+        'approved' or 'rejected'. Only pending reservations are changed; the
+        unique (room_id, active_slot_id) index already rules out a competing
+        pending request for the same room+slot. Returns counts plus the ids
+        that were skipped (not pending or unknown), or None on error.
+        """
+        wanted = {}
+        for reservation_id, status, notes in decisions:
+            wanted[int(reservation_id)] = ('approved' if status == 'approved' else 'rejected', notes or '')
+        result = {'approved': 0, 'rejected': 0, 'skipped': []}
+        if not wanted:
+            return result
+
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
             conn.start_transaction()
-            
-            update_query = "UPDATE reservations SET status = %s WHERE id = %s"
-            cursor.execute(update_query, (status, reservation_id))
-            
-            approval_query = """
-                INSERT INTO approvals (reservation_id, admin_id, decision, notes)
-                VALUES (%s, %s, %s, %s)
-            """
-            # Map status to decision
-            decision = 'approved' if status == 'approved' else 'rejected'
-            cursor.execute(approval_query, (reservation_id, admin_id, decision, notes))
-            
+            ids = list(wanted)
+            placeholders = ', '.join(['%s'] * len(ids))
+            # Row locks on the primary key only, so two admins can't decide twice
+            cursor.execute(
+                f"SELECT id, user_id FROM reservations "
+                f"WHERE id IN ({placeholders}) AND status = 'pending' FOR UPDATE",
+                ids
+            )
+            rows = cursor.fetchall()
+            pending = [row[0] for row in rows]
+            owners = {row[1] for row in rows}
+            result['skipped'] = [i for i in ids if i not in pending]
+
+            approved = [i for i in pending if wanted[i][0] == 'approved']
+            rejected = [i for i in pending if wanted[i][0] == 'rejected']
+            for status, group in (('approved', approved), ('rejected', rejected)):
+                if group:
+                    cursor.execute(
+                        f"UPDATE reservations SET status = %s WHERE id IN ({', '.join(['%s'] * len(group))})",
+                        [status] + group
+                    )
+                    result[status] = len(group)
+            if rejected:
+                DataCache.bump_version(cursor, SLOT_RELEASES)
+
+            approval_rows = [(i, admin_id, wanted[i][0], wanted[i][1]) for i in approved + rejected]
+            if approval_rows:
+                cursor.executemany("""
+                    INSERT INTO approvals (reservation_id, admin_id, decision, notes)
+                    VALUES (%s, %s, %s, %s)
+                """, approval_rows)
+                Versions.bump_reservations(cursor, owners)
             conn.commit()
-            return True
+            if approval_rows:
+                Versions.bump_shared(conn, cursor)
+            if rejected:
+                DataCache.invalidate(SLOT_RELEASES)
+            return result
         except Exception as e:
             conn.rollback()
             print(f"Error updating reservation status: {e}")
-            return False
+            return None
         finally:
             cursor.close()
             conn.close()
 
     @staticmethod
-    def clear_by_status(status):
-        """Clear reservations with a specific status (cancelled or rejected)"""
+    def delete_batch(cursor, rows):
+        """Delete (id, user_id, status) rows and their approvals inside the caller's transaction.
+
+        Returns True when an active booking was among them (its slot is free
+        again). Call Versions.bump_shared once the transaction is committed.
+        """
+        ids = [row[0] for row in rows]
+        placeholders = ', '.join(['%s'] * len(ids))
+        cursor.execute(f"DELETE FROM approvals WHERE reservation_id IN ({placeholders})", ids)
+        cursor.execute(f"DELETE FROM reservations WHERE id IN ({placeholders})", ids)
+        released = any(row[2] in ('pending', 'approved') for row in rows)
+        if released:
+            # Before the reservation stamps, in the same lock order as bulk_update_status
+            DataCache.bump_version(cursor, SLOT_RELEASES)
+        Versions.bump_reservations(cursor, [row[1] for row in rows])
+        return released
+
+    @staticmethod
+    def _purge(status=None):
+        # RETENTION_BATCH_SIZE rows per transaction, so the table is never locked
+        # for long; deleted rows drop out of the next SELECT, no cursor needed
+        where = " WHERE status = %s" if status else ""
+        params = (status,) if status else ()
+        deleted = 0
+        connection = get_db_connection()
+        cursor = connection.cursor()
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor()
-            cursor.execute("DELETE FROM reservations WHERE status = %s", (status,))
-            connection.commit()
-            affected_rows = cursor.rowcount
+            while True:
+                cursor.execute(f"SELECT id, user_id, status FROM reservations{where} LIMIT %s",
+                               params + (Config.RETENTION_BATCH_SIZE,))
+                rows = cursor.fetchall()
+                if not rows:
+                    return deleted
+                released = Reservation.delete_batch(cursor, rows)
+                connection.commit()
+                Versions.bump_shared(connection, cursor)
+                deleted += len(rows)
+                if released:
+                    DataCache.invalidate(SLOT_RELEASES)
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
             cursor.close()
             connection.close()
-            return affected_rows
+
+    @staticmethod
+    def clear_by_status(status):
+        """Clear reservations with a specific status (cancelled or rejected)"""
+        try:
+            return Reservation._purge(status)
         except Exception as e:
             print(f"Error clearing reservations by status: {e}")
             return 0
@@ -123,16 +479,7 @@ class Reservation:
     def clear_all_reservations():
         """Clear all reservations (admin only, dangerous operation)"""
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor()
-            # First clear approvals to avoid FK constraint
-            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
-            cursor.execute("TRUNCATE TABLE approvals")
-            cursor.execute("TRUNCATE TABLE reservations")
-            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
-            connection.commit()
-            cursor.close()
-            connection.close()
+            Reservation._purge()
             return True
         except Exception as e:
             print(f"Error clearing all reservations: {e}")
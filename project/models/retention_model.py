@@ -0,0 +1,210 @@
+import os
+import socket
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from config import Config
+from .cache import DataCache
+from .db_connection import get_db_connection, get_dedicated_connection
+from .reservation_model import Reservation, SLOT_RELEASES
+from .version_model import Versions
+
+JOB_NAME = 'archive_reservations'
+
+
+class Retention:
+    """Moves reservations of past slot dates, with their approvals, to the archive tables.
+
+    A pass walks reservations in id order (keyset, RETENTION_BATCH_SIZE at a
+    time) and archives those whose slot_date is before the cutoff, one short
+    transaction per batch with RETENTION_PAUSE seconds between batches so
+    bookings never wait behind it. The position reached is saved in
+    maintenance_jobs with every batch, so an interrupted pass resumes where it
+    stopped, with the same cutoff. A lease on that row keeps two processes
+    (background threads in several workers, the CLI) from running at once.
+    """
+    _lock = threading.Lock()
+    _thread = None
+    _pid = None
+
+    @staticmethod
+    def _owner():
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    @staticmethod
+    def _claim(cursor, owner, cutoff):
+        """Take the lease; returns (cursor_id, cutoff, processed) or None if another process holds it."""
+        now = datetime.now()
+        cursor.execute("INSERT IGNORE INTO maintenance_jobs (name) VALUES (%s)", (JOB_NAME,))
+        cursor.execute(
+            "UPDATE maintenance_jobs SET lease_owner = %s, lease_until = %s "
+            "WHERE name = %s AND (lease_until IS NULL OR lease_until < %s OR lease_owner = %s)",
+            (owner, now + timedelta(seconds=Config.RETENTION_LEASE), JOB_NAME, now, owner)
+        )
+        if cursor.rowcount != 1:
+            return None
+        cursor.execute("SELECT cursor_id, cutoff, processed, finished_at FROM maintenance_jobs WHERE name = %s",
+                       (JOB_NAME,))
+        cursor_id, job_cutoff, processed, finished_at = cursor.fetchone()
+        if job_cutoff is not None and finished_at is None:
+            # Resume the interrupted pass
+            return cursor_id, job_cutoff, processed
+        cutoff = cutoff or date.today() - timedelta(days=Config.RETENTION_DAYS)
+        cursor.execute(
+            "UPDATE maintenance_jobs SET cursor_id = 0, cutoff = %s, processed = 0, started_at = %s, "
+            "updated_at = %s, finished_at = NULL WHERE name = %s",
+            (cutoff, now, now, JOB_NAME)
+        )
+        return 0, cutoff, 0
+
+    @staticmethod
+    def _archive_batch(cursor, rows):
+        ids = [row[0] for row in rows]
+        placeholders = ', '.join(['%s'] * len(ids))
+        cursor.execute(
+            f"INSERT INTO reservations_archive "
+            f"(id, user_id, room_id, slot_id, slot_date, purpose, status, created_at) "
+            f"SELECT r.id, r.user_id, r.room_id, r.slot_id, t.slot_date, r.purpose, r.status, r.created_at "
+            f"FROM reservations r JOIN timeslots t ON t.id = r.slot_id WHERE r.id IN ({placeholders})",
+            ids
+        )
+        cursor.execute(
+            f"INSERT INTO approvals_archive (id, reservation_id, admin_id, decision, decision_time, notes) "
+            f"SELECT id, reservation_id, admin_id, decision, decision_time, notes "
+            f"FROM approvals WHERE reservation_id IN ({placeholders})",
+            ids
+        )
+        return Reservation.delete_batch(cursor, rows)
+
+    @staticmethod
+    def run(cutoff=None, batch_size=None, pause=None, max_batches=None, stop=None, report=None):
+        """Archive reservations with slot_date < cutoff (default: RETENTION_DAYS ago).
+
+        Continues an unfinished pass if there is one. Stops early after
+        max_batches or when `stop` (a threading.Event) is set; `report` is
+        called with the progress dict after every batch. Returns the progress
+        dict, or None when another process holds the lease.
+        """
+        batch_size = batch_size or Config.RETENTION_BATCH_SIZE
+        pause = Config.RETENTION_PAUSE if pause is None else pause
+        owner = Retention._owner()
+        # Dedicated: the pass sleeps between batches and must not hold a pool slot
+        conn = get_dedicated_connection()
+        cursor = conn.cursor()
+        try:
+            job = Retention._claim(cursor, owner, cutoff)
+            conn.commit()
+            if job is None:
+                return None
+            cursor_id, cutoff, processed = job
+            progress = {'cutoff': cutoff, 'cursor_id': cursor_id, 'archived': processed,
+                        'batches': 0, 'finished': False}
+            while True:
+                cursor.execute(
+                    "SELECT r.id, r.user_id, r.status FROM reservations r "
+                    "JOIN timeslots t ON t.id = r.slot_id "
+                    "WHERE r.id > %s AND t.slot_date < %s ORDER BY r.id LIMIT %s",
+                    (cursor_id, cutoff, batch_size)
+                )
+                rows = cursor.fetchall()
+                released = Retention._archive_batch(cursor, rows) if rows else False
+                if rows:
+                    cursor_id = rows[-1][0]
+                finished = len(rows) < batch_size
+                now = datetime.now()
+                cursor.execute(
+                    "UPDATE maintenance_jobs SET cursor_id = %s, processed = processed + %s, updated_at = %s, "
+                    "finished_at = %s, lease_until = %s WHERE name = %s AND lease_owner = %s",
+                    (cursor_id, len(rows), now, now if finished else None,
+                     now + timedelta(seconds=Config.RETENTION_LEASE), JOB_NAME, owner)
+                )
+                if cursor.rowcount != 1:
+                    # Lease lost (expired and taken over); leave the batch to the new owner
+                    conn.rollback()
+                    print("Retention pass stopped: lease lost")
+                    return progress
+                conn.commit()
+                if rows:
+                    Versions.bump_shared(conn, cursor)
+                if released:
+                    DataCache.invalidate(SLOT_RELEASES)
+                progress.update(cursor_id=cursor_id, archived=progress['archived'] + len(rows),
+                                batches=progress['batches'] + 1, finished=finished)
+                if report:
+                    report(dict(progress))
+                if finished or (max_batches and progress['batches'] >= max_batches):
+                    return progress
+                if stop is not None and stop.is_set():
+                    return progress
+                if pause:
+                    if stop is not None:
+                        stop.wait(pause)
+                    else:
+                        time.sleep(pause)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            try:
+                cursor.execute(
+                    "UPDATE maintenance_jobs SET lease_owner = NULL, lease_until = NULL "
+                    "WHERE name = %s AND lease_owner = %s", (JOB_NAME, owner))
+                conn.commit()
+            except Exception as e:
+                print(f"Error releasing retention lease: {e}")
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def get_progress():
+        """The current or last pass, plus how far the keyset is through the table."""
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                "SELECT cursor_id, cutoff, processed, started_at, updated_at, finished_at, lease_owner, lease_until "
+                "FROM maintenance_jobs WHERE name = %s", (JOB_NAME,))
+            job = cursor.fetchone() or {}
+            cursor.execute("SELECT MAX(id) AS max_id FROM reservations")
+            max_id = cursor.fetchone()['max_id'] or 0
+            cursor.execute("SELECT COUNT(*) AS archived_total FROM reservations_archive")
+            job.update(cursor.fetchone())
+        except Exception as e:
+            print(f"Error reading retention progress: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+        running = job.get('lease_until') is not None and job['lease_until'] > datetime.now()
+        job['running'] = running
+        job['max_id'] = max_id
+        if job.get('cutoff') is not None and job.get('finished_at') is None and max_id:
+            job['percent'] = round(100 * min(job['cursor_id'], max_id) / max_id, 1)
+        return job
+
+    @staticmethod
+    def start(interval=0):
+        """Run passes on a daemon thread: once, or every `interval` seconds.
+
+        One thread per worker process; returns False if it is already running.
+        """
+        with Retention._lock:
+            thread = Retention._thread
+            if thread is not None and thread.is_alive() and Retention._pid == os.getpid():
+                return False
+
+            def loop():
+                while True:
+                    try:
+                        Retention.run()
+                    except Exception as e:
+                        print(f"Error archiving reservations: {e}")
+                    if not interval:
+                        return
+                    time.sleep(interval)
+
+            Retention._thread = threading.Thread(target=loop, name='retention', daemon=True)
+            Retention._pid = os.getpid()
+            Retention._thread.start()
+            return True
@@ -1,8 +1,15 @@
 from .db_connection import get_db_connection
+from .cache import DataCache
+from .interval_index import IntervalIndex
 
 class Room:
     @staticmethod
     def get_all_rooms():
+        # Copy so callers can filter/reorder without touching the cached list
+        return list(DataCache.get_or_load('rooms', 'all', Room._load_all_rooms))
+
+    @staticmethod
+    def _load_all_rooms():
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM rooms")
@@ -13,6 +20,15 @@ class Room:
 
     @staticmethod
     def get_room_by_id(room_id):
+        # Cached per integer id only, so junk ids from forms can't fill the cache
+        try:
+            room_id = int(room_id)
+        except (TypeError, ValueError):
+            return None
+        return DataCache.get_or_load('rooms', ('id', room_id), lambda: Room._load_room(room_id))
+
+    @staticmethod
+    def _load_room(room_id):
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM rooms WHERE id = %s", (room_id,))
@@ -21,6 +37,73 @@ class Room:
         conn.close()
         return room
 
+    @staticmethod
+    def get_rooms_by_ids(room_ids):
+        """Rooms for `room_ids` in that order, skipping unknown ids."""
+        by_id = DataCache.get_or_load('rooms', 'by_id', lambda: {r['id']: r for r in Room.get_all_rooms()})
+        return [by_id[i] for i in room_ids if i in by_id]
+
+    @staticmethod
+    def search(min_capacity=None, max_capacity=None, room_type=None, location=None,
+               free_on=None, free_from=None, free_to=None, limit=20):
+        """Rooms matching all given filters in one query, smallest fitting room first.
+
+        `location` matches as a prefix ('Building 2' finds 'Building 2, Floor 1').
+        With free_on (a date) and free_from/free_to ('HH:MM:SS'), only rooms
+        without a pending or approved booking of any timeslot overlapping that
+        time are returned; the NOT EXISTS probe walks that day's timeslots by
+        (slot_date, start_time) and the unique (room_id, active_slot_id) key.
+        """
+        conditions = []
+        params = []
+        if min_capacity is not None:
+            conditions.append("rm.capacity >= %s")
+            params.append(min_capacity)
+        if max_capacity is not None:
+            conditions.append("rm.capacity <= %s")
+            params.append(max_capacity)
+        if room_type:
+            conditions.append("rm.room_type = %s")
+            params.append(room_type)
+        if location:
+            conditions.append("rm.location LIKE %s ESCAPE '!'")
+            params.append(location.replace('!', '!!').replace('%', '!%').replace('_', '!_') + '%')
+        if free_on is not None:
+            conditions.append("""NOT EXISTS (
+                SELECT 1 FROM timeslots t
+                JOIN reservations r ON r.room_id = rm.id AND r.active_slot_id = t.id
+                WHERE t.slot_date = %s AND t.start_time < %s AND t.end_time > %s
+            )""")
+            params.extend([free_on, free_to, free_from])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
+
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"""
+                SELECT rm.id, rm.room_name, rm.capacity, rm.room_type, rm.location
+                FROM rooms rm
+                {where}
+                ORDER BY rm.capacity, rm.room_name, rm.id
+                LIMIT %s
+            """, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def get_preview(max_capacity=None, sample_size=3):
+        """(number of rooms up to max_capacity, the first `sample_size` of them by id)."""
+        rooms = sorted((r for r in Room.get_all_rooms() if max_capacity is None or r['capacity'] <= max_capacity),
+                       key=lambda r: r['id'])
+        return len(rooms), rooms[:sample_size]
+
+    @staticmethod
+    def get_room_types():
+        return sorted({r['room_type'] for r in Room.get_all_rooms()})
+
     @staticmethod
     def add_room(name, capacity, rtype, location):
         conn = get_db_connection()
@@ -29,7 +112,9 @@ class Room:
             "INSERT INTO rooms (room_name, capacity, room_type, location) VALUES (%s, %s, %s, %s)",
             (name, capacity, rtype, location)
         )
+        DataCache.bump_version(cursor, 'rooms')
         conn.commit()
+        DataCache.invalidate('rooms')
         cursor.close()
         conn.close()
 
@@ -41,7 +126,9 @@ class Room:
             "UPDATE rooms SET room_name=%s, capacity=%s, room_type=%s, location=%s WHERE id=%s",
             (name, capacity, rtype, location, room_id)
         )
+        DataCache.bump_version(cursor, 'rooms')
         conn.commit()
+        DataCache.invalidate('rooms')
         cursor.close()
         conn.close()
 
@@ -50,13 +137,19 @@ class Room:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("DELETE FROM rooms WHERE id = %s", (room_id,))
+        DataCache.bump_version(cursor, 'rooms')
         conn.commit()
+        DataCache.invalidate('rooms')
         cursor.close()
         conn.close()
 
 class Timeslot:
     @staticmethod
     def get_all_timeslots():
+        return list(DataCache.get_or_load('timeslots', 'all', Timeslot._load_all_timeslots))
+
+    @staticmethod
+    def _load_all_timeslots():
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM timeslots ORDER BY slot_date, start_time")
@@ -65,8 +158,37 @@ class Timeslot:
         conn.close()
         return slots
 
+    @staticmethod
+    def get_interval_index():
+        """IntervalIndex of all timeslots keyed by id; rebuilt when timeslots change."""
+        return DataCache.get_or_load('timeslots', 'intervals', lambda: IntervalIndex(
+            (s['id'], s['slot_date'], s['start_time'], s['end_time']) for s in Timeslot.get_all_timeslots()
+        ))
+
+    @staticmethod
+    def get_overlapping(slot_id):
+        """Ids of the other timeslots whose time range overlaps this one's."""
+        slot_id = int(slot_id)
+        return [s for s in Timeslot.get_interval_index().overlapping_key(slot_id) if s != slot_id]
+
+    @staticmethod
+    def get_timeslots_by_ids(slot_ids):
+        """Timeslots for `slot_ids` in that order, skipping unknown ids."""
+        by_id = DataCache.get_or_load('timeslots', 'by_id',
+                                      lambda: {s['id']: s for s in Timeslot.get_all_timeslots()})
+        return [by_id[i] for i in slot_ids if i in by_id]
+
     @staticmethod
     def get_timeslot_by_id(slot_id):
+        try:
+            slot_id = int(slot_id)
+        except (TypeError, ValueError):
+            return None
+        return DataCache.get_or_load('timeslots', ('id', slot_id),
+                                     lambda: Timeslot._load_timeslot(slot_id))
+
+    @staticmethod
+    def _load_timeslot(slot_id):
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM timeslots WHERE id = %s", (slot_id,))
@@ -75,6 +197,24 @@ class Timeslot:
         conn.close()
         return slot
 
+    @staticmethod
+    def find_recurring(date_from, date_to, weekdays, start_time, end_time):
+        """Ids of the slots between two dates that fall on the given weekdays
+        (0 = Monday) with exactly this start and end time."""
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT id, slot_date FROM timeslots "
+            "WHERE slot_date BETWEEN %s AND %s AND start_time = %s AND end_time = %s "
+            "ORDER BY slot_date",
+            (date_from, date_to, start_time, end_time)
+        )
+        slots = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        weekdays = set(weekdays)
+        return [s['id'] for s in slots if s['slot_date'].weekday() in weekdays]
+
     @staticmethod
     def update_timeslot(slot_id, date, start, end):
         conn = get_db_connection()
@@ -83,7 +223,9 @@ class Timeslot:
             "UPDATE timeslots SET slot_date=%s, start_time=%s, end_time=%s WHERE id=%s",
             (date, start, end, slot_id)
         )
+        DataCache.bump_version(cursor, 'timeslots')
         conn.commit()
+        DataCache.invalidate('timeslots')
         cursor.close()
         conn.close()
 
@@ -95,7 +237,9 @@ class Timeslot:
             "INSERT INTO timeslots (slot_date, start_time, end_time) VALUES (%s, %s, %s)",
             (date, start, end)
         )
+        DataCache.bump_version(cursor, 'timeslots')
         conn.commit()
+        DataCache.invalidate('timeslots')
         cursor.close()
         conn.close()
     
@@ -104,6 +248,8 @@ class Timeslot:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("DELETE FROM timeslots WHERE id = %s", (slot_id,))
+        DataCache.bump_version(cursor, 'timeslots')
         conn.commit()
+        DataCache.invalidate('timeslots')
         cursor.close()
         conn.close()
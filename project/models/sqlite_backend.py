@@ -0,0 +1,160 @@
+"""Embedded SQLite (WAL) backend.
+
+Wraps sqlite3 in the small part of the mysql.connector API the models use
+(cursor(dictionary=True), start_transaction, commit/rollback, ping, ...) and
+translates the MySQL-flavoured SQL they issue, so the models run unchanged on
+either database. Selected with DB_BACKEND=sqlite.
+"""
+import re
+import sqlite3
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+# SQLite result codes (sqlite3 exceptions expose them as sqlite_errorcode)
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+SQLITE_CONSTRAINT_PRIMARYKEY = 1555
+SQLITE_CONSTRAINT_UNIQUE = 2067
+
+
+def _parse_time(value):
+    # TIME columns come back as timedelta, like mysql.connector returns them
+    hours, minutes, *seconds = value.decode().split(':')
+    return timedelta(hours=int(hours), minutes=int(minutes), seconds=float(seconds[0]) if seconds else 0)
+
+
+def format_time(value):
+    """A TIME value (timedelta, as both drivers return them) as zero-padded 'HH:MM:SS'."""
+    total = int(value.total_seconds())
+    return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+
+
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.strftime('%Y-%m-%d %H:%M:%S'))
+sqlite3.register_adapter(timedelta, format_time)
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('TIME', _parse_time)
+
+
+@lru_cache(maxsize=512)
+def translate(sql):
+    """Rewrite MySQL-specific syntax used by the models into SQLite syntax."""
+    sql = sql.replace('%s', '?')
+    sql = re.sub(r'\s+FOR\s+UPDATE\b', '', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'^\s*INSERT\s+IGNORE\b', 'INSERT OR IGNORE', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'^\s*TRUNCATE\s+TABLE\s+', 'DELETE FROM ', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'^\s*SET\s+FOREIGN_KEY_CHECKS\s*=\s*0\s*$', 'PRAGMA foreign_keys = OFF', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'^\s*SET\s+FOREIGN_KEY_CHECKS\s*=\s*1\s*$', 'PRAGMA foreign_keys = ON', sql, flags=re.IGNORECASE)
+    return sql
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    def __init__(self, raw_cursor, dictionary=False):
+        self._cursor = raw_cursor
+        if dictionary:
+            self._cursor.row_factory = _dict_row
+
+    def execute(self, sql, params=None):
+        self._cursor.execute(translate(sql), tuple(params) if params is not None else ())
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(translate(sql), [tuple(p) for p in seq_of_params])
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    unread_result = False
+
+    def __init__(self, raw):
+        self._conn = raw
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self._conn.cursor(), dictionary=dictionary)
+
+    def start_transaction(self):
+        # Take the write lock up front, like a locking read would on MySQL
+        if not self._conn.in_transaction:
+            self._conn.execute('BEGIN IMMEDIATE')
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        self._conn.execute('SELECT 1')
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def consume_results(self):
+        pass
+
+    def close(self):
+        self._conn.close()
+
+
+def connect(path, busy_timeout=5.0):
+    raw = sqlite3.connect(
+        path,
+        timeout=busy_timeout,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        # Pooled connections are handed to whichever request thread borrows them
+        check_same_thread=False,
+    )
+    raw.execute('PRAGMA journal_mode = WAL')
+    raw.execute('PRAGMA synchronous = NORMAL')
+    raw.execute('PRAGMA foreign_keys = ON')
+    return SQLiteConnection(raw)
+
+
+def is_duplicate_key(error):
+    return (isinstance(error, sqlite3.IntegrityError)
+            and getattr(error, 'sqlite_errorcode', None) in (SQLITE_CONSTRAINT_UNIQUE, SQLITE_CONSTRAINT_PRIMARYKEY))
+
+
+def is_retryable(error):
+    code = getattr(error, 'sqlite_errorcode', None)
+    return isinstance(error, sqlite3.OperationalError) and code is not None and code & 0xff in (SQLITE_BUSY, SQLITE_LOCKED)
@@ -0,0 +1,97 @@
+from .db_connection import get_db_connection
+
+RESERVATION_STATUSES = ('pending', 'approved', 'rejected', 'cancelled')
+
+
+class Stats:
+    """Dashboard counters answered with COUNT/GROUP BY and LIMIT queries.
+
+    Not cached here: the dashboard keeps the rendered fragments, keyed by the
+    version stamps the write paths bump (see FragmentCache).
+    """
+
+    @staticmethod
+    def _status_counts(cursor, user_id=None):
+        counts = dict.fromkeys(RESERVATION_STATUSES, 0)
+        if user_id is None:
+            cursor.execute("SELECT status, COUNT(*) AS total FROM reservations GROUP BY status")
+        else:
+            cursor.execute(
+                "SELECT status, COUNT(*) AS total FROM reservations WHERE user_id = %s GROUP BY status",
+                (user_id,)
+            )
+        for row in cursor.fetchall():
+            counts[row['status']] = row['total']
+        return counts
+
+    @staticmethod
+    def get_status_counts(user_id=None):
+        return Stats._read(Stats._status_counts, user_id)
+
+    @staticmethod
+    def _totals(cursor):
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM users) AS total_users,
+                   (SELECT COUNT(*) FROM rooms) AS total_rooms,
+                   (SELECT COUNT(*) FROM timeslots) AS total_timeslots
+        """)
+        return cursor.fetchone()
+
+    @staticmethod
+    def _recent_reservations(cursor, limit):
+        cursor.execute("""
+            SELECT r.*, u.name as user_name, rm.room_name, t.slot_date, t.start_time, t.end_time
+            FROM reservations r
+            JOIN users u ON r.user_id = u.id
+            JOIN rooms rm ON r.room_id = rm.id
+            JOIN timeslots t ON r.slot_id = t.id
+            ORDER BY r.created_at DESC, r.id DESC
+            LIMIT %s
+        """, (limit,))
+        return cursor.fetchall()
+
+    @staticmethod
+    def _read(query, *args):
+        # One query on its own connection, so independent reads can run concurrently
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            return query(cursor, *args)
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def get_totals():
+        """Row counts of users, rooms and timeslots."""
+        return Stats._read(Stats._totals)
+
+    @staticmethod
+    def get_recent_reservations(limit=5):
+        return Stats._read(Stats._recent_reservations, limit)
+
+    @staticmethod
+    def combine_admin_stats(counts, totals, recent):
+        """The admin stats dict from the three parts (see get_admin_stats)."""
+        return {
+            'status_counts': counts,
+            'total_reservations': sum(counts.values()),
+            'total_users': totals['total_users'],
+            'total_rooms': totals['total_rooms'],
+            'total_timeslots': totals['total_timeslots'],
+            'recent_reservations': recent,
+        }
+
+    @staticmethod
+    def get_admin_stats(recent_limit=5):
+        """Admin counters, read on one connection (the dashboard caches the rendered fragment)."""
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            counts = Stats._status_counts(cursor)
+            totals = Stats._totals(cursor)
+            recent = Stats._recent_reservations(cursor, recent_limit)
+        finally:
+            cursor.close()
+            conn.close()
+        return Stats.combine_admin_stats(counts, totals, recent)
@@ -1,18 +1,22 @@
+from .cache import DataCache
 from .db_connection import get_db_connection
-from werkzeug.security import generate_password_hash, check_password_hash
+from .password_hasher import PasswordHasher
 
 class User:
     @staticmethod
     def create_user(name, email, password, role='student'):
+        # Hash before borrowing a connection so it isn't held during the hash
+        password_hash = PasswordHasher.hash(password)
         conn = get_db_connection()
         cursor = conn.cursor()
-        password_hash = generate_password_hash(password)
         try:
             cursor.execute(
                 "INSERT INTO users (name, email, password_hash, role) VALUES (%s, %s, %s, %s)",
                 (name, email, password_hash, role)
             )
+            DataCache.bump_version(cursor, 'users')
             conn.commit()
+            DataCache.invalidate('users')
             return True
         except Exception as e:
             print(f"Error creating user: {e}")
@@ -43,11 +47,33 @@ class User:
 
     @staticmethod
     def verify_password(stored_hash, password):
-        return check_password_hash(stored_hash, password)
+        return PasswordHasher.verify(stored_hash, password)
+
+    @staticmethod
+    def rehash_password_if_needed(user, password):
+        """Upgrade a hash made with an older method/cost after a successful login."""
+        if not PasswordHasher.needs_rehash(user['password_hash']):
+            return False
+
+        def store(new_hash):
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            try:
+                # Only replace the hash that was verified, not a concurrent password change
+                cursor.execute(
+                    "UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s",
+                    (new_hash, user['id'], user['password_hash'])
+                )
+                conn.commit()
+            finally:
+                cursor.close()
+                conn.close()
+
+        return PasswordHasher.rehash_in_background(store, password)
 
     @staticmethod
     def get_all_users():
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT id, name, email, role FROM users ORDER BY id")
         users = cursor.fetchall()
@@ -57,6 +83,7 @@ class User:
 
     @staticmethod
     def update_user(user_id, name=None, email=None, password=None, role=None):
+        password_hash = PasswordHasher.hash(password) if password is not None else None
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
@@ -72,7 +99,7 @@ class User:
                 params.append(email)
             if password is not None:
                 updates.append("password_hash = %s")
-                params.append(generate_password_hash(password))
+                params.append(password_hash)
             if role is not None:
                 updates.append("role = %s")
                 params.append(role)
@@ -83,7 +110,9 @@ class User:
             params.append(user_id)
             query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s"
             cursor.execute(query, params)
+            DataCache.bump_version(cursor, 'users')
             conn.commit()
+            DataCache.invalidate('users')
             return True
         except Exception as e:
             print(f"Error updating user: {e}")
@@ -98,7 +127,9 @@ class User:
         cursor = conn.cursor()
         try:
             cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+            DataCache.bump_version(cursor, 'users')
             conn.commit()
+            DataCache.invalidate('users')
             return True
         except Exception as e:
             print(f"Error deleting user: {e}")
@@ -0,0 +1,109 @@
+from datetime import datetime
+
+from .cache import DataCache
+from .db_connection import get_db_connection, is_duplicate_key
+
+
+class Versions:
+    """Version stamps that identify what a page was rendered from.
+
+    'rooms', 'timeslots' and 'users' live in data_versions (see DataCache).
+    Reservations are stamped per user in reservation_versions, bumped in the
+    same transaction as every reservation write, and by one shared
+    'reservations' row in data_versions, bumped right after the commit (see
+    bump_shared). 'reservations' (admin listings, availability) reads that
+    row, 'my_reservations' the current user's stamp.
+    """
+
+    @staticmethod
+    def bump_reservations(cursor, user_ids):
+        """Bump the reservation stamps of `user_ids` inside the caller's transaction."""
+        user_ids = sorted({int(u) for u in user_ids})
+        if not user_ids:
+            return
+        Versions._bump_users(cursor, user_ids)
+
+    @staticmethod
+    def bump_shared(conn, cursor):
+        """Bump the shared 'reservations' stamp after a committed reservation write.
+
+        Its own short transaction, so concurrent bookings don't queue on this
+        one row while holding their own locks. Best effort: if it fails, pages
+        of everyone's reservations revalidate as unchanged until the next write.
+        """
+        try:
+            DataCache.bump_version(cursor, 'reservations')
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Error bumping the reservations stamp: {e}")
+
+    @staticmethod
+    def _bump_users(cursor, user_ids):
+        # Sorted, so concurrent multi-user bumps take the row locks in the same order
+        cursor.executemany(
+            "UPDATE reservation_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP "
+            "WHERE user_id = %s",
+            [(u,) for u in user_ids]
+        )
+        if cursor.rowcount == len(user_ids):
+            return
+        cursor.execute(
+            f"SELECT user_id FROM reservation_versions "
+            f"WHERE user_id IN ({', '.join(['%s'] * len(user_ids))})",
+            user_ids
+        )
+        missing = set(user_ids) - {row[0] for row in cursor.fetchall()}
+        for user_id in sorted(missing):
+            try:
+                cursor.execute("INSERT INTO reservation_versions (user_id, version) VALUES (%s, 1)", (user_id,))
+            except Exception as e:
+                # Created by a concurrent writer in the meantime
+                if not is_duplicate_key(e):
+                    raise
+                cursor.execute(
+                    "UPDATE reservation_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP "
+                    "WHERE user_id = %s", (user_id,)
+                )
+
+    @staticmethod
+    def get_validators(namespaces, user_id=None):
+        """Return (version key, last modified) for the given namespaces.
+
+        The key changes whenever any of the stamps moves on; last modified is
+        the newest updated_at among them (None if unknown). Returns None when
+        the stamps can't be read. Read from the request's replica, like the
+        page itself, so the key is never newer than the rows it is sent with.
+        """
+        parts = []
+        stamps = []
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor()
+        try:
+            shared = [n for n in namespaces if n != 'my_reservations']
+            if shared:
+                cursor.execute(
+                    f"SELECT name, version, updated_at FROM data_versions "
+                    f"WHERE name IN ({', '.join(['%s'] * len(shared))})",
+                    shared
+                )
+                found = {name: (version, updated_at) for name, version, updated_at in cursor.fetchall()}
+                for name in shared:
+                    version, updated_at = found.get(name, (0, None))
+                    parts.append(f"{name}={version}")
+                    stamps.append(updated_at)
+            if 'my_reservations' in namespaces:
+                cursor.execute(
+                    "SELECT version, updated_at FROM reservation_versions WHERE user_id = %s", (user_id,))
+                row = cursor.fetchone()
+                parts.append(f"user:{user_id}={row[0] if row else 0}")
+                stamps.append(row[1] if row else None)
+        except Exception as e:
+            print(f"Error reading version stamps: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+        # SQLite may return timestamps as text
+        stamps = [datetime.fromisoformat(s) if isinstance(s, str) else s for s in stamps if s is not None]
+        return ';'.join(parts), max(stamps) if stamps else None
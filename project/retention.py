@@ -0,0 +1,60 @@
+"""Archive reservations of past slot dates (with their approvals).
+
+Usage:
+    python retention.py run [--before YYYY-MM-DD] [--batch-size N] [--pause SECONDS] [--max-batches N]
+    python retention.py status
+
+`run` continues an interrupted pass if there is one (Ctrl+C is safe: the
+current batch is rolled back and the next run resumes after the last
+committed one). The default cutoff is RETENTION_DAYS before today.
+"""
+import argparse
+import sys
+from datetime import date
+
+from models.retention_model import Retention
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='archive past reservations')
+    run.add_argument('--before', type=date.fromisoformat, default=None,
+                     help='archive slots before this date (new passes only)')
+    run.add_argument('--batch-size', type=int, default=None)
+    run.add_argument('--pause', type=float, default=None, help='seconds between batches')
+    run.add_argument('--max-batches', type=int, default=None)
+    commands.add_parser('status', help='show the progress of the current or last pass')
+    return parser.parse_args(argv)
+
+
+def report(progress):
+    print(f"  batch {progress['batches']}: up to #{progress['cursor_id']}, "
+          f"{progress['archived']} archived (slots before {progress['cutoff']})")
+
+
+def main(argv):
+    args = parse_args(argv)
+    if args.command == 'status':
+        progress = Retention.get_progress()
+        if progress is None:
+            return 1
+        for key, value in progress.items():
+            print(f"{key:15} {value}")
+        return 0
+    try:
+        progress = Retention.run(cutoff=args.before, batch_size=args.batch_size, pause=args.pause,
+                                 max_batches=args.max_batches, report=report)
+    except KeyboardInterrupt:
+        print("Interrupted; run again to resume.")
+        return 1
+    if progress is None:
+        print("Another process is archiving right now.")
+        return 1
+    state = 'finished' if progress['finished'] else 'paused, run again to resume'
+    print(f"{progress['archived']} reservations archived, {state}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
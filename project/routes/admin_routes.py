@@ -1,7 +1,24 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+import csv
+import hmac
+import io
+import json
+from datetime import date, timedelta
+from flask import (Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, Response,
+                   stream_with_context)
 from models.room_model import Room, Timeslot
 from models.reservation_model import Reservation
 from models.user_model import User
+from models.db_connection import format_time, get_pool_stats
+from models.cache import DataCache
+from models.fragment_cache import FragmentCache
+from models.booking_admission import BookingAdmission
+from models.password_hasher import PasswordHasher
+from models.rate_limiter import RateLimiter
+from models.metrics import Metrics
+from models.bulk_import import BulkImport
+from models.retention_model import Retention
+from routes.reservation_routes import listing_filters, conditional_view
+from config import Config
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -16,9 +33,17 @@ def admin_required(func):
 
 @admin_bp.route('/approvals')
 @admin_required
+@conditional_view('rooms', 'timeslots', 'users', 'reservations')
 def approvals():
-    reservations = Reservation.get_all_reservations()
-    return render_template('admin_approvals.html', reservations=reservations)
+    filters = listing_filters(request.args)
+    reservations, next_cursor = Reservation.list_reservations(
+        after=request.args.get('after'),
+        limit=Config.RESERVATIONS_PAGE_SIZE,
+        **filters
+    )
+    return render_template('admin_approvals.html', reservations=reservations,
+                           filters=filters, next_cursor=next_cursor,
+                           rooms=Room.get_all_rooms())
 
 @admin_bp.route('/approve/<int:res_id>', methods=['POST'])
 @admin_required
@@ -36,6 +61,88 @@ def approve_reservation(res_id):
         
     return redirect(url_for('admin.approvals'))
 
+@admin_bp.route('/approvals/bulk', methods=['POST'])
+@admin_required
+def bulk_approve():
+    """Decide many reservations at once.
+
+    Form posts send res_ids (checked rows), action and notes. JSON posts send
+    {"decisions": [{"id": 12, "action": "approve", "notes": ""}, ...]}.
+    """
+    admin_id = session['user_id']
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        try:
+            decisions = [
+                (int(d['id']), 'approved' if d.get('action') == 'approve' else 'rejected', d.get('notes', ''))
+                for d in data.get('decisions', [])
+            ]
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': 'Invalid decisions.'}), 400
+        result = Reservation.bulk_update_status(decisions, admin_id)
+        if result is None:
+            return jsonify({'error': 'Error updating reservations.'}), 500
+        return jsonify(result)
+
+    status = 'approved' if request.form.get('action') == 'approve' else 'rejected'
+    notes = request.form.get('notes', '')
+    decisions = [(res_id, status, notes) for res_id in request.form.getlist('res_ids', type=int)]
+    if not decisions:
+        flash('Select at least one reservation.', 'warning')
+        return redirect(url_for('admin.approvals'))
+
+    result = Reservation.bulk_update_status(decisions, admin_id)
+    if result is None:
+        flash('Error updating reservations.', 'danger')
+    else:
+        message = f"{result['approved']} approved, {result['rejected']} rejected"
+        if result['skipped']:
+            message += f", {len(result['skipped'])} skipped (no longer pending)"
+        flash(message + '.', 'success')
+    return redirect(url_for('admin.approvals'))
+
+def export_value(value):
+    # TIME columns arrive as timedelta; print them like MySQL does (HH:MM:SS)
+    if isinstance(value, timedelta):
+        return format_time(value)
+    if isinstance(value, date):
+        return value.isoformat(sep=' ') if hasattr(value, 'hour') else value.isoformat()
+    return value
+
+@admin_bp.route('/export')
+@admin_required
+def export_reservations():
+    # Streams one fetchmany() batch at a time, so memory stays flat for any export size
+    fmt = 'ndjson' if request.args.get('format') == 'ndjson' else 'csv'
+    batches = Reservation.iter_export(batch_size=Config.EXPORT_BATCH_SIZE, **listing_filters(request.args))
+    columns = Reservation.EXPORT_COLUMNS
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        for rows in batches:
+            buffer.seek(0)
+            buffer.truncate(0)
+            writer.writerows([export_value(row[c]) for c in columns] for row in rows)
+            yield buffer.getvalue()
+
+    def generate_ndjson():
+        for rows in batches:
+            yield ''.join(json.dumps({c: export_value(row[c]) for c in columns}) + '\n' for row in rows)
+
+    generate = generate_csv if fmt == 'csv' else generate_ndjson
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+        headers={
+            'Content-Disposition': f'attachment; filename=reservations-{date.today().isoformat()}.{fmt}',
+            # Don't let a reverse proxy buffer the whole stream
+            'X-Accel-Buffering': 'no',
+        },
+    )
+
 @admin_bp.route('/clear_reservations', methods=['GET', 'POST'])
 @admin_required
 def clear_reservations():
@@ -50,6 +157,12 @@ def clear_reservations():
             count = Reservation.clear_by_status('rejected')
             flash(f'{count} rejected reservations cleared successfully!', 'success')
         
+        elif action == 'archive_past':
+            if Retention.start():
+                flash('Archiving past reservations in the background.', 'success')
+            else:
+                flash('Archiving is already running.', 'info')
+
         elif action == 'clear_all':
             if Reservation.clear_all_reservations():
                 flash('All reservations cleared successfully!', 'success')
@@ -58,10 +171,12 @@ def clear_reservations():
         
         return redirect(url_for('admin.clear_reservations'))
     
-    return render_template('admin_clear_reservations.html')
+    return render_template('admin_clear_reservations.html', retention=Retention.get_progress(),
+                           retention_days=Config.RETENTION_DAYS)
 
 @admin_bp.route('/rooms', methods=['GET', 'POST'])
 @admin_required
+@conditional_view('rooms')
 def manage_rooms():
     if request.method == 'POST':
         if 'delete' in request.form:
@@ -96,6 +211,7 @@ def edit_room(room_id):
 
 @admin_bp.route('/timeslots', methods=['GET', 'POST'])
 @admin_required
+@conditional_view('timeslots')
 def manage_timeslots():
     if request.method == 'POST':
         if 'delete' in request.form:
@@ -127,8 +243,49 @@ def edit_timeslot(slot_id):
         return redirect(url_for('admin.manage_timeslots'))
     return render_template('admin_edit_timeslot.html', timeslot=timeslot)
 
+def flash_import_result(result, entity):
+    for error in result['errors']:
+        flash(error, 'danger')
+    if result['inserted'] or not result['errors']:
+        flash(f"{result['inserted']} {entity} imported, {result['skipped']} skipped.", 'success')
+
+@admin_bp.route('/import', methods=['GET', 'POST'])
+@admin_required
+def bulk_import():
+    if request.method == 'POST':
+        if request.form.get('action') == 'generate':
+            try:
+                result = BulkImport.generate_timeslots(
+                    date.fromisoformat(request.form['date_from']),
+                    date.fromisoformat(request.form['date_to']),
+                    request.form.getlist('weekdays', type=int),
+                    request.form['day_start'],
+                    request.form['day_end'],
+                    int(request.form['slot_minutes']),
+                    int(request.form.get('break_minutes') or 0),
+                )
+            except (KeyError, ValueError):
+                flash('Please give a valid date range, times and slot length.', 'danger')
+            else:
+                flash_import_result(result, 'timeslots')
+        else:
+            entity = request.form.get('entity')
+            upload = request.files.get('file')
+            if entity not in BulkImport.COLUMNS or not upload or not upload.filename:
+                flash('Choose what to import and a CSV file.', 'warning')
+            else:
+                try:
+                    text = upload.read().decode('utf-8-sig')
+                except UnicodeDecodeError:
+                    flash('The file is not UTF-8 encoded CSV.', 'danger')
+                else:
+                    flash_import_result(BulkImport.import_csv(entity, text), entity)
+        return redirect(url_for('admin.bulk_import'))
+    return render_template('admin_import.html', columns=BulkImport.COLUMNS)
+
 @admin_bp.route('/users')
 @admin_required
+@conditional_view('users')
 def manage_users():
     users = User.get_all_users()
     return render_template('admin_users.html', users=users)
@@ -185,3 +342,67 @@ def delete_user(user_id):
         flash('Error deleting user.', 'danger')
     
     return redirect(url_for('admin.manage_users'))
+
+@admin_bp.route('/pool_stats')
+@admin_required
+def pool_stats():
+    # Connection pool counters for this worker process
+    return jsonify(get_pool_stats())
+
+@admin_bp.route('/cache_stats')
+@admin_required
+def cache_stats():
+    # Room/timeslot cache hit, miss and invalidation counters for this worker
+    return jsonify(DataCache.get_stats())
+
+@admin_bp.route('/fragment_stats')
+@admin_required
+def fragment_stats():
+    # Rendered-fragment cache counters (hits, misses, evictions, size) for this worker
+    return jsonify(FragmentCache.get_stats())
+
+@admin_bp.route('/admission_stats')
+@admin_required
+def admission_stats():
+    # Booking admission counters (admitted vs. answered without the DB) for this worker
+    return jsonify(BookingAdmission.get_stats())
+
+@admin_bp.route('/rate_limit_stats')
+@admin_required
+def rate_limit_stats():
+    # Requests admitted and shed (over rate / at capacity) per endpoint group, for this worker
+    return jsonify(RateLimiter.get_stats())
+
+@admin_bp.route('/retention_stats')
+@admin_required
+def retention_stats():
+    # Progress of the current or last archiving pass
+    progress = Retention.get_progress()
+    if progress is None:
+        return jsonify({'error': 'Could not read retention progress.'}), 500
+    return jsonify({k: v.isoformat() if hasattr(v, 'isoformat') else v for k, v in progress.items()})
+
+@admin_bp.route('/hash_stats')
+@admin_required
+def hash_stats():
+    # Password hashing pool counters (hashes, rehashes, rejections) for this worker
+    return jsonify(PasswordHasher.get_stats())
+
+@admin_bp.route('/metrics')
+def metrics():
+    # Admins, or a scraper presenting METRICS_TOKEN as a bearer token
+    token = request.headers.get('Authorization', '')
+    scraper = bool(Config.METRICS_TOKEN) and hmac.compare_digest(
+        token.encode(), f"Bearer {Config.METRICS_TOKEN}".encode())
+    if not scraper and ('user_id' not in session or session.get('role') != 'admin'):
+        flash('Admin access required.', 'danger')
+        return redirect(url_for('reservation.dashboard'))
+    text = Metrics.render([
+        ('db_pool', get_pool_stats()),
+        ('data_cache', DataCache.get_stats()),
+        ('fragment_cache', FragmentCache.get_stats()),
+        ('booking_admission', BookingAdmission.get_stats()),
+        ('password_hash', PasswordHasher.get_stats()),
+        ('rate_limit', RateLimiter.get_stats()),
+    ])
+    return Response(text, mimetype='text/plain; version=0.0.4')
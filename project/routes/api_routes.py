@@ -0,0 +1,161 @@
+from datetime import date, datetime, timedelta
+from flask import Blueprint, request, session, jsonify
+from config import Config
+from models.availability_model import Availability
+from models.db_connection import format_time
+from models.reservation_model import Reservation
+from models.room_model import Room, Timeslot
+
+api_bp = Blueprint('api', __name__, url_prefix='/api')
+
+def api_login_required(func):
+    def wrapper(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({'error': 'Login required.'}), 401
+        return func(*args, **kwargs)
+    wrapper.__name__ = func.__name__
+    return wrapper
+
+def date_range_from_args(args):
+    """Parse ?from=&to= (YYYY-MM-DD), defaulting to the next AVAILABILITY_DAYS
+    days and clamped to AVAILABILITY_MAX_DAYS so one request stays cheap."""
+    def parse(value, default):
+        try:
+            return date.fromisoformat(value) if value else default
+        except ValueError:
+            return default
+
+    date_from = parse(args.get('from'), date.today())
+    date_to = parse(args.get('to'), date_from + timedelta(days=Config.AVAILABILITY_DAYS - 1))
+    if date_to < date_from:
+        date_to = date_from
+    date_to = min(date_to, date_from + timedelta(days=Config.AVAILABILITY_MAX_DAYS - 1))
+    return date_from, date_to
+
+def parse_time(value):
+    """'9:00' / '09:00:00' -> '09:00:00'; raises ValueError otherwise."""
+    for fmt in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(value, fmt).strftime('%H:%M:%S')
+        except (TypeError, ValueError):
+            pass
+    raise ValueError(f"Invalid time: {value!r}")
+
+def recurring_slot_ids(rule):
+    """Resolve a recurrence rule {from, to, weekdays, start_time, end_time} to
+    timeslot ids, with the range clamped to AVAILABILITY_MAX_DAYS. Raises
+    ValueError for malformed rules."""
+    date_from = date.fromisoformat(rule['from'])
+    date_to = date.fromisoformat(rule['to'])
+    weekdays = [int(d) for d in rule['weekdays']]
+    if date_to < date_from or not weekdays or any(d < 0 or d > 6 for d in weekdays):
+        raise ValueError("Invalid recurrence range or weekdays")
+    date_to = min(date_to, date_from + timedelta(days=Config.AVAILABILITY_MAX_DAYS - 1))
+    return Timeslot.find_recurring(date_from, date_to, weekdays,
+                                   parse_time(rule['start_time']), parse_time(rule['end_time']))
+
+def check_batch_size(slot_ids):
+    """Unique `slot_ids`, in order; raises ValueError above BATCH_MAX_SLOTS, so
+    one batch can't hold the room lock (or a huge IN list) for long."""
+    slot_ids = list(dict.fromkeys(slot_ids))
+    if len(slot_ids) > Config.BATCH_MAX_SLOTS:
+        raise ValueError(f"Give at most {Config.BATCH_MAX_SLOTS} timeslots per batch")
+    return slot_ids
+
+def role_max_capacity(role=None):
+    # Students may only book rooms with capacity <= 10 (session role unless given)
+    return 10 if (role or session.get('role')) == 'student' else None
+
+ROOM_SEARCH_ARGS = ('min_capacity', 'type', 'location', 'date', 'start', 'end', 'slot_id')
+
+def room_search_from_args(args, role=None):
+    """Room.search() arguments from ?min_capacity=&type=&location= plus either
+    ?date=&start=[&end=] (end defaults to an hour after start) or ?slot_id=,
+    with the role's capacity limit applied. Raises ValueError for bad values."""
+    criteria = {
+        'min_capacity': args.get('min_capacity', type=int),
+        'max_capacity': role_max_capacity(role),
+        'room_type': args.get('type') or None,
+        'location': (args.get('location') or '').strip() or None,
+        'limit': max(1, min(args.get('limit', Config.ROOM_SEARCH_LIMIT, type=int), Config.ROOM_SEARCH_MAX_LIMIT)),
+    }
+    if args.get('slot_id'):
+        slot = Timeslot.get_timeslot_by_id(args.get('slot_id', type=int) or 0)
+        if not slot:
+            raise ValueError("Timeslot not found")
+        criteria.update(free_on=slot['slot_date'], free_from=format_time(slot['start_time']),
+                        free_to=format_time(slot['end_time']))
+    elif args.get('date'):
+        start = parse_time(args.get('start'))
+        if args.get('end'):
+            end = parse_time(args['end'])
+        else:
+            end = min(datetime.strptime(start, '%H:%M:%S') + timedelta(hours=1),
+                      datetime.strptime('23:59:59', '%H:%M:%S')).strftime('%H:%M:%S')
+        if end <= start:
+            raise ValueError("End time must be after start time")
+        criteria.update(free_on=date.fromisoformat(args['date']), free_from=start, free_to=end)
+    return criteria
+
+@api_bp.route('/rooms/search')
+@api_login_required
+def room_search():
+    """Rooms matching capacity/type/location that are free at the given time,
+    smallest fitting room first."""
+    try:
+        criteria = room_search_from_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid request: {e}'}), 400
+    rooms = Room.search(**criteria)
+    payload = {'rooms': rooms, 'count': len(rooms)}
+    if 'free_on' in criteria:
+        payload['free'] = {'date': criteria['free_on'].isoformat(),
+                           'start': criteria['free_from'], 'end': criteria['free_to']}
+    return jsonify(payload)
+
+@api_bp.route('/availability')
+@api_login_required
+def availability():
+    date_from, date_to = date_range_from_args(request.args)
+    matrix = Availability.get_matrix(date_from, date_to,
+                                     min_capacity=request.args.get('min_capacity', type=int),
+                                     max_capacity=role_max_capacity())
+    payload = Availability.to_json(matrix)
+    payload.update({'from': date_from.isoformat(), 'to': date_to.isoformat()})
+    return jsonify(payload)
+
+def book_batch(user_id, role, data):
+    """Book several slots of one room: {"room_id", "purpose", "mode": "all"|"best_effort",
+    and either "slot_ids": [...] or "recurrence": {from, to, weekdays, start_time, end_time}}.
+    Returns (payload, status code)."""
+    try:
+        room_id = int(data['room_id'])
+        purpose = str(data.get('purpose', ''))
+        if 'recurrence' in data:
+            slot_ids = recurring_slot_ids(data['recurrence'])
+        else:
+            slot_ids = [int(s) for s in data['slot_ids']]
+        slot_ids = check_batch_size(slot_ids)
+    except (KeyError, TypeError, ValueError) as e:
+        return {'error': f'Invalid request: {e}'}, 400
+
+    room = Room.get_room_by_id(room_id)
+    if not room:
+        return {'error': 'Room not found.'}, 404
+    max_capacity = role_max_capacity(role)
+    if max_capacity is not None and room['capacity'] > max_capacity:
+        return {'error': 'Students cannot book rooms with capacity greater than 10.'}, 403
+    if not slot_ids:
+        return {'error': 'No matching timeslots.'}, 400
+
+    booked, results = Reservation.create_batch_reservations(
+        user_id, room_id, slot_ids, purpose,
+        all_or_nothing=data.get('mode', 'all') != 'best_effort'
+    )
+    return {'booked': booked, 'results': results}, 201 if booked else 409
+
+@api_bp.route('/bookings/batch', methods=['POST'])
+@api_login_required
+def batch_booking():
+    payload, status = book_batch(session['user_id'], session.get('role'), request.get_json(silent=True) or {})
+    return jsonify(payload), status
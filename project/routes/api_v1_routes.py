@@ -0,0 +1,218 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from flask import Blueprint, Response, g, request
+from config import Config
+from models.api_token_model import ApiToken
+from models.availability_model import Availability
+from models.booking_admission import BookingAdmission
+from models.db_connection import format_time
+from models.reservation_model import Reservation
+from models.room_model import Room, Timeslot
+from models.user_model import User
+from routes.api_routes import (date_range_from_args, role_max_capacity, room_search_from_args,
+                               book_batch, ROOM_SEARCH_ARGS)
+from routes.reservation_routes import listing_filters
+
+try:
+    import orjson
+except ImportError:
+    # Optional speed-up; the standard library encoder is used without it
+    orjson = None
+
+api_v1_bp = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+ROOM_FIELDS = ('id', 'room_name', 'capacity', 'room_type', 'location')
+TIMESLOT_FIELDS = ('id', 'slot_date', 'start_time', 'end_time')
+RESERVATION_FIELDS = ('id', 'room_id', 'room_name', 'slot_id', 'slot_date', 'start_time', 'end_time',
+                      'purpose', 'status', 'created_at')
+
+def _default(value):
+    # TIME columns arrive as timedelta; dates and datetimes go out as ISO 8601
+    if isinstance(value, timedelta):
+        return format_time(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(',', ':'))
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+def error(message, status):
+    return json_response({'error': message}, status)
+
+def token_required(func):
+    """Authenticate `Authorization: Bearer <token>`; the user goes to g.api_user."""
+    def wrapper(*args, **kwargs):
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        user = ApiToken.authenticate(token.strip()) if scheme.lower() == 'bearer' else None
+        if user is None:
+            response = error('Valid API token required.', 401)
+            response.headers['WWW-Authenticate'] = 'Bearer'
+            return response
+        g.api_user = user
+        return func(*args, **kwargs)
+    wrapper.__name__ = func.__name__
+    return wrapper
+
+def selected_fields(allowed):
+    """?fields=a,b -> ('a', 'b'); every allowed field by default. Raises ValueError."""
+    value = request.args.get('fields')
+    if not value:
+        return allowed
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown or not fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def requested_ids():
+    """?ids=1,2,3 -> [1, 2, 3], or None without ?ids. Raises ValueError."""
+    value = request.args.get('ids')
+    if value is None:
+        return None
+    ids = list(dict.fromkeys(int(i) for i in value.split(',') if i.strip()))
+    if not ids or len(ids) > Config.API_MAX_BATCH_IDS:
+        raise ValueError(f"Give between 1 and {Config.API_MAX_BATCH_IDS} ids")
+    return ids
+
+def project(rows, fields):
+    return [{f: row[f] for f in fields} for row in rows]
+
+def listing(rows, fields, ids=None, **extra):
+    """{'data': rows reduced to `fields`}; batch gets also list the ids not found."""
+    payload = {'data': project(rows, fields)}
+    if ids is not None:
+        found = {row['id'] for row in rows}
+        payload['missing'] = [i for i in ids if i not in found]
+    payload.update(extra)
+    return json_response(payload)
+
+@api_v1_bp.route('/tokens', methods=['POST'])
+def create_token():
+    """Exchange {"email", "password", "name"} for a bearer token."""
+    data = request.get_json(silent=True) or {}
+    user = User.get_user_by_email(str(data.get('email', '')))
+    if not user or not User.verify_password(user['password_hash'], str(data.get('password', ''))):
+        return error('Invalid email or password.', 401)
+    token = ApiToken.create(user['id'], str(data.get('name') or 'API client')[:100])
+    if token is None:
+        return error('Could not create a token.', 500)
+    return json_response({'token': token, 'user': {'id': user['id'], 'name': user['name'], 'role': user['role']}},
+                         201)
+
+@api_v1_bp.route('/tokens/current', methods=['DELETE'])
+@token_required
+def revoke_token():
+    ApiToken.revoke(g.api_user['token_id'])
+    return Response(status=204)
+
+@api_v1_bp.route('/me')
+@token_required
+def me():
+    return json_response({key: g.api_user[key] for key in ('id', 'name', 'role')})
+
+@api_v1_bp.route('/rooms')
+@token_required
+def rooms():
+    """All rooms, ?ids=, or a room search (see /api/rooms/search) when its arguments are given."""
+    try:
+        fields = selected_fields(ROOM_FIELDS)
+        ids = requested_ids()
+        if ids is not None:
+            return listing(Room.get_rooms_by_ids(ids), fields, ids)
+        if any(request.args.get(arg) for arg in ROOM_SEARCH_ARGS):
+            return listing(Room.search(**room_search_from_args(request.args, g.api_user['role'])), fields)
+    except ValueError as e:
+        return error(f'Invalid request: {e}', 400)
+    return listing(sorted(Room.get_all_rooms(), key=lambda r: r['id']), fields)
+
+@api_v1_bp.route('/rooms/<int:room_id>')
+@token_required
+def room(room_id):
+    try:
+        fields = selected_fields(ROOM_FIELDS)
+    except ValueError as e:
+        return error(f'Invalid request: {e}', 400)
+    found = Room.get_room_by_id(room_id)
+    if not found:
+        return error('Room not found.', 404)
+    return json_response(project([found], fields)[0])
+
+@api_v1_bp.route('/timeslots')
+@token_required
+def timeslots():
+    """?ids=, or the timeslots between ?from= and ?to= (same defaults as /availability)."""
+    try:
+        fields = selected_fields(TIMESLOT_FIELDS)
+        ids = requested_ids()
+    except ValueError as e:
+        return error(f'Invalid request: {e}', 400)
+    if ids is not None:
+        return listing(Timeslot.get_timeslots_by_ids(ids), fields, ids)
+    date_from, date_to = date_range_from_args(request.args)
+    return listing(Availability.get_slots_in_range(date_from, date_to), fields,
+                   **{'from': date_from, 'to': date_to})
+
+@api_v1_bp.route('/availability')
+@token_required
+def availability():
+    date_from, date_to = date_range_from_args(request.args)
+    matrix = Availability.get_matrix(date_from, date_to,
+                                     min_capacity=request.args.get('min_capacity', type=int),
+                                     max_capacity=role_max_capacity(g.api_user['role']))
+    payload = Availability.to_json(matrix)
+    payload.update({'from': date_from, 'to': date_to})
+    return json_response(payload)
+
+@api_v1_bp.route('/reservations')
+@token_required
+def reservations():
+    """The caller's reservations: ?ids=, or newest first with the my reservations
+    filters (status, room_id, date_from, date_to) and ?after= for the next page."""
+    user_id = g.api_user['id']
+    try:
+        fields = selected_fields(RESERVATION_FIELDS)
+        ids = requested_ids()
+    except ValueError as e:
+        return error(f'Invalid request: {e}', 400)
+    if ids is not None:
+        by_id = {r['id']: r for r in Reservation.get_user_reservations_by_ids(user_id, ids)}
+        return listing([by_id[i] for i in ids if i in by_id], fields, ids)
+    limit = max(1, min(request.args.get('limit', Config.RESERVATIONS_PAGE_SIZE, type=int),
+                       Config.RESERVATIONS_PAGE_SIZE))
+    rows, next_cursor = Reservation.list_reservations(user_id=user_id, after=request.args.get('after'),
+                                                      limit=limit, **listing_filters(request.args))
+    return listing(rows, fields, next=next_cursor)
+
+@api_v1_bp.route('/bookings', methods=['POST'])
+@token_required
+def bookings():
+    """{"room_id", "slot_id", "purpose"} books one slot; with "slot_ids" or
+    "recurrence" instead of "slot_id" it works like /api/bookings/batch,
+    up to BATCH_MAX_SLOTS timeslots."""
+    data = request.get_json(silent=True) or {}
+    user = g.api_user
+    if 'slot_id' not in data:
+        payload, status = book_batch(user['id'], user['role'], data)
+        return json_response(payload, status)
+    try:
+        room_id, slot_id = int(data['room_id']), int(data['slot_id'])
+        purpose = str(data.get('purpose', ''))
+    except (KeyError, TypeError, ValueError) as e:
+        return error(f'Invalid request: {e}', 400)
+    room = Room.get_room_by_id(room_id)
+    if not room or not Timeslot.get_timeslot_by_id(slot_id):
+        return error('Room or timeslot not found.', 404)
+    max_capacity = role_max_capacity(user['role'])
+    if max_capacity is not None and room['capacity'] > max_capacity:
+        return error('Students cannot book rooms with capacity greater than 10.', 403)
+    success, message = BookingAdmission.reserve(user['id'], room_id, slot_id, purpose)
+    return json_response({'booked': success, 'message': message}, 201 if success else 409)
@@ -12,6 +12,7 @@ def login():
         user = User.get_user_by_email(email)
         
         if user and User.verify_password(user['password_hash'], password):
+            User.rehash_password_if_needed(user, password)
             session['user_id'] = user['id']
             session['user_name'] = user['name']
             session['role'] = user['role']
@@ -1,6 +1,20 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+import hashlib
+from datetime import date, datetime, timezone
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, make_response
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
+from config import Config
 from models.room_model import Room, Timeslot
 from models.reservation_model import Reservation
+from models.stats_model import Stats
+from models.availability_model import Availability
+from models.booking_admission import BookingAdmission
+from models.db_connection import format_time
+from models.fragment_cache import FragmentCache
+from models.parallel_reads import ParallelReads
+from models.version_model import Versions
+from routes.api_routes import (check_batch_size, date_range_from_args, role_max_capacity, recurring_slot_ids,
+                               room_search_from_args, ROOM_SEARCH_ARGS)
 
 reservation_bp = Blueprint('reservation', __name__)
 
@@ -13,85 +27,149 @@ def login_required(func):
     wrapper.__name__ = func.__name__
     return wrapper
 
+def conditional_view(*namespaces):
+    """Answer GETs with 304 when none of the version stamps behind the page moved.
+
+    The ETag covers the stamps of `namespaces` (see Versions), the URL with
+    its query string, the session's user and today's date (default date
+    ranges). It is checked before the view runs, so an unchanged page costs
+    one stamp lookup instead of the model queries and template rendering.
+    Pages showing flashed messages are never cached.
+    """
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or not Config.CONDITIONAL_RESPONSES or '_flashes' in session:
+                return func(*args, **kwargs)
+            validators = Versions.get_validators(namespaces, session.get('user_id'))
+            if validators is None:
+                return func(*args, **kwargs)
+            version_key, last_modified = validators
+            etag = hashlib.sha1('|'.join([
+                request.full_path, str(session.get('user_id')), str(session.get('role')),
+                str(session.get('user_name')), date.today().isoformat(), version_key,
+            ]).encode()).hexdigest()[:24]
+            if last_modified is not None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(func(*args, **kwargs))
+                if response.status_code != 200 or '_flashes' in session:
+                    return response
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Per-user pages: browsers may keep them but must revalidate, and a
+            # different session cookie (another login) never reuses the copy
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response
+        wrapper.__name__ = func.__name__
+        return wrapper
+    return decorator
+
+def cached_fragment(template, namespaces, load, *key_parts, user_id=None):
+    """Render `template` with the context returned by load(), through FragmentCache.
+
+    The key is the template, `key_parts` (whatever else the fragment shows,
+    e.g. role) and the version stamps of `namespaces`, read before load()
+    runs, so a cached fragment is never older than its key. A hit skips
+    both load() and Jinja.
+    """
+    def render():
+        return Markup(render_template(template, **load()))
+
+    validators = Versions.get_validators(namespaces, user_id)
+    if validators is None:
+        return render()
+    return FragmentCache.get_or_render((template, validators[0]) + key_parts, render)
+
+def listing_filters(args):
+    """Read status/room/date filters for the reservation listings from query args."""
+    def valid_date(value):
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+            return value
+        except (TypeError, ValueError):
+            return None
+
+    status = args.get('status')
+    filters = {
+        'status': status if status in ('pending', 'approved', 'rejected', 'cancelled') else None,
+        'room_id': args.get('room_id', type=int),
+        'date_from': valid_date(args.get('date_from')),
+        'date_to': valid_date(args.get('date_to')),
+    }
+    # Only the filters actually set, so they can be passed straight to url_for
+    return {key: value for key, value in filters.items() if value}
+
 @reservation_bp.route('/dashboard')
 @login_required
 def dashboard():
     user_id = session['user_id']
     user_role = session.get('role')
     
-    # Admin Dashboard
+    # Admin Dashboard: one fragment shared by all admins
     if user_role == 'admin':
-        from models.user_model import User
-        
-        # Get all reservations
-        all_reservations = Reservation.get_all_reservations()
-        
-        # Count reservations by status
-        pending_approvals = sum(1 for r in all_reservations if r['status'] == 'pending')
-        approved_count = sum(1 for r in all_reservations if r['status'] == 'approved')
-        rejected_count = sum(1 for r in all_reservations if r['status'] == 'rejected')
-        
-        # Get total counts
-        all_users = User.get_all_users()
-        total_users = len(all_users)
-        
-        all_rooms = Room.get_all_rooms()
-        total_rooms = len(all_rooms)
-        
-        all_timeslots = Timeslot.get_all_timeslots()
-        total_timeslots = len(all_timeslots)
-        
-        # Get recent reservations (last 5)
-        recent_reservations = all_reservations[:5]
-        
-        return render_template('dashboard.html',
-                             is_admin=True,
-                             pending_approvals=pending_approvals,
-                             approved_count=approved_count,
-                             rejected_count=rejected_count,
-                             total_users=total_users,
-                             total_rooms=total_rooms,
-                             total_timeslots=total_timeslots,
-                             recent_reservations=recent_reservations)
+        def admin_context(stats):
+            counts = stats['status_counts']
+            return {
+                'pending_approvals': counts['pending'],
+                'approved_count': counts['approved'],
+                'rejected_count': counts['rejected'],
+                'total_users': stats['total_users'],
+                'total_rooms': stats['total_rooms'],
+                'total_timeslots': stats['total_timeslots'],
+                'recent_reservations': stats['recent_reservations'],
+            }
+
+        async def load_stats():
+            # The three queries are independent: run them at the same time
+            counts, totals, recent = await ParallelReads.gather(
+                Stats.get_status_counts, Stats.get_totals, lambda: Stats.get_recent_reservations(5))
+            return Stats.combine_admin_stats(counts, totals, recent)
+
+        if Config.ASYNC_VIEWS:
+            load = lambda: admin_context(ParallelReads.run(load_stats))
+        else:
+            load = lambda: admin_context(Stats.get_admin_stats(recent_limit=5))
+        admin_panel = cached_fragment('_dashboard_admin.html', ('rooms', 'timeslots', 'users', 'reservations'),
+                                      load)
+        return render_template('dashboard.html', is_admin=True, admin_panel=admin_panel)
     
-    # Student/Faculty Dashboard
+    # Student/Faculty Dashboard: the user's counters, and a room preview shared per role
     else:
-        # Get user's reservations
-        user_reservations = Reservation.get_reservations_by_user(user_id)
-        
-        # Count pending and approved reservations for this user
-        pending_count = sum(1 for r in user_reservations if r['status'] == 'pending')
-        approved_count = sum(1 for r in user_reservations if r['status'] == 'approved')
-        
-        # Get all rooms
-        all_rooms = Room.get_all_rooms()
-        
-        # Filter rooms for students (capacity <= 10)
-        if user_role == 'student':
-            available_rooms = [r for r in all_rooms if r['capacity'] <= 10]
-        else:
-            available_rooms = all_rooms
-        
-        available_rooms_count = len(available_rooms)
-        
-        # Get sample rooms for preview (first 3)
-        sample_rooms = available_rooms[:3] if len(available_rooms) >= 3 else available_rooms
-        
-        return render_template('dashboard.html',
-                             is_admin=False,
-                             pending_count=pending_count,
-                             approved_count=approved_count,
-                             available_rooms_count=available_rooms_count,
-                             sample_rooms=sample_rooms)
+        # Students only see rooms with capacity <= 10
+        max_capacity = 10 if user_role == 'student' else None
+
+        def stats_context():
+            counts = Stats.get_status_counts(user_id)
+            return {
+                'pending_count': counts['pending'],
+                'approved_count': counts['approved'],
+                'available_rooms_count': Room.get_preview(max_capacity)[0],
+            }
+
+        user_stats = cached_fragment('_dashboard_user_stats.html', ('rooms', 'my_reservations'), stats_context,
+                                     user_role, session.get('user_name'), user_id=user_id)
+        room_preview = cached_fragment('_dashboard_rooms.html', ('rooms',),
+                                       lambda: {'sample_rooms': Room.get_preview(max_capacity, sample_size=3)[1]},
+                                       user_role)
+        return render_template('dashboard.html', is_admin=False, user_stats=user_stats, room_preview=room_preview)
 
 @reservation_bp.route('/rooms')
 @login_required
+@conditional_view('rooms')
 def rooms():
-    all_rooms = Room.get_all_rooms()
-    return render_template('rooms.html', rooms=all_rooms)
+    room_list = cached_fragment('_rooms_list.html', ('rooms',), lambda: {'rooms': Room.get_all_rooms()},
+                                session.get('role'))
+    return render_template('rooms.html', room_list=room_list)
 
 @reservation_bp.route('/reserve', methods=['GET', 'POST'])
 @login_required
+@conditional_view('rooms', 'timeslots', 'reservations')
 def reserve():
     if request.method == 'POST':
         room_id = request.form['room_id']
@@ -104,24 +182,105 @@ def reserve():
             flash('Students cannot book rooms with capacity greater than 10.', 'danger')
             return redirect(url_for('reservation.reserve'))
 
-        success, message = Reservation.create_reservation(user_id, room_id, slot_id, purpose)
+        success, message = BookingAdmission.reserve(user_id, room_id, slot_id, purpose)
         if success:
             flash(message, 'success')
             return redirect(url_for('reservation.my_reservations'))
         else:
             flash(message, 'danger')
             
-    all_rooms = Room.get_all_rooms()
-    # Filter rooms for students in the dropdown
-    if session.get('role') == 'student':
-        all_rooms = [r for r in all_rooms if r['capacity'] <= 10]
-        
-    all_slots = Timeslot.get_all_timeslots()
-    return render_template('reserve.html', rooms=all_rooms, slots=all_slots)
+    # Only offer room/slot combinations that are still free in the date range
+    date_from, date_to = date_range_from_args(request.args)
+    criteria = None
+    if any(request.args.get(arg) for arg in ROOM_SEARCH_ARGS):
+        try:
+            criteria = room_search_from_args(request.args)
+        except ValueError:
+            flash('Please give a valid date and time to search for a room.', 'warning')
+    if criteria and 'free_on' in criteria:
+        date_from = date_to = criteria['free_on']
+    matrix = Availability.get_matrix(date_from, date_to, max_capacity=role_max_capacity())
+    free_rooms, free_slots = Availability.free_combinations(matrix)
+    if criteria:
+        # Search results in rank order, limited to rooms with something free to offer
+        offered = {room['id'] for room in free_rooms}
+        free_rooms = [room for room in Room.search(**criteria) if room['id'] in offered]
+        if 'free_on' in criteria:
+            free_slots = [slot for slot in free_slots
+                          if format_time(slot['start_time']) >= criteria['free_from']
+                          and format_time(slot['end_time']) <= criteria['free_to']]
+    slot_positions = {slot['id']: i for i, slot in enumerate(matrix['slots'])}
+    return render_template('reserve.html', rooms=free_rooms, slots=free_slots,
+                           slot_positions=slot_positions,
+                           occupied=Availability.to_json(matrix)['occupied'],
+                           date_from=date_from, date_to=date_to,
+                           searching=criteria is not None, room_types=Room.get_room_types())
+
+@reservation_bp.route('/reserve/batch', methods=['GET', 'POST'])
+@login_required
+def reserve_batch():
+    results = None
+    max_capacity = role_max_capacity()
+    if request.method == 'POST':
+        room = Room.get_room_by_id(request.form.get('room_id', type=int) or 0)
+        slot_ids = []
+        if not room:
+            flash('Please choose a room.', 'danger')
+        elif max_capacity is not None and room['capacity'] > max_capacity:
+            flash('Students cannot book rooms with capacity greater than 10.', 'danger')
+            room = None
+        elif request.form.get('pattern') == 'recurring':
+            try:
+                slot_ids = recurring_slot_ids({
+                    'from': request.form.get('rec_from'),
+                    'to': request.form.get('rec_to'),
+                    'weekdays': request.form.getlist('weekdays'),
+                    'start_time': request.form.get('start_time'),
+                    'end_time': request.form.get('end_time'),
+                })
+            except (TypeError, ValueError):
+                flash('Please give a valid date range, weekdays and times.', 'danger')
+                room = None
+        else:
+            slot_ids = request.form.getlist('slot_ids', type=int)
+        if room:
+            try:
+                slot_ids = check_batch_size(slot_ids)
+            except ValueError as e:
+                flash(f'{e}.', 'danger')
+                room = None
+
+        if room and not slot_ids:
+            flash('No timeslots match your selection.', 'warning')
+        elif room:
+            booked, results = Reservation.create_batch_reservations(
+                session['user_id'], room['id'], slot_ids, request.form['purpose'],
+                all_or_nothing=request.form.get('mode', 'all') == 'all'
+            )
+            if booked:
+                flash(f'{booked} of {len(results)} timeslots requested.', 'success')
+            else:
+                flash('No timeslots were booked.', 'danger')
+
+    rooms = [r for r in Room.get_all_rooms() if max_capacity is None or r['capacity'] <= max_capacity]
+    date_from, date_to = date_range_from_args(request.args)
+    slots = Availability.get_slots_in_range(date_from, date_to)
+    slot_lookup = {slot['id']: slot for slot in Timeslot.get_all_timeslots()} if results else {}
+    return render_template('reserve_batch.html', rooms=rooms, slots=slots,
+                           results=results, slot_lookup=slot_lookup)
 
 @reservation_bp.route('/my_reservations')
 @login_required
+@conditional_view('rooms', 'timeslots', 'my_reservations')
 def my_reservations():
     user_id = session['user_id']
-    reservations = Reservation.get_reservations_by_user(user_id)
-    return render_template('my_reservations.html', reservations=reservations)
+    filters = listing_filters(request.args)
+    reservations, next_cursor = Reservation.list_reservations(
+        user_id=user_id,
+        after=request.args.get('after'),
+        limit=Config.RESERVATIONS_PAGE_SIZE,
+        **filters
+    )
+    return render_template('my_reservations.html', reservations=reservations,
+                           filters=filters, next_cursor=next_cursor,
+                           rooms=Room.get_all_rooms())
@@ -0,0 +1,113 @@
+"""Admin dashboard throughput with sequential vs concurrent (ASYNC_VIEWS) reads.
+
+Serves /dashboard as an admin from --clients threads through the Flask test
+client, first with ASYNC_VIEWS off (the three stats queries one after
+another on one connection), then on (ParallelReads runs them at the same
+time on separate connections). The fragment cache is disabled so every
+request reaches the database. --rtt-ms adds that much sleep before each
+query, standing in for the network round trip to a remote MySQL server;
+against a local database the queries are too fast for the overlap to show.
+Only reads: no test data is created.
+
+    python tests/async_dashboard_benchmark.py --clients 8 --seconds 5 --rtt-ms 2
+    DB_BACKEND=sqlite python tests/async_dashboard_benchmark.py --rtt-ms 0
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8, help='concurrent request threads')
+    parser.add_argument('--seconds', type=float, default=5.0, help='duration of each mode')
+    parser.add_argument('--rtt-ms', type=float, default=2.0, help='emulated round trip per query')
+    parser.add_argument('--modes', default='sync,async', help='comma separated: sync, async')
+    return parser.parse_args()
+
+
+def emulate_rtt(rtt):
+    if rtt <= 0:
+        return
+    execute = InstrumentedCursor.execute
+
+    def delayed(self, sql, params=None, *args, **kwargs):
+        time.sleep(rtt)
+        return execute(self, sql, params, *args, **kwargs)
+
+    InstrumentedCursor.execute = delayed
+
+
+def run_mode(app, mode, args):
+    Config.ASYNC_VIEWS = mode == 'async'
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+
+    def client():
+        http = app.test_client()
+        with http.session_transaction() as sess:
+            sess.update(user_id=0, role='admin', user_name='Benchmark Admin')
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = http.get('/dashboard')
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    http = app.test_client()
+    with http.session_transaction() as sess:
+        sess.update(user_id=0, role='admin', user_name='Benchmark Admin')
+    http.get('/dashboard')   # warm the pools and caches
+
+    threads = [threading.Thread(target=client) for _ in range(args.clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {'rps': len(latencies) / elapsed, 'errors': errors[0]}
+    if latencies:
+        result['p50'] = latencies[len(latencies) // 2] * 1000
+        result['p95'] = latencies[int(len(latencies) * 0.95)] * 1000
+    print(f"  {mode:6} {result['rps']:8.1f} req/s  p50 {result.get('p50', 0):7.1f} ms  "
+          f"p95 {result.get('p95', 0):7.1f} ms  ({result['errors']} errors)")
+    return result
+
+
+def main(args):
+    # Every request renders and queries; enough connections for three reads per client
+    Config.FRAGMENT_CACHE_SIZE = 0
+    Config.METRICS_ENABLED = True
+    Config.DB_POOL_SIZE = max(Config.DB_POOL_SIZE, args.clients * 3 + 1)
+    Config.ASYNC_READ_WORKERS = max(Config.ASYNC_READ_WORKERS, args.clients * 3)
+    emulate_rtt(args.rtt_ms / 1000)
+
+    app.testing = True
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    print(f"\n/dashboard as admin, {args.clients} clients, {args.seconds:.0f}s per mode, "
+          f"{args.rtt_ms:g} ms emulated round trip ({Config.DB_BACKEND})")
+    results = {mode: run_mode(app, mode, args) for mode in modes}
+    if 'sync' in results and 'async' in results and results['sync']['rps']:
+        print(f"  async/sync throughput {results['async']['rps'] / results['sync']['rps']:.2f}x")
+    return sum(r['errors'] for r in results.values())
+
+
+if __name__ == '__main__':
+    from app import app
+    from config import Config
+    from models.metrics import InstrumentedCursor
+    sys.exit(1 if main(parse_args()) else 0)
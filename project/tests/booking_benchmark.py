@@ -0,0 +1,192 @@
+"""Booking path benchmark: SELECT ... FOR UPDATE vs. unique-key single INSERT.
+
+Scales the concurrency_test.py scenario (many users racing for the same room
+and slot) to hundreds of clients, with a share of clients booking unrelated
+slots in the same room to expose gap-lock serialization.
+
+Run from the project directory against a migrated database:
+    python tests/booking_benchmark.py --clients 300 --pool-size 50
+
+Creates its own benchmark users, room and timeslots and removes them afterwards.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=300, help='concurrent booking clients')
+    parser.add_argument('--pool-size', type=int, default=50, help='DB_POOL_SIZE for the benchmark')
+    parser.add_argument('--hot-share', type=float, default=0.5,
+                        help='fraction of clients racing for the single hot slot')
+    parser.add_argument('--rounds', type=int, default=3, help='rounds per booking path')
+    return parser.parse_args()
+
+
+def legacy_create_reservation(user_id, room_id, slot_id, purpose):
+    """The previous booking path, kept here only for comparison."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        cursor.execute("""
+            SELECT id FROM reservations
+            WHERE room_id = %s AND slot_id = %s AND status IN ('approved', 'pending')
+            FOR UPDATE
+        """, (room_id, slot_id))
+        if cursor.fetchone():
+            conn.rollback()
+            return False, "Room is already booked or pending approval for this timeslot."
+        cursor.execute("""
+            INSERT INTO reservations (user_id, room_id, slot_id, purpose, status)
+            VALUES (%s, %s, %s, %s, 'pending')
+        """, (user_id, room_id, slot_id, purpose))
+        conn.commit()
+        return True, "Reservation request submitted successfully."
+    except Exception as e:
+        conn.rollback()
+        return False, ('deadlock: ' if is_retryable(e) else '') + str(e)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def setup(clients):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    user_ids = []
+    for i in range(clients):
+        cursor.execute(
+            "INSERT INTO users (name, email, password_hash, role) VALUES (%s, %s, %s, 'faculty')",
+            (f"Bench {i}", f"bench{i}@booking-benchmark.local", 'x')
+        )
+        user_ids.append(cursor.lastrowid)
+    cursor.execute(
+        "INSERT INTO rooms (room_name, capacity, room_type, location) VALUES (%s, 50, 'Lab', 'Benchmark')",
+        ('Benchmark Room',)
+    )
+    room_id = cursor.lastrowid
+    slot_ids = []
+    # 24 slots a day, so no two overlap and every booking takes the lock-free path
+    for i in range(clients + 1):
+        cursor.execute(
+            "INSERT INTO timeslots (slot_date, start_time, end_time) VALUES (%s, %s, %s)",
+            (date(2099, 1, 1) + timedelta(days=i // 24), f"{i % 24:02d}:00:00", f"{i % 24:02d}:30:00")
+        )
+        slot_ids.append(cursor.lastrowid)
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return user_ids, room_id, slot_ids
+
+
+def clear_reservations(room_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM reservations WHERE room_id = %s", (room_id,))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def teardown(user_ids, room_id, slot_ids):
+    clear_reservations(room_id)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM rooms WHERE id = %s", (room_id,))
+    for slot_id in slot_ids:
+        cursor.execute("DELETE FROM timeslots WHERE id = %s", (slot_id,))
+    cursor.execute("DELETE FROM users WHERE email LIKE %s", ('%@booking-benchmark.local',))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def run_round(book, user_ids, room_id, slot_ids, hot_share):
+    hot_clients = int(len(user_ids) * hot_share)
+    barrier = threading.Barrier(len(user_ids))
+    latencies = [0.0] * len(user_ids)
+    results = [None] * len(user_ids)
+
+    def client(i):
+        # Hot clients all want slot_ids[0]; the rest each want their own slot
+        slot_id = slot_ids[0] if i < hot_clients else slot_ids[i + 1]
+        barrier.wait()
+        started = time.perf_counter()
+        results[i] = book(user_ids[i], room_id, slot_id, 'benchmark')
+        latencies[i] = time.perf_counter() - started
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(len(user_ids))]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    hot_wins = sum(1 for i in range(hot_clients) if results[i][0])
+    cold_wins = sum(1 for i in range(hot_clients, len(user_ids)) if results[i][0])
+    errors = sum(1 for ok, msg in results if not ok and 'already booked' not in msg)
+    deadlocks = sum(1 for ok, msg in results if not ok and msg.startswith('deadlock'))
+    return {
+        'elapsed': elapsed,
+        'latencies': latencies,
+        'hot_wins': hot_wins,
+        'cold_wins': cold_wins,
+        'cold_total': len(user_ids) - hot_clients,
+        'errors': errors,
+        'deadlocks': deadlocks,
+    }
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(name, rounds):
+    latencies = [l for r in rounds for l in r['latencies']]
+    total = sum(len(r['latencies']) for r in rounds)
+    elapsed = sum(r['elapsed'] for r in rounds)
+    print(f"\n{name}")
+    print(f"  throughput   {total / elapsed:8.1f} bookings/s over {len(rounds)} round(s)")
+    print(f"  latency ms   p50 {percentile(latencies, 50) * 1000:7.1f}  "
+          f"p95 {percentile(latencies, 95) * 1000:7.1f}  "
+          f"p99 {percentile(latencies, 99) * 1000:7.1f}  "
+          f"mean {statistics.mean(latencies) * 1000:7.1f}")
+    for i, r in enumerate(rounds, 1):
+        status = 'OK' if r['hot_wins'] == 1 else 'DOUBLE BOOKED' if r['hot_wins'] > 1 else 'NO WINNER'
+        print(f"  round {i}: hot slot winners={r['hot_wins']} ({status}), "
+              f"unrelated bookings {r['cold_wins']}/{r['cold_total']}, "
+              f"errors={r['errors']} deadlocks={r['deadlocks']}")
+
+
+def main():
+    user_ids, room_id, slot_ids = setup(args.clients)
+    try:
+        for name, book in (('legacy SELECT ... FOR UPDATE', legacy_create_reservation),
+                           ('unique key + single INSERT', Reservation.create_reservation)):
+            rounds = []
+            for _ in range(args.rounds):
+                clear_reservations(room_id)
+                rounds.append(run_round(book, user_ids, room_id, slot_ids, args.hot_share))
+            report(name, rounds)
+    finally:
+        teardown(user_ids, room_id, slot_ids)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    # Pool settings are read when the models are imported
+    os.environ['DB_POOL_SIZE'] = str(args.pool_size)
+    os.environ.setdefault('DB_POOL_TIMEOUT', '60')
+    from models.db_connection import get_db_connection, is_retryable
+    from models.reservation_model import Reservation
+    main()
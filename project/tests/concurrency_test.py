@@ -1,72 +1,349 @@
-import requests
+"""Load test and double-booking invariant check.
+
+Creates N test users (plus one admin), a few rooms and timeslots, then ramps
+concurrency through the given steps with a weighted mix of login, dashboard,
+reserve and approve requests. Reports throughput and p50/p95/p99 latency per
+endpoint, checks the "at most one active reservation per room+slot" invariant
+directly in the database and writes machine-readable results.
+
+Runs offline: --serve starts the app in-process on a free local port, using
+the database configured in .env / DB_* variables (a local MySQL instance, or
+DB_BACKEND=sqlite with no server at all). Use --base-url to hit an app that
+is already running instead.
+
+Examples (from the project directory):
+    python tests/concurrency_test.py --serve --users 50 --ramp 5,20,50 --step-seconds 10
+    DB_BACKEND=sqlite python tests/concurrency_test.py --serve --output sqlite.json
+    python tests/concurrency_test.py --serve --output run2.json --compare run1.json
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import sys
 import threading
 import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'loadtest-password'
+EMAIL_DOMAIN = 'loadtest.local'
+ENDPOINTS = ('login', 'dashboard', 'reserve', 'approve')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test with double-booking invariant check")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--serve', action='store_true', help='start the app in-process (default)')
+    target.add_argument('--base-url', help='URL of an already running app')
+    parser.add_argument('--users', type=int, default=50, help='test users to create')
+    parser.add_argument('--rooms', type=int, default=3, help='test rooms to create')
+    parser.add_argument('--slots', type=int, default=10, help='test timeslots to create')
+    parser.add_argument('--ramp', default='5,20,50', help='comma separated concurrency steps')
+    parser.add_argument('--step-seconds', type=float, default=10.0, help='duration of each step')
+    parser.add_argument('--mix', default='login=1,dashboard=4,reserve=4,approve=1',
+                        help='relative weights per endpoint')
+    parser.add_argument('--output', default='loadtest_results.json', help='JSON results file')
+    parser.add_argument('--compare', help='previous JSON results to compare against')
+    parser.add_argument('--keep', action='store_true', help='keep the test data afterwards')
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args()
+
+
+def parse_mix(text):
+    weights = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint in --mix: {name}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+# --- Test data -----------------------------------------------------------------
+
+def create_fixtures(n_users, n_rooms, n_slots):
+    from models.db_connection import get_db_connection
+    from models.user_model import User
+
+    for i in range(n_users):
+        User.create_user(f"Load User {i}", f"user{i}@{EMAIL_DOMAIN}", PASSWORD, 'faculty')
+    User.create_user("Load Admin", f"admin@{EMAIL_DOMAIN}", PASSWORD, 'admin')
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    room_ids, slot_ids = [], []
+    for i in range(n_rooms):
+        cursor.execute(
+            "INSERT INTO rooms (room_name, capacity, room_type, location) VALUES (%s, 8, 'Lab', %s)",
+            (f"Load Room {i}", EMAIL_DOMAIN)
+        )
+        room_ids.append(cursor.lastrowid)
+    for i in range(n_slots):
+        cursor.execute(
+            "INSERT INTO timeslots (slot_date, start_time, end_time) VALUES ('2099-12-31', %s, %s)",
+            (f"{i % 24:02d}:00:00", f"{i % 24:02d}:59:00")
+        )
+        slot_ids.append(cursor.lastrowid)
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return room_ids, slot_ids
+
+
+def remove_fixtures(room_ids, slot_ids):
+    from models.db_connection import get_db_connection
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if room_ids:
+        rooms = ', '.join(['%s'] * len(room_ids))
+        cursor.execute(
+            f"DELETE FROM approvals WHERE reservation_id IN "
+            f"(SELECT id FROM reservations WHERE room_id IN ({rooms}))", room_ids)
+        cursor.execute(f"DELETE FROM reservations WHERE room_id IN ({rooms})", room_ids)
+        cursor.execute(f"DELETE FROM rooms WHERE id IN ({rooms})", room_ids)
+    if slot_ids:
+        cursor.execute(f"DELETE FROM timeslots WHERE id IN ({', '.join(['%s'] * len(slot_ids))})", slot_ids)
+    cursor.execute("DELETE FROM users WHERE email LIKE %s", (f"%@{EMAIL_DOMAIN}",))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def pending_ids(room_ids):
+    from models.db_connection import get_db_connection
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT id FROM reservations WHERE status = 'pending' "
+        f"AND room_id IN ({', '.join(['%s'] * len(room_ids))}) LIMIT 20", room_ids)
+    ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    return ids
+
+
+def check_invariant(room_ids):
+    """Rooms+slots with more than one pending/approved reservation (must be empty)."""
+    from models.db_connection import get_db_connection
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT room_id, slot_id, COUNT(*) FROM reservations
+        WHERE status IN ('pending', 'approved') AND room_id IN ({', '.join(['%s'] * len(room_ids))})
+        GROUP BY room_id, slot_id
+        HAVING COUNT(*) > 1
+    """, room_ids)
+    violations = [{'room_id': r, 'slot_id': s, 'active': n} for r, s, n in cursor.fetchall()]
+    cursor.execute(
+        f"SELECT status, COUNT(*) FROM reservations WHERE room_id IN ({', '.join(['%s'] * len(room_ids))}) "
+        f"GROUP BY status", room_ids)
+    totals = dict(cursor.fetchall())
+    cursor.close()
+    conn.close()
+    return violations, totals
+
+
+# --- HTTP client ---------------------------------------------------------------
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
 
-# Configuration
-BASE_URL = "http://localhost:5001"
-LOGIN_URL = f"{BASE_URL}/login"
-RESERVE_URL = f"{BASE_URL}/reserve"
-
-# User Credentials (created in previous steps)
-USER1 = {"email": "student@test.com", "password": "password"}
-USER2 = {"email": "faculty@test.com", "password": "password"}
-
-# Target Booking (Same Room, Same Slot)
-# Room 1 (Lecture Hall A), Slot 3 (2023-12-01 11:00-12:00)
-ROOM_ID = "2"
-SLOT_ID = "3"
-
-def login(session, email, password):
-    # Get login page to get CSRF token if needed (Flask-WTF) - but we are using basic HTML forms
-    # Just post credentials
-    response = session.post(LOGIN_URL, data={"email": email, "password": password})
-    if response.url == f"{BASE_URL}/dashboard":
-        print(f"Login successful for {email}")
-        return True
+
+class Client:
+    """One browser-like session with its own cookie jar."""
+
+    def __init__(self, base_url, email):
+        self.base_url = base_url
+        self.email = email
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect())
+
+    def request(self, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        try:
+            with self.opener.open(self.base_url + path, data=body, timeout=30) as response:
+                response.read()
+                return response.status, response.headers
+        except urllib.error.HTTPError as err:
+            err.read()
+            return err.code, err.headers
+
+    def login(self):
+        status, headers = self.request('/login', {'email': self.email, 'password': PASSWORD})
+        return status == 302 and '/dashboard' in (headers.get('Location') or '')
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {name: [] for name in ENDPOINTS}
+        self.errors = {name: 0 for name in ENDPOINTS}
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.samples[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(recorder, elapsed):
+    endpoints = {}
+    for name in ENDPOINTS:
+        samples = recorder.samples[name]
+        endpoints[name] = {
+            'requests': len(samples),
+            'errors': recorder.errors[name],
+            'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(percentile(samples, 50) * 1000, 2) if samples else None,
+            'p95_ms': round(percentile(samples, 95) * 1000, 2) if samples else None,
+            'p99_ms': round(percentile(samples, 99) * 1000, 2) if samples else None,
+        }
+    total = sum(e['requests'] for e in endpoints.values())
+    return {'elapsed_s': round(elapsed, 3), 'requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+            'endpoints': endpoints}
+
+
+def run_step(base_url, concurrency, seconds, weights, n_users, room_ids, slot_ids, rng):
+    recorder = Recorder()
+    stop_at = time.monotonic() + seconds
+    names = list(weights)
+    weight_values = [weights[n] for n in names]
+
+    def timed(endpoint, func):
+        started = time.perf_counter()
+        try:
+            ok = func()
+        except Exception:
+            ok = False
+        recorder.record(endpoint, time.perf_counter() - started, ok)
+
+    def worker(index):
+        local_rng = random.Random(rng.random())
+        user = Client(base_url, f"user{index % n_users}@{EMAIL_DOMAIN}")
+        admin = Client(base_url, f"admin@{EMAIL_DOMAIN}")
+        user.login()
+        admin_logged_in = False
+        while time.monotonic() < stop_at:
+            endpoint = local_rng.choices(names, weights=weight_values)[0]
+            if endpoint == 'login':
+                timed('login', user.login)
+            elif endpoint == 'dashboard':
+                timed('dashboard', lambda: user.request('/dashboard')[0] == 200)
+            elif endpoint == 'reserve':
+                # Skewed towards the first slot so requests actually collide
+                slot_id = slot_ids[0] if local_rng.random() < 0.3 else local_rng.choice(slot_ids)
+                data = {'room_id': local_rng.choice(room_ids), 'slot_id': slot_id, 'purpose': 'load test'}
+                timed('reserve', lambda: user.request('/reserve', data)[0] in (200, 302))
+            else:
+                if not admin_logged_in:
+                    admin_logged_in = admin.login()
+                ids = pending_ids(room_ids)
+                if ids:
+                    res_id = local_rng.choice(ids)
+                    timed('approve', lambda: admin.request(
+                        f'/admin/approve/{res_id}', {'action': 'approve', 'notes': ''})[0] == 302)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(recorder, time.perf_counter() - started)
+
+
+def start_server():
+    from werkzeug.serving import make_server
+    from config import Config
+    # Measures throughput, so every user hammers login/reserve past their rate
+    # limits: leave them out (tests/rate_limit_check.py covers the limits)
+    Config.RATE_LIMITING = False
+    from app import app
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def print_report(results, previous=None):
+    for step in results['steps']:
+        print(f"\nconcurrency {step['concurrency']}: {step['throughput_rps']} req/s, "
+              f"{step['requests']} requests in {step['elapsed_s']}s")
+        old_step = None
+        if previous:
+            old_step = next((s for s in previous.get('steps', []) if s['concurrency'] == step['concurrency']), None)
+        for name, e in step['endpoints'].items():
+            if not e['requests']:
+                continue
+            line = (f"  {name:<10} {e['requests']:>6} req  {e['errors']:>4} err  "
+                    f"p50 {e['p50_ms']:>8.1f}  p95 {e['p95_ms']:>8.1f}  p99 {e['p99_ms']:>8.1f} ms")
+            old = old_step['endpoints'].get(name) if old_step else None
+            if old and old.get('p95_ms'):
+                line += f"  (p95 {e['p95_ms'] - old['p95_ms']:+.1f} ms vs previous)"
+            print(line)
+    invariant = results['invariant']
+    print(f"\nreservations by status: {invariant['totals']}")
+    if invariant['violations']:
+        print(f"INVARIANT VIOLATED: {invariant['violations']}")
     else:
-        print(f"Login failed for {email}. URL: {response.url}")
-        if "Invalid email or password" in response.text:
-            print("Reason: Invalid credentials")
+        print("invariant OK: at most one active reservation per room+slot")
+
+
+def main():
+    args = parse_args()
+    weights = parse_mix(args.mix)
+    steps = [int(s) for s in args.ramp.split(',') if s.strip()]
+    rng = random.Random(args.seed)
+
+    room_ids, slot_ids = create_fixtures(args.users, args.rooms, args.slots)
+    server = None
+    try:
+        if args.base_url:
+            base_url = args.base_url.rstrip('/')
         else:
-            print(f"Response text snippet: {response.text[:200]}")
-        return False
-
-def book_room(user_name, email, password):
-    session = requests.Session()
-    if not login(session, email, password):
-        return
-
-    print(f"{user_name} attempting to book...")
-    
-    # Simulate simultaneous request
-    data = {
-        "room_id": ROOM_ID,
-        "slot_id": SLOT_ID,
-        "purpose": f"Concurrency Test by {user_name}"
-    }
-    
-    start_time = time.time()
-    response = session.post(RESERVE_URL, data=data)
-    end_time = time.time()
-    
-    # Check for success message or error
-    if "Reservation request submitted successfully" in response.text:
-        print(f"SUCCESS: {user_name} booked the room! (Time: {end_time - start_time:.4f}s)")
-    elif "Room is already booked" in response.text:
-        print(f"BLOCKED: {user_name} was prevented from double booking. (Time: {end_time - start_time:.4f}s)")
-    else:
-        print(f"UNKNOWN: {user_name} got unexpected response.")
-        print(f"Response snippet: {response.text[:500]}")
+            server, base_url = start_server()
+        results = {'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'base_url': base_url,
+                   'users': args.users, 'mix': weights, 'steps': []}
+        for concurrency in steps:
+            step = run_step(base_url, concurrency, args.step_seconds, weights,
+                            args.users, room_ids, slot_ids, rng)
+            step['concurrency'] = concurrency
+            results['steps'].append(step)
+        violations, totals = check_invariant(room_ids)
+        results['invariant'] = {'ok': not violations, 'violations': violations, 'totals': totals}
+    finally:
+        if server:
+            server.shutdown()
+        if not args.keep:
+            remove_fixtures(room_ids, slot_ids)
 
-# Create threads
-t1 = threading.Thread(target=book_room, args=("Student", USER1["email"], USER1["password"]))
-t2 = threading.Thread(target=book_room, args=("Faculty", USER2["email"], USER2["password"]))
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2, default=str)
+    print_report(results, previous)
+    print(f"\nresults written to {args.output}")
+    return 0 if results['invariant']['ok'] else 1
 
-print("Starting Concurrency Test...")
-# Start threads simultaneously
-t1.start()
-t2.start()
 
-t1.join()
-t2.join()
-print("Test Complete.")
+if __name__ == '__main__':
+    sys.exit(main())
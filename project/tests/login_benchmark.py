@@ -0,0 +1,158 @@
+"""Login throughput benchmark for the password hashing pool.
+
+Runs concurrent logins against the app in-process (Flask test client) while
+a probe thread keeps requesting a cheap page, and reports login throughput,
+login and probe latency percentiles and how many logins were shed with 503.
+Compare runs with different PASSWORD_HASH_WORKERS / PASSWORD_HASH_QUEUE:
+
+    python tests/login_benchmark.py --clients 40 --workers 0
+    python tests/login_benchmark.py --clients 40 --workers 2 --queue 16
+
+--legacy-method stores the test users' hashes with another method so the
+run also exercises rehash-on-login. Creates its own users and removes them.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'login-benchmark-password'
+EMAIL_DOMAIN = 'login-benchmark.local'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=40, help='concurrent login clients')
+    parser.add_argument('--users', type=int, default=100, help='test users to create')
+    parser.add_argument('--seconds', type=float, default=10.0, help='benchmark duration')
+    parser.add_argument('--workers', type=int, default=2, help='PASSWORD_HASH_WORKERS (0 = request thread)')
+    parser.add_argument('--queue', type=int, default=32, help='PASSWORD_HASH_QUEUE')
+    parser.add_argument('--method', default=None, help='PASSWORD_HASH_METHOD (default: config)')
+    parser.add_argument('--legacy-method', default=None,
+                        help="hash the test users with this method, e.g. 'pbkdf2:sha256:1000'")
+    return parser.parse_args()
+
+
+def create_users(n_users, method):
+    password_hash = generate_password_hash(PASSWORD, method)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO users (name, email, password_hash, role) VALUES (%s, %s, %s, 'student')",
+        [(f"Login Bench {i}", f"user{i}@{EMAIL_DOMAIN}", password_hash) for i in range(n_users)]
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def remove_users():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM users WHERE email LIKE %s AND password_hash LIKE %s",
+                   (f"%@{EMAIL_DOMAIN}", PasswordHasher.get_stats()['method'] + '$%'))
+    upgraded = cursor.fetchone()[0]
+    cursor.execute("DELETE FROM users WHERE email LIKE %s", (f"%@{EMAIL_DOMAIN}",))
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return upgraded
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(app, args):
+    stop = threading.Event()
+    lock = threading.Lock()
+    logins, shed, failed, probes = [], [0], [0], []
+
+    def login_client(i):
+        client = app.test_client()
+        n = 0
+        while not stop.is_set():
+            email = f"user{(i + n * args.clients) % args.users}@{EMAIL_DOMAIN}"
+            n += 1
+            started = time.perf_counter()
+            response = client.post('/login', data={'email': email, 'password': PASSWORD})
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 503:
+                    shed[0] += 1
+                elif response.status_code == 302 and '/dashboard' in response.headers.get('Location', ''):
+                    logins.append(elapsed)
+                else:
+                    failed[0] += 1
+            if response.status_code == 503:
+                # Back off briefly instead of spinning on a full queue
+                time.sleep(0.05)
+            else:
+                client.get('/logout')
+
+    def probe():
+        # A page that needs no hashing: shows whether logins stall other requests
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/login')
+            probes.append(time.perf_counter() - started)
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=login_client, args=(i,)) for i in range(args.clients)]
+    threads.append(threading.Thread(target=probe))
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, logins, shed[0], failed[0], probes
+
+
+def main(args):
+    from app import app
+
+    create_users(args.users, args.legacy_method or Config.PASSWORD_HASH_METHOD)
+    try:
+        elapsed, logins, shed, failed, probes = run(app, args)
+    finally:
+        # Let background rehashes finish before counting them
+        time.sleep(0.5)
+        upgraded = remove_users()
+
+    print(f"\nhash method {Config.PASSWORD_HASH_METHOD}, workers {Config.PASSWORD_HASH_WORKERS}, "
+          f"queue {Config.PASSWORD_HASH_QUEUE}, {args.clients} clients, {elapsed:.1f}s")
+    print(f"  logins       {len(logins) / elapsed:8.1f} /s  ({len(logins)} ok, {shed} shed with 503, {failed} failed)")
+    print(f"  login ms     p50 {percentile(logins, 50) * 1000:7.1f}  p95 {percentile(logins, 95) * 1000:7.1f}  "
+          f"p99 {percentile(logins, 99) * 1000:7.1f}")
+    print(f"  probe ms     p50 {percentile(probes, 50) * 1000:7.1f}  p95 {percentile(probes, 95) * 1000:7.1f}  "
+          f"max {max(probes, default=float('nan')) * 1000:7.1f}"
+          + (f"  mean {statistics.mean(probes) * 1000:7.1f}" if probes else ''))
+    if args.legacy_method:
+        print(f"  rehashed     {upgraded}/{args.users} users upgraded from {args.legacy_method}")
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    # Hashing settings are read when the models are imported
+    os.environ['PASSWORD_HASH_WORKERS'] = str(args.workers)
+    os.environ['PASSWORD_HASH_QUEUE'] = str(args.queue)
+    if args.method:
+        os.environ['PASSWORD_HASH_METHOD'] = args.method
+    # Logins go past the per-account limits; this measures the hashing pool
+    # (tests/rate_limit_check.py covers the limits)
+    os.environ.setdefault('RATE_LIMITING', 'false')
+    from werkzeug.security import generate_password_hash
+    from config import Config
+    from models.db_connection import get_db_connection
+    from models.password_hasher import PasswordHasher
+    main(args)
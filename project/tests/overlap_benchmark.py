@@ -0,0 +1,198 @@
+"""Overlap detection benchmark with dense, overlapping schedules.
+
+Part 1 (in memory) builds a timetable where a slot starts every --step
+minutes and lasts 30 to --max-minutes, then compares IntervalIndex overlap
+queries with a linear scan of the day's slots. Part 2 (database) creates the
+same kind of timetable for one test room, books random slots from --clients
+threads through Reservation.create_reservation, and checks that no two active
+reservations of the room overlap. Creates its own room, user and timeslots
+(dated in 2099) and removes them.
+
+    python tests/overlap_benchmark.py --days 30 --step 15 --queries 20000
+    DB_BACKEND=sqlite python tests/overlap_benchmark.py --clients 8 --seconds 5
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.interval_index import IntervalIndex
+
+EMAIL = 'overlap-benchmark@benchmark.local'
+ROOM_NAME = 'Overlap Benchmark Room'
+FIRST_DAY = date(2099, 1, 5)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=30, help='days in the timetable')
+    parser.add_argument('--step', type=int, default=15, help='minutes between slot starts')
+    parser.add_argument('--max-minutes', type=int, default=120, help='longest slot')
+    parser.add_argument('--queries', type=int, default=20000, help='in-memory overlap queries')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent booking threads')
+    parser.add_argument('--seconds', type=float, default=5.0, help='booking phase duration')
+    parser.add_argument('--db-days', type=int, default=3, help='days of timeslots created in the database')
+    parser.add_argument('--skip-db', action='store_true', help='only run the in-memory part')
+    return parser.parse_args()
+
+
+def timetable(days, step, max_minutes, seed=1):
+    """(day, start, end) strings: a slot every `step` minutes from 08:00 to 20:00."""
+    rng = random.Random(seed)
+    slots = []
+    for d in range(days):
+        day = FIRST_DAY + timedelta(days=d)
+        for start in range(8 * 60, 20 * 60, step):
+            end = min(start + rng.randrange(30, max_minutes + 1, 15), 22 * 60)
+            slots.append((day, f"{start // 60:02d}:{start % 60:02d}:00", f"{end // 60:02d}:{end % 60:02d}:00"))
+    return slots
+
+
+def bench_memory(args):
+    slots = timetable(args.days, args.step, args.max_minutes)
+    intervals = [(i, day, start, end) for i, (day, start, end) in enumerate(slots)]
+    started = time.perf_counter()
+    index = IntervalIndex(intervals)
+    build = time.perf_counter() - started
+
+    by_day = {}
+    for key, day, start, end in intervals:
+        by_day.setdefault(day, []).append((key, start, end))
+    queries = [random.choice(intervals) for _ in range(args.queries)]
+
+    started = time.perf_counter()
+    indexed = [index.overlapping(day, start, end) for _, day, start, end in queries]
+    indexed_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scanned = [[k for k, s, e in by_day[day] if s < end and e > start] for _, day, start, end in queries]
+    scan_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _, day, start, end in queries[:max(1, args.queries // 20)]:
+        [k for k, d, s, e in intervals if d == day and s < end and e > start]
+    full_time = (time.perf_counter() - started) / max(1, args.queries // 20) * args.queries
+
+    assert all(sorted(a) == sorted(b) for a, b in zip(indexed, scanned)), "index and scan disagree"
+    per_query = sum(len(r) for r in indexed) / len(indexed)
+    print(f"\n{len(slots)} slots over {args.days} days, {len(slots) // args.days} per day, "
+          f"{per_query:.1f} overlaps per query (build {build * 1000:.1f} ms)")
+    for label, elapsed in (('interval index', indexed_time), ('scan of the day', scan_time),
+                           ('scan of all slots', full_time)):
+        print(f"  {label:18} {elapsed / args.queries * 1e6:8.2f} us/query")
+
+
+def setup_db(args):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO rooms (room_name, capacity, room_type, location) VALUES (%s, 10, 'Benchmark', '-')",
+                   (ROOM_NAME,))
+    cursor.execute("INSERT INTO users (name, email, password_hash, role) VALUES ('Overlap Bench', %s, '-', 'faculty')",
+                   (EMAIL,))
+    cursor.executemany("INSERT INTO timeslots (slot_date, start_time, end_time) VALUES (%s, %s, %s)",
+                       timetable(args.db_days, args.step, args.max_minutes))
+    DataCache.bump_version(cursor, 'timeslots')
+    conn.commit()
+    cursor.execute("SELECT id FROM rooms WHERE room_name = %s", (ROOM_NAME,))
+    room_id = cursor.fetchone()[0]
+    cursor.execute("SELECT id FROM users WHERE email = %s", (EMAIL,))
+    user_id = cursor.fetchone()[0]
+    cursor.execute("SELECT id FROM timeslots WHERE slot_date >= %s", (FIRST_DAY,))
+    slot_ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    DataCache.invalidate('timeslots')
+    return room_id, user_id, slot_ids
+
+
+def overlapping_pairs(room_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT COUNT(*) FROM reservations a
+        JOIN timeslots ta ON ta.id = a.slot_id
+        JOIN reservations b ON b.room_id = a.room_id AND b.id > a.id
+        JOIN timeslots tb ON tb.id = b.slot_id
+        WHERE a.room_id = %s
+          AND a.status IN ('pending', 'approved') AND b.status IN ('pending', 'approved')
+          AND ta.slot_date = tb.slot_date AND ta.start_time < tb.end_time AND tb.start_time < ta.end_time
+    """, (room_id,))
+    count = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return count
+
+
+def cleanup_db(room_id, user_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM reservations WHERE room_id = %s", (room_id,))
+    cursor.execute("DELETE FROM reservation_versions WHERE user_id = %s", (user_id,))
+    cursor.execute("DELETE FROM timeslots WHERE slot_date >= %s", (FIRST_DAY,))
+    cursor.execute("DELETE FROM rooms WHERE id = %s", (room_id,))
+    cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+    DataCache.bump_version(cursor, 'timeslots')
+    DataCache.bump_version(cursor, 'rooms')
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def bench_db(args):
+    room_id, user_id, slot_ids = setup_db(args)
+    stop = threading.Event()
+    lock = threading.Lock()
+    outcomes = {'booked': 0, 'overlap': 0, 'taken': 0, 'error': 0}
+    latencies = []
+
+    def client(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            started = time.perf_counter()
+            success, message = Reservation.create_reservation(user_id, room_id, rng.choice(slot_ids), 'benchmark')
+            elapsed = time.perf_counter() - started
+            outcome = ('booked' if success else 'overlap' if message == OVERLAP_MESSAGE
+                       else 'taken' if message == SLOT_TAKEN_MESSAGE else 'error')
+            with lock:
+                outcomes[outcome] += 1
+                latencies.append(elapsed)
+
+    try:
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        violations = overlapping_pairs(room_id)
+    finally:
+        cleanup_db(room_id, user_id)
+
+    latencies.sort()
+    total = sum(outcomes.values())
+    print(f"\n{len(slot_ids)} overlapping timeslots in one room, {args.clients} clients, {elapsed:.1f}s")
+    print(f"  attempts     {total / elapsed:8.1f} /s  ({outcomes['booked']} booked, {outcomes['overlap']} overlap, "
+          f"{outcomes['taken']} taken, {outcomes['error']} errors)")
+    if latencies:
+        print(f"  latency ms   p50 {latencies[len(latencies) // 2] * 1000:7.1f}  "
+              f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.1f}")
+    print(f"  invariant    {'OK' if violations == 0 else 'VIOLATED'}: {violations} overlapping active pairs")
+    return violations
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    bench_memory(args)
+    if not args.skip_db:
+        from models.cache import DataCache
+        from models.db_connection import get_db_connection
+        from models.reservation_model import Reservation, OVERLAP_MESSAGE, SLOT_TAKEN_MESSAGE
+        sys.exit(1 if bench_db(args) else 0)
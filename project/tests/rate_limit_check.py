@@ -0,0 +1,101 @@
+"""Check that the login rate limits shed noisy clients, not everyone behind one proxy.
+
+Posts logins through the Flask test client with every request arriving from
+one reverse proxy address (TRUSTED_PROXIES=1), the way the Procfile /
+railway.json / Render deploys see them, and checks with both bucket backends:
+- proxy: --clients clients with their own X-Forwarded-For IP each use up
+  their LOGIN_BURST; none may be shed;
+- nat: as many users as fit in LOGIN_IP_BURST share one client IP (a campus
+  NAT) and each use up their LOGIN_BURST; none may be shed;
+- noisy: one client going past its LOGIN_BURST gets 429 with Retry-After,
+  while another user on the same IP still gets through.
+Logins are for unknown emails, so no test data is created; the database in
+.env / DB_* variables only answers the lookups. Exits 1 if a check fails.
+
+    python tests/rate_limit_check.py --clients 50
+    DB_BACKEND=sqlite python tests/rate_limit_check.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROXY_ADDR = '10.0.0.1'
+EMAIL_DOMAIN = 'ratelimit-check.local'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=50, help='distinct clients behind the proxy')
+    parser.add_argument('--backends', default='memory,shared', help='comma separated: memory, shared')
+    return parser.parse_args()
+
+
+def post_login(http, client_ip, email):
+    return http.post('/login', data={'email': email, 'password': 'wrong-password'},
+                     headers={'X-Forwarded-For': client_ip},
+                     environ_base={'REMOTE_ADDR': PROXY_ADDR})
+
+
+def check_proxy(http, n_clients, tag):
+    """Clients behind one proxy: each uses its whole burst, none is shed."""
+    shed = 0
+    for i in range(n_clients):
+        client_ip = f"198.51.{i // 250}.{i % 250 + 1}"
+        for _ in range(Config.LOGIN_BURST):
+            shed += post_login(http, client_ip, f"{tag}-proxy{i}@{EMAIL_DOMAIN}").status_code == 429
+    return shed == 0, f"{n_clients} clients x {Config.LOGIN_BURST} logins, {shed} shed"
+
+
+def check_nat(http, tag):
+    """Users sharing one client IP: each uses their whole burst, none is shed."""
+    n_users = max(1, Config.LOGIN_IP_BURST // max(1, Config.LOGIN_BURST))
+    shed = 0
+    for i in range(n_users):
+        for _ in range(Config.LOGIN_BURST):
+            shed += post_login(http, '203.0.113.7', f"{tag}-nat{i}@{EMAIL_DOMAIN}").status_code == 429
+    return shed == 0, f"{n_users} users on one IP x {Config.LOGIN_BURST} logins, {shed} shed"
+
+
+def check_noisy(http, tag):
+    """A client past its burst is shed; its neighbour on the same IP is not."""
+    noisy = f"{tag}-noisy@{EMAIL_DOMAIN}"
+    for _ in range(Config.LOGIN_BURST):
+        post_login(http, '203.0.113.9', noisy)
+    over = post_login(http, '203.0.113.9', noisy)
+    neighbour = post_login(http, '203.0.113.9', f"{tag}-neighbour@{EMAIL_DOMAIN}")
+    ok = (over.status_code == 429 and over.headers.get('Retry-After')
+          and neighbour.status_code != 429)
+    return ok, f"noisy client {over.status_code} (Retry-After {over.headers.get('Retry-After')}), " \
+               f"neighbour {neighbour.status_code}"
+
+
+def main(args):
+    app.testing = True
+    failures = 0
+    print(f"\nLogins behind one proxy, LOGIN {Config.LOGIN_RATE_PER_MINUTE:g}/min burst {Config.LOGIN_BURST}, "
+          f"LOGIN_IP {Config.LOGIN_IP_RATE_PER_MINUTE:g}/min burst {Config.LOGIN_IP_BURST} ({Config.DB_BACKEND})")
+    for backend in [b.strip() for b in args.backends.split(',') if b.strip()]:
+        Config.RATE_LIMIT_BACKEND = backend
+        Config.RATE_LIMIT_PATH = os.path.join(tempfile.mkdtemp(), 'ratelimit.sqlite3')
+        RateLimiter._backend = None   # start from empty buckets
+        http = app.test_client()
+        for name, check in (('proxy', lambda tag: check_proxy(http, args.clients, tag)),
+                            ('nat', lambda tag: check_nat(http, tag)),
+                            ('noisy', lambda tag: check_noisy(http, tag))):
+            ok, detail = check(f"{backend}-{name}")
+            failures += not ok
+            print(f"  {backend:6} {name:6} {'ok' if ok else 'FAILED':7} {detail}")
+    return failures
+
+
+if __name__ == '__main__':
+    from config import Config
+    # The deploy setup: limits on, one trusted proxy (read when the app is built)
+    Config.RATE_LIMITING = True
+    Config.TRUSTED_PROXIES = 1
+    from app import app
+    from models.rate_limiter import RateLimiter
+    sys.exit(1 if main(parse_args()) else 0)